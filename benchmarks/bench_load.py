@@ -0,0 +1,201 @@
+"""Concurrent load against the real service, started in a subprocess by AppDriver.
+
+    python -m benchmarks.bench_load --workers 2 --concurrency 32 --duration 20 \\
+        --mix submit=1,get_statement=2,report_rating=3,period_rating=3,batch_rating=1
+
+Clients are asyncio tasks sharing one keep-alive httpx connection pool. Each
+picks its next request from the weighted mix until the duration (or request
+count) is reached. The database is seeded up front in a temporary directory.
+Throughput, latency percentiles and error rates are reported per request
+kind and overall, and saved as JSON.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks.harness import REPO_ROOT, summarise, build_report, save_report, \
+    load_report, print_results, default_report_path
+from benchmarks.seed import Scale, seed_database, HISTORY, SEED_NOW
+from service.db import create_db_engine
+from tests.support.app_driver import AppDriver
+
+DEFAULT_MIX = "submit=1,get_statement=2,list_statements=1,report_rating=3," \
+              "period_rating=3,batch_rating=0"
+PERIOD = timedelta(days=90)
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    weights = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in REQUESTS:
+            raise argparse.ArgumentTypeError(
+                f"Unknown request {name!r}, expected one of {', '.join(REQUESTS)}")
+        weights[name.strip()] = float(weight or 1)
+    if not any(weights.values()):
+        raise argparse.ArgumentTypeError("The mix needs at least one positive weight")
+    return weights
+
+
+def submit(scale: Scale, randomness: random.Random) -> Tuple[str, str, dict]:
+    items = scale.items_per_statement
+    return "POST", "/api/statements", {"json": {
+        "user_id": randomness.randint(1, scale.users),
+        "incomes": [{"category": "Salary", "amount": 1000.0 + item}
+                    for item in range(items)],
+        "expenditures": [{"category": "Rent", "amount": 250.0 + item}
+                         for item in range(items)]}}
+
+
+def get_statement(scale: Scale, randomness: random.Random) -> Tuple[str, str, dict]:
+    statement_id = randomness.randint(1, scale.statements)
+    return "GET", f"/api/statements/{statement_id}", {
+        "params": {"user_id": scale.owner_of(statement_id)}}
+
+
+def list_statements(scale: Scale, randomness: random.Random) -> Tuple[str, str, dict]:
+    return "GET", "/api/statements", {
+        "params": {"user_id": randomness.randint(1, scale.users)}}
+
+
+def report_rating(scale: Scale, randomness: random.Random) -> Tuple[str, str, dict]:
+    statement_id = randomness.randint(1, scale.statements)
+    return "GET", "/api/ratings", {"params": {
+        "report_id": statement_id, "user_id": scale.owner_of(statement_id)}}
+
+
+def period_rating(scale: Scale, randomness: random.Random) -> Tuple[str, str, dict]:
+    start = SEED_NOW - HISTORY + timedelta(
+        days=randomness.uniform(0, (HISTORY - PERIOD).days))
+    return "GET", "/api/ratings", {"params": {
+        "user_id": randomness.randint(1, scale.users),
+        "start_date": start.isoformat(), "end_date": (start + PERIOD).isoformat()}}
+
+
+def batch_rating(scale: Scale, randomness: random.Random) -> Tuple[str, str, dict]:
+    statement_ids = [randomness.randint(1, scale.statements) for _ in range(50)]
+    return "POST", "/api/ratings/batch", {"json": [
+        {"user_id": scale.owner_of(statement_id), "report_id": statement_id}
+        for statement_id in statement_ids]}
+
+
+REQUESTS: Dict[str, Callable[[Scale, random.Random], Tuple[str, str, dict]]] = {
+    "submit": submit,
+    "get_statement": get_statement,
+    "list_statements": list_statements,
+    "report_rating": report_rating,
+    "period_rating": period_rating,
+    "batch_rating": batch_rating,
+}
+
+
+async def drive(root: str, scale: Scale, mix: Dict[str, float], concurrency: int,
+                duration: float, max_requests: Optional[int], seed: int) \
+        -> Tuple[Dict[str, List[float]], Dict[str, int], float]:
+    names = [name for name, weight in mix.items() if weight > 0]
+    weights = [mix[name] for name in names]
+    samples: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    issued = 0
+    deadline = time.perf_counter() + duration
+
+    async def client_loop(client: httpx.AsyncClient, randomness: random.Random):
+        nonlocal issued
+        while time.perf_counter() < deadline and (max_requests is None
+                                                  or issued < max_requests):
+            issued += 1
+            name = randomness.choices(names, weights)[0]
+            method, path, options = REQUESTS[name](scale, randomness)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **options)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            samples[name].append(time.perf_counter() - started)
+            errors[name] += failed
+
+    limits = httpx.Limits(max_connections=concurrency,
+                          max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=root, limits=limits,
+                                 timeout=30.0) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client, random.Random(seed + index))
+                               for index in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return samples, errors, elapsed
+
+
+def run(args) -> dict:
+    scale = Scale(args.users, args.statements_per_user, args.items_per_statement)
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite:///{os.path.join(directory, 'load.db')}"
+        engine = create_db_engine(database_url)
+        # seeding also migrates, so the workers start on an up-to-date schema
+        seed_database(engine, scale, seed=args.seed)
+        engine.dispose()
+
+        app = AppDriver(env={"DATABASE_URL": database_url, "PORT": str(args.port),
+                             "ENDPOINT": "localhost", "PYTHONPATH": REPO_ROOT},
+                        workers=args.workers)
+        try:
+            app.start()
+            samples, errors, elapsed = asyncio.run(drive(
+                app.root, scale, args.mix, args.concurrency, args.duration,
+                args.requests, args.seed))
+        finally:
+            app.stop()
+
+    results = {name: summarise(samples[name], elapsed, errors[name])
+               for name in sorted(samples)}
+    results["total"] = summarise([sample for name in samples
+                                  for sample in samples[name]], elapsed,
+                                 sum(errors.values()))
+    return build_report(results, {**scale._asdict(), "workers": args.workers,
+                                  "concurrency": args.concurrency,
+                                  "duration": args.duration,
+                                  "requests": args.requests, "mix": args.mix,
+                                  "seed": args.seed, "elapsed": elapsed})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=1,
+                        help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, default=16,
+                        help="concurrent clients, and pooled connections")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--requests", type=int, default=None,
+                        help="stop after this many requests, if sooner")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"weighted requests, default {DEFAULT_MIX}")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--statements-per-user", type=int, default=20)
+    parser.add_argument("--items-per-statement", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8091)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None,
+                        help="report path, benchmarks/results/load-<revision>.json "
+                             "by default")
+    parser.add_argument("--compare", default=None,
+                        help="earlier report to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+    path = args.output or default_report_path("load")
+    save_report(report, path)
+    print_results(report["results"],
+                  load_report(args.compare) if args.compare else None)
+    print(f"report saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Throughput of concurrent user creation with inline vs pooled bcrypt hashing.
+
+    python -m benchmarks.bench_password_hashing --users 32 --concurrency 8
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from service.db import Base
+from service.models import UserDB
+from service.schemas.user_schema import UserCreate
+from service.settings import get_settings
+from service.users.async_user_service import AsyncUserService
+from service.users.utils import hash_password
+
+
+class InlineHashingUserService(AsyncUserService):
+    """Hashes on the event loop, as UserService.create_user does on its thread."""
+
+    async def create_user(self, user_data: UserCreate) -> UserDB:
+        user = UserDB(username=user_data.username,
+                      password=hash_password(user_data.password))
+        self.db.add(user)
+        await self.db.commit()
+        return user
+
+
+async def create_users(service_class, sessionmaker, users: int, concurrency: int,
+                       prefix: str) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def create(index: int):
+        async with semaphore, sessionmaker() as db:
+            await service_class(db).create_user(
+                UserCreate(username=f"{prefix}{index}", password="minecraft"))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(create(index) for index in range(users)))
+    return time.perf_counter() - started
+
+
+async def run(users: int, concurrency: int):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.db")
+        Base.metadata.create_all(bind=create_engine(f"sqlite:///{path}"))
+        engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+        sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+
+        settings = get_settings()
+        print(f"bcrypt rounds={settings.bcrypt_salt_rounds} "
+              f"workers={settings.password_hash_workers} users={users} "
+              f"concurrency={concurrency}")
+        for name, service_class in (("inline", InlineHashingUserService),
+                                    ("pool", AsyncUserService)):
+            elapsed = await create_users(service_class, sessionmaker, users,
+                                         concurrency, prefix=name)
+            print(f"{name:>6}: {users / elapsed:8.2f} users/s "
+                  f"({elapsed * 1000 / users:.1f} ms/user)")
+
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Per-request cost of serialising a StatementResponse, old path vs single pass.
+
+    python -m benchmarks.bench_serialization --items 10 100 1000 --repeat 200
+
+"before" is what GET /api/statements/{id} used to do: jsonable_encoder on the
+ORM object, model_validate, then FastAPI's response_model validation and
+serialisation rendered by JSONResponse. "after" validates from attributes once
+and renders through ModelResponse.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timezone
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from service.db import Base
+from service.models import UserDB, StatementDB, IncomeDB, ExpenditureDB
+from service.responses import ModelResponse
+from service.schemas.statement_schema import StatementResponse
+
+RESPONSE_FIELD = create_response_field(name="response", type_=StatementResponse)
+
+
+async def before(statement: StatementDB) -> bytes:
+    model = StatementResponse.model_validate(jsonable_encoder(statement))
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=model)
+    return JSONResponse(content).body
+
+
+async def after(statement: StatementDB) -> bytes:
+    return ModelResponse(StatementResponse.model_validate(statement)).body
+
+
+def load_statement(items: int) -> StatementDB:
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(UserDB(id=1, username="steve", password="x"))
+    db.add(StatementDB(
+        id=1, user_id=1, report_date=datetime.now(timezone.utc),
+        incomes=[IncomeDB(category=f"income {index}", amount=100.0 + index)
+                 for index in range(items)],
+        expenditures=[ExpenditureDB(category=f"expense {index}", amount=10.5)
+                      for index in range(items)]))
+    db.commit()
+    db.expunge_all()
+    # loaded the way the endpoint loads it, line items through selectin
+    return db.get(StatementDB, 1)
+
+
+async def time_path(path, statement: StatementDB, repeat: int) -> float:
+    await path(statement)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await path(statement)
+    return (time.perf_counter() - started) / repeat
+
+
+async def run(item_counts, repeat: int):
+    print(f"{'items':>6} {'before':>10} {'after':>10} {'saved':>10} {'speedup':>8}")
+    for items in item_counts:
+        statement = load_statement(items)
+        assert await before(statement) == await after(statement)
+        old = await time_path(before, statement, repeat)
+        new = await time_path(after, statement, repeat)
+        print(f"{items:>6} {old * 1e6:>8.1f}us {new * 1e6:>8.1f}us "
+              f"{(old - new) * 1e6:>8.1f}us {old / new:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, nargs="+", default=[10, 100, 1000],
+                        help="incomes and expenditures per statement")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.items, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Cold start of the service: import, lifespan startup and first requests.
+
+Each run is a fresh interpreter on an empty database in a temporary directory.
+
+    python -m benchmarks.bench_startup --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import json
+import time
+
+started = time.perf_counter()
+from service.app import app
+imported = time.perf_counter()
+
+from fastapi.testclient import TestClient
+
+client = TestClient(app)
+before_startup = time.perf_counter()
+with client:
+    ready = time.perf_counter()
+    client.get("/health")
+    health = time.perf_counter()
+    client.get("/api/ratings", params={"user_id": 1, "report_id": 1})
+    rating = time.perf_counter()
+
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (ready - before_startup) * 1000,
+    "first_health_ms": (health - ready) * 1000,
+    "first_rating_ms": (rating - health) * 1000,
+}))
+"""
+
+
+def run_once() -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ,
+                   PYTHONPATH=REPO_ROOT,
+                   DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        output = subprocess.run([sys.executable, "-c", CHILD], cwd=directory,
+                                env=env, check=True, capture_output=True,
+                                text=True).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    for metric in runs[0]:
+        values = [run[metric] for run in runs]
+        print(f"{metric:>16}: median {statistics.median(values):8.1f} ms  "
+              f"min {min(values):8.1f} ms  max {max(values):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""Services and HTTP endpoints against a seeded database, saved as a JSON report.
+
+    python -m benchmarks.bench_suite --users 100 --statements-per-user 20 \\
+        --items-per-statement 5 --iterations 200 --compare previous.json
+
+Services are called directly, one session per call and without the
+in-process caches. Endpoints go through the ASGI app in-process (httpx, no
+network) with the production dependency stack, caches included, which are
+cleared before each endpoint is measured.
+"""
+import argparse
+import asyncio
+import os
+import random
+import tempfile
+from datetime import timedelta
+from typing import Dict
+
+import httpx
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.harness import measure, measure_async, build_report, save_report, \
+    load_report, print_results, default_report_path
+from benchmarks.seed import Scale, seed_database, HISTORY, SEED_NOW
+from service import dependencies
+from service.app import app
+from service.db import create_db_engine, get_db, get_read_db
+from service.ratings.rating_service import RatingService
+from service.schemas.expenditure_schema import ExpenditureSchema
+from service.schemas.income_schema import IncomeSchema
+from service.schemas.statement_schema import StatementRequest
+from service.statements.statement_service import StatementService
+from service.users.user_service import UserService
+
+PERIOD = timedelta(days=90)
+
+
+class Workload:
+    """Random but reproducible arguments, the i-th call gets the i-th pick."""
+
+    def __init__(self, scale: Scale, count: int, seed: int):
+        randomness = random.Random(seed)
+        self.scale = scale
+        self.statement_ids = [randomness.randint(1, scale.statements)
+                              for _ in range(count)]
+        self.user_ids = [randomness.randint(1, scale.users) for _ in range(count)]
+        self.period_starts = [SEED_NOW - HISTORY + timedelta(
+            days=randomness.uniform(0, (HISTORY - PERIOD).days)) for _ in range(count)]
+
+    def statement(self, index: int):
+        statement_id = self.statement_ids[index % len(self.statement_ids)]
+        return statement_id, self.scale.owner_of(statement_id)
+
+    def user(self, index: int) -> int:
+        return self.user_ids[index % len(self.user_ids)]
+
+    def period(self, index: int):
+        start = self.period_starts[index % len(self.period_starts)]
+        return start, start + PERIOD
+
+    def statement_request(self, index: int) -> StatementRequest:
+        items = self.scale.items_per_statement
+        return StatementRequest(
+            user_id=self.user(index),
+            incomes=[IncomeSchema(category="Salary", amount=1000.0 + item)
+                     for item in range(items)],
+            expenditures=[ExpenditureSchema(category="Rent", amount=250.0 + item)
+                          for item in range(items)])
+
+
+def bench_services(session_factory, workload: Workload, iterations: int,
+                   warmup: int) -> Dict[str, Dict[str, float]]:
+    def with_services(call):
+        def operation(index: int):
+            with session_factory() as db:
+                statement_service = StatementService(user_service=UserService(db),
+                                                     db=db)
+                call(index, statement_service,
+                     RatingService(db=db, statement_service=statement_service))
+        return operation
+
+    operations = {
+        "service.get_statement": lambda index, statements, ratings:
+            statements.get_statement(*workload.statement(index)),
+        "service.get_statements_in_period": lambda index, statements, ratings:
+            statements.get_statements_in_period(workload.user(index),
+                                                *workload.period(index)),
+        "service.calculate_ie_rating": lambda index, statements, ratings:
+            ratings.calculate_ie_rating(*workload.statement(index)),
+        "service.calculate_period_rating": lambda index, statements, ratings:
+            ratings.calculate_period_rating(workload.user(index),
+                                            *workload.period(index)),
+        "service.create_statement": lambda index, statements, ratings:
+            statements.create_statement(workload.statement_request(index)),
+    }
+    return {name: measure(with_services(call), iterations, warmup)
+            for name, call in operations.items()}
+
+
+async def bench_endpoints(session_factory, workload: Workload, iterations: int,
+                          warmup: int, batch_size: int) -> Dict[str, Dict[str, float]]:
+    def session():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = session
+    app.dependency_overrides[get_read_db] = session
+
+    def period_params(index: int) -> dict:
+        start, end = workload.period(index)
+        return {"user_id": workload.user(index), "start_date": start.isoformat(),
+                "end_date": end.isoformat()}
+
+    def history_params(index: int) -> dict:
+        start, end = workload.period(index)
+        return {"user_id": workload.user(index), "start_date": start.date().isoformat(),
+                "end_date": end.date().isoformat(), "interval": "week",
+                "window_days": 30}
+
+    def batch(index: int) -> list:
+        items = []
+        for offset in range(batch_size):
+            statement_id, user_id = workload.statement(index * batch_size + offset)
+            items.append({"user_id": user_id, "report_id": statement_id})
+        return items
+
+    requests = {
+        "GET /api/statements/{id}": lambda client, index: client.get(
+            f"/api/statements/{workload.statement(index)[0]}",
+            params={"user_id": workload.statement(index)[1]}),
+        "GET /api/statements?user_id": lambda client, index: client.get(
+            "/api/statements", params={"user_id": workload.user(index)}),
+        "GET /api/ratings (report)": lambda client, index: client.get(
+            "/api/ratings", params={"report_id": workload.statement(index)[0],
+                                    "user_id": workload.statement(index)[1]}),
+        "GET /api/ratings (period)": lambda client, index: client.get(
+            "/api/ratings", params=period_params(index)),
+        "GET /api/ratings/history (week, 30d)": lambda client, index: client.get(
+            "/api/ratings/history", params=history_params(index)),
+        "GET /api/categories (period)": lambda client, index: client.get(
+            "/api/categories", params=period_params(index)),
+        f"POST /api/ratings/batch ({batch_size})": lambda client, index:
+            client.post("/api/ratings/batch", json=batch(index)),
+        "POST /api/statements": lambda client, index: client.post(
+            "/api/statements",
+            content=workload.statement_request(index).model_dump_json(),
+            headers={"Content-Type": "application/json"}),
+    }
+
+    results = {}
+    try:
+        async with httpx.AsyncClient(app=app, base_url="http://bench") as client:
+            for name, request in requests.items():
+                dependencies.rating_cache.clear()
+                dependencies.user_existence_cache.clear()
+                dependencies.prefix_index_registry.invalidate()
+                dependencies.category_registry.clear()
+
+                async def operation(index: int):
+                    (await request(client, index)).raise_for_status()
+
+                results[name] = await measure_async(operation, iterations, warmup)
+    finally:
+        app.dependency_overrides.clear()
+    return results
+
+
+def run(args) -> dict:
+    scale = Scale(args.users, args.statements_per_user, args.items_per_statement)
+    workload = Workload(scale, max(args.iterations + args.warmup, 1), args.seed)
+
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_db_engine(f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        seed_database(engine, scale, seed=args.seed)
+        session_factory = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+
+        results = {}
+        if not args.skip_services:
+            results.update(bench_services(session_factory, workload, args.iterations,
+                                          args.warmup))
+        if not args.skip_endpoints:
+            results.update(asyncio.run(bench_endpoints(
+                session_factory, workload, args.iterations, args.warmup,
+                args.batch_size)))
+        engine.dispose()
+
+    return build_report(results, {**scale._asdict(), "iterations": args.iterations,
+                                  "warmup": args.warmup, "seed": args.seed,
+                                  "batch_size": args.batch_size})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--statements-per-user", type=int, default=20)
+    parser.add_argument("--items-per-statement", type=int, default=5,
+                        help="incomes, and as many expenditures, per statement")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=50,
+                        help="items per POST /api/ratings/batch request")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-services", action="store_true")
+    parser.add_argument("--skip-endpoints", action="store_true")
+    parser.add_argument("--output", default=None,
+                        help="report path, benchmarks/results/suite-<revision>.json "
+                             "by default")
+    parser.add_argument("--compare", default=None,
+                        help="earlier report to compare against")
+    args = parser.parse_args()
+
+    report = run(args)
+    path = args.output or default_report_path("suite")
+    save_report(report, path)
+    print_results(report["results"],
+                  load_report(args.compare) if args.compare else None)
+    print(f"report saved to {path}")
+
+
+if __name__ == "__main__":
+    main()
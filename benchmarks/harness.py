@@ -0,0 +1,142 @@
+"""Timing, percentiles and JSON reports shared by the benchmark suites."""
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(sorted_samples: Sequence[float], q: float) -> float:
+    """Linearly interpolated percentile, ``q`` in [0, 100]."""
+    if not sorted_samples:
+        return 0.0
+    position = (len(sorted_samples) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) \
+        * (position - lower)
+
+
+def summarise(samples: List[float], elapsed: Optional[float] = None,
+              errors: int = 0) -> Dict[str, float]:
+    """Latencies in ms; ops_per_sec over ``elapsed`` (the sum of the samples
+    when they ran one after another)."""
+    samples = sorted(samples)
+    elapsed = elapsed if elapsed is not None else sum(samples)
+    count = len(samples)
+    return {
+        "count": count,
+        "errors": errors,
+        "error_rate": errors / count if count else 0.0,
+        "ops_per_sec": count / elapsed if elapsed else 0.0,
+        "mean_ms": sum(samples) / count * 1000 if count else 0.0,
+        "p50_ms": percentile(samples, 50) * 1000,
+        "p95_ms": percentile(samples, 95) * 1000,
+        "p99_ms": percentile(samples, 99) * 1000,
+        "max_ms": samples[-1] * 1000 if count else 0.0,
+    }
+
+
+def measure(operation: Callable[[int], Any], iterations: int,
+            warmup: int = 0) -> Dict[str, float]:
+    """Time ``operation(i)`` for i in range(warmup, warmup + iterations),
+    sequentially, after untimed warmup calls; an operation that raises is
+    timed and counted as an error."""
+    for index in range(warmup):
+        operation(index)
+
+    samples, errors = [], 0
+    for index in range(warmup, warmup + iterations):
+        started = time.perf_counter()
+        try:
+            operation(index)
+        except Exception:
+            errors += 1
+        samples.append(time.perf_counter() - started)
+    return summarise(samples, errors=errors)
+
+
+async def measure_async(operation: Callable[[int], Awaitable[Any]], iterations: int,
+                        warmup: int = 0) -> Dict[str, float]:
+    for index in range(warmup):
+        await operation(index)
+
+    samples, errors = [], 0
+    for index in range(warmup, warmup + iterations):
+        started = time.perf_counter()
+        try:
+            await operation(index)
+        except Exception:
+            errors += 1
+        samples.append(time.perf_counter() - started)
+    return summarise(samples, errors=errors)
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              check=True, capture_output=True,
+                              text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_report(results: Dict[str, Dict[str, float]],
+                 parameters: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "revision": git_revision(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": parameters,
+        "results": results,
+    }
+
+
+def default_report_path(name: str) -> str:
+    return os.path.join(REPO_ROOT, "benchmarks", "results",
+                        f"{name}-{git_revision() or 'unknown'}.json")
+
+
+def save_report(report: Dict[str, Any], path: str):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2)
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path) as file:
+        return json.load(file)
+
+
+def print_results(results: Dict[str, Dict[str, float]],
+                  baseline: Optional[Dict[str, Any]] = None):
+    """One row per benchmark; with a baseline report, the change in ops/s and
+    p50 against it."""
+    previous = baseline["results"] if baseline else {}
+    header = f"{'benchmark':<44} {'ops/s':>10} {'p50 ms':>9} {'p95 ms':>9} " \
+             f"{'p99 ms':>9} {'errors':>7}"
+    if baseline:
+        header += f" {'ops/s Δ':>9} {'p50 Δ':>8}"
+    print(header)
+    for name, result in results.items():
+        row = f"{name:<44} {result['ops_per_sec']:>10.1f} {result['p50_ms']:>9.3f} " \
+              f"{result['p95_ms']:>9.3f} {result['p99_ms']:>9.3f} " \
+              f"{result['errors']:>7}"
+        if name in previous:
+            row += f" {_change(previous[name]['ops_per_sec'], result['ops_per_sec'])}" \
+                   f" {_change(previous[name]['p50_ms'], result['p50_ms']):>8}"
+        print(row)
+    if baseline:
+        print(f"compared with {baseline.get('revision')} "
+              f"({baseline.get('created_at')})")
+
+
+def _change(before: float, after: float) -> str:
+    if not before:
+        return f"{'n/a':>9}"
+    return f"{(after - before) / before * 100:>+8.1f}%"
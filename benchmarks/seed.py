@@ -0,0 +1,94 @@
+"""Synthetic data for the benchmarks.
+
+Statement ids are assigned in order, user by user, so statement ``s`` belongs
+to user ``(s - 1) // statements_per_user + 1``; see ``Scale.owner_of``.
+"""
+import random
+from datetime import datetime, timedelta
+from typing import NamedTuple
+
+from sqlalchemy import Engine, insert
+
+from service.categories.summary import category_summary_backfill
+from service.migrations import migrate
+from service.models import UserDB, StatementDB, CategoryDB, IncomeDB, ExpenditureDB
+
+INCOME_CATEGORIES = ("Salary", "Bonus", "Rental", "Benefits", "Dividends")
+EXPENDITURE_CATEGORIES = ("Rent", "Food", "Utilities", "Transport", "Insurance",
+                          "Loan", "Credit card", "Entertainment")
+# statements of each user are spread evenly over this period before SEED_NOW
+HISTORY = timedelta(days=365)
+SEED_NOW = datetime(2025, 1, 1)
+
+
+class Scale(NamedTuple):
+    users: int
+    statements_per_user: int
+    items_per_statement: int
+
+    @property
+    def statements(self) -> int:
+        return self.users * self.statements_per_user
+
+    def owner_of(self, statement_id: int) -> int:
+        return (statement_id - 1) // self.statements_per_user + 1
+
+
+def seed_database(engine: Engine, scale: Scale, seed: int = 0,
+                  chunk_size: int = 10_000):
+    """Create the schema and fill it; each statement gets items_per_statement
+    incomes and as many expenditures."""
+    randomness = random.Random(seed)
+    migrate(engine)
+
+    with engine.begin() as connection:
+        connection.execute(insert(UserDB), [
+            {"id": user_id, "username": f"bench{user_id}", "password": "x"}
+            for user_id in range(1, scale.users + 1)])
+        category_ids = {name: category_id for category_id, name in enumerate(
+            INCOME_CATEGORIES + EXPENDITURE_CATEGORIES, start=1)}
+        connection.execute(insert(CategoryDB), [
+            {"id": category_id, "name": name}
+            for name, category_id in category_ids.items()])
+
+        statements, incomes, expenditures = [], [], []
+        step = HISTORY / max(scale.statements_per_user, 1)
+        for statement_id in range(1, scale.statements + 1):
+            position = (statement_id - 1) % scale.statements_per_user
+            statement_incomes = [
+                {"statement_id": statement_id,
+                 "category_id": category_ids[randomness.choice(INCOME_CATEGORIES)],
+                 "amount": round(randomness.uniform(100, 5000), 2)}
+                for _ in range(scale.items_per_statement)]
+            statement_expenditures = [
+                {"statement_id": statement_id,
+                 "category_id": category_ids[
+                     randomness.choice(EXPENDITURE_CATEGORIES)],
+                 "amount": round(randomness.uniform(10, 2500), 2)}
+                for _ in range(scale.items_per_statement)]
+            statements.append({
+                "id": statement_id,
+                "user_id": scale.owner_of(statement_id),
+                "report_date": SEED_NOW - HISTORY + step * position,
+                "total_income": sum(item["amount"] for item in statement_incomes),
+                "total_expenditure": sum(item["amount"]
+                                         for item in statement_expenditures),
+                "income_count": len(statement_incomes),
+                "expenditure_count": len(statement_expenditures),
+            })
+            incomes.extend(statement_incomes)
+            expenditures.extend(statement_expenditures)
+
+            if len(incomes) + len(expenditures) >= chunk_size:
+                _flush(connection, statements, incomes, expenditures)
+        _flush(connection, statements, incomes, expenditures)
+        # the rows are inserted directly, not through create_statement
+        connection.execute(category_summary_backfill(connection.dialect.name))
+
+
+def _flush(connection, statements: list, incomes: list, expenditures: list):
+    for model, rows in ((StatementDB, statements), (IncomeDB, incomes),
+                        (ExpenditureDB, expenditures)):
+        if rows:
+            connection.execute(insert(model), rows)
+            rows.clear()
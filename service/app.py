@@ -1,5 +1,6 @@
 import logging
 import os
+from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
@@ -8,19 +9,57 @@ from fastapi.responses import JSONResponse
 from starlette import status
 from starlette.middleware.cors import CORSMiddleware
 
-from service.db import Base, engine, DATABASE_URL
+from service.categories import router as categories_router
+from service.db import Base, engine, read_engine, DATABASE_URL, get_async_engine
+from service.dependencies import metrics_registry, profile_store, rating_cache, \
+    user_existence_cache, prefix_index_registry, category_registry, \
+    group_commit_writer
 from service.health import router as health_router
-from service.statements import router as statements_router
-from service.ratings import router as ratings_router
+from service.metrics import router as metrics_router
+from service.metrics.collectors import EngineMetrics, CacheMetrics
+from service.metrics.middleware import MetricsMiddleware
+from service.metrics.queries import QueryStatsMiddleware, instrument_queries, \
+    QUERY_COUNT_HEADER, QUERY_TIME_HEADER
+from service.migrations import migrate
+from service.profiling import router as profiling_router
+from service.profiling.middleware import ProfilingMiddleware, PROFILE_ID_HEADER
+from service.settings import get_settings
+from service.statements import router as statements_router, \
+    async_router as async_statements_router
+from service.ratings import router as ratings_router, \
+    async_router as async_ratings_router
 from service.users.user_service import UserService
+from service.users.utils import shutdown_password_executor
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 load_dotenv()
-app = FastAPI(redirect_slashes=False)
-Base.metadata.create_all(bind=engine)
-UserService.insert_default_users()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    migrate(engine)
+    UserService.insert_default_users()
+    with engine.connect() as connection:
+        logger.info(f"Loaded {category_registry.load(connection)} categories")
+    if group_commit_writer is not None:
+        group_commit_writer.start()
+    yield
+    logger.info("Shutting down application and cleaning up database...")
+    if group_commit_writer is not None:
+        group_commit_writer.stop()
+    shutdown_password_executor()
+    Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+    if get_settings().use_async_db:
+        await get_async_engine().dispose()
+    if os.path.exists(DATABASE_URL):
+        os.remove(DATABASE_URL)
+        logger.info(f"Database file '{DATABASE_URL}' deleted.")
+
+
+app = FastAPI(redirect_slashes=False, lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -28,6 +67,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[QUERY_COUNT_HEADER, QUERY_TIME_HEADER, PROFILE_ID_HEADER],
 )
 
 
@@ -39,26 +79,56 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
+if get_settings().query_stats_enabled:
+    app.add_middleware(QueryStatsMiddleware,
+                       repeated_query_threshold=get_settings().repeated_query_threshold)
+    instrument_queries(engine)
+    instrument_queries(read_engine)
+    if get_settings().use_async_db:
+        instrument_queries(get_async_engine().sync_engine)
+
+if get_settings().profiling_enabled:
+    app.add_middleware(ProfilingMiddleware, store=profile_store,
+                       token=get_settings().profiling_token,
+                       sample_rate=get_settings().profiling_sample_rate,
+                       interval=get_settings().profiling_interval_seconds)
+    app.include_router(profiling_router.router, prefix="/admin/profiles")
+
+if get_settings().metrics_enabled:
+    # outermost, so the time spent in the other middleware is included
+    app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+    engine_metrics = EngineMetrics(metrics_registry)
+    engine_metrics.add("primary", engine)
+    if read_engine is not engine:
+        engine_metrics.add("read", read_engine)
+    if get_settings().use_async_db:
+        engine_metrics.add("async", get_async_engine().sync_engine)
+    cache_metrics = CacheMetrics(metrics_registry)
+    cache_metrics.add("rating", rating_cache)
+    cache_metrics.add("user_existence", user_existence_cache)
+    cache_metrics.add("prefix_index", prefix_index_registry)
+    cache_metrics.add("category", category_registry)
+    app.include_router(metrics_router.router, prefix="/metrics")
+
 app.include_router(health_router.router, prefix="/health")
+if get_settings().use_async_db:
+    # registered first so they take precedence over the sync handlers
+    app.include_router(async_statements_router.router, prefix="/api/statements")
+    app.include_router(async_ratings_router.router, prefix="/api/ratings")
 app.include_router(statements_router.router, prefix="/api/statements")
 app.include_router(ratings_router.router, prefix="/api/ratings")
+app.include_router(categories_router.router, prefix="/api/categories")
 
 
 def main():
     import uvicorn
     host = os.getenv("ENDPOINT", "localhost")
     port = int(os.getenv("PORT", 8080))
-    uvicorn.run(app, host=host, port=port)
+    workers = int(os.getenv("WORKERS", 1))
+    # several worker processes need the app as an import string
+    uvicorn.run("service.app:app" if workers > 1 else app, host=host, port=port,
+                workers=workers)
 
 
-@app.on_event("shutdown")
-async def shutdown_event():
-    logger.info("Shutting down application and cleaning up database...")
-    Base.metadata.drop_all(bind=engine)
-    engine.dispose()
-    if os.path.exists(DATABASE_URL):
-        os.remove(DATABASE_URL)
-        logger.info(f"Database file '{DATABASE_URL}' deleted.")
-
 if __name__ == "__main__":
     main()
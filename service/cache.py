@@ -0,0 +1,134 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """Thread-safe, bounded least-recently-used cache with a per-entry TTL.
+
+    A ``max_entries`` of 0 disables the cache: nothing is stored and every
+    lookup is a miss.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at is not None and time.monotonic() >= expires_at:
+                self.expirations += 1
+                self.misses += 1
+                self._remove(key)
+                return default
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Like get, without touching the counters or the recency order."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry[0] is not None
+                                 and time.monotonic() >= entry[0]):
+                return default
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        if self.max_entries <= 0:
+            return
+
+        expires_at = time.monotonic() + self.ttl_seconds \
+            if self.ttl_seconds is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (expires_at, value)
+            self._added(key)
+            while len(self._entries) > self.max_entries:
+                self.evictions += 1
+                self._remove(next(iter(self._entries)))
+
+    def pop(self, key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self.invalidations += 1
+            self._remove(key)
+            return entry[1]
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+    def _added(self, key: Hashable):
+        """Called under the lock after ``key`` is stored."""
+
+    def _remove(self, key: Hashable):
+        """Called under the lock to drop ``key``, whatever the reason."""
+        del self._entries[key]
+
+
+class WriteLog:
+    """When the most recently written ``max_keys`` keys were last written.
+
+    Take a token before reading what a key's cache entry is built from, and
+    only store the entry if the key is ``unchanged_since`` the token. A key
+    that fell out of the log counts as written at the newest write forgotten,
+    so the check can wrongly fail but never wrongly pass. Not thread-safe:
+    callers hold their own lock.
+    """
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max(max_keys, 1)
+        self._sequence = 0
+        self._forgotten = 0
+        self._last_writes: "OrderedDict[Hashable, int]" = OrderedDict()
+
+    def __len__(self):
+        return len(self._last_writes)
+
+    def token(self) -> int:
+        return self._sequence
+
+    def record(self, key: Hashable):
+        self._sequence += 1
+        self._last_writes[key] = self._sequence
+        self._last_writes.move_to_end(key)
+        while len(self._last_writes) > self.max_keys:
+            _, self._forgotten = self._last_writes.popitem(last=False)
+
+    def unchanged_since(self, key: Hashable, token: int) -> bool:
+        return self._last_writes.get(key, self._forgotten) <= token
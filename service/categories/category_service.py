@@ -0,0 +1,148 @@
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import Select, func, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from service.categories.registry import CategoryRegistry
+from service.categories.summary import LINE_ITEMS, INCOME, EXPENDITURE, \
+    month_start
+from service.models import StatementDB, CategorySummaryDB
+from service.schemas.category_schema import CategoryBreakdown, CategoryTotal
+from service.statements.statement_service import StatementNotFoundError, \
+    UserNotFoundError, naive, period_filters
+from service.users.user_service import UserService
+
+# (kind, category, total, item count)
+CategoryRow = Tuple[str, str, float, int]
+
+
+class CategoryService:
+    def __init__(self, user_service: UserService, db: Session,
+                 categories: Optional[CategoryRegistry] = None):
+        self.user_service = user_service
+        self.db = db
+        # the queries group by category id, the names come from the registry
+        self.categories = categories or CategoryRegistry()
+
+    def get_statement_breakdown(self, statement_id: int, user_id: int) \
+            -> CategoryBreakdown:
+        if not self.user_service.user_exists(user_id):
+            raise UserNotFoundError()
+
+        rows = self.db.execute(union_all(*line_item_totals(
+            StatementDB.id == statement_id, StatementDB.user_id == user_id))).all()
+        if not rows:
+            raise StatementNotFoundError()
+
+        return build_breakdown(self._named(rows), user_id=user_id,
+                               report_id=statement_id)
+
+    def get_period_breakdown(self, user_id: int, start_date: Optional[datetime],
+                             end_date: Optional[datetime]) -> CategoryBreakdown:
+        """Whole months of the period are read from category_summary; only the
+        partial months at either end, if any, group their line items."""
+        if not self.user_service.user_exists(user_id):
+            raise UserNotFoundError()
+
+        first_month, end_month = summary_months(start_date, end_date)
+        if first_month is not None and end_month is not None \
+                and first_month >= end_month:
+            rows = self.db.execute(union_all(*line_item_totals(
+                *period_filters(user_id, start_date, end_date)))).all()
+        else:
+            queries = [summary_totals(user_id, first_month, end_month)]
+            if start_date is not None \
+                    and naive(start_date) < _midnight(first_month):
+                queries.extend(line_item_totals(*period_filters(
+                    user_id, start_date, None, _midnight(first_month))))
+            if end_date is not None and _midnight(end_month) <= naive(end_date):
+                queries.extend(line_item_totals(*period_filters(
+                    user_id, _midnight(end_month), end_date)))
+            rows = self.db.execute(union_all(*queries)).all()
+
+        return build_breakdown(self._named(rows), user_id=user_id,
+                               start_date=start_date, end_date=end_date)
+
+    def _named(self, rows: List[Tuple[str, int, float, int]]) -> List[CategoryRow]:
+        names = self.categories.names(self.db, {row[1] for row in rows})
+        return [(kind, names[category_id], total, count)
+                for kind, category_id, total, count in rows]
+
+
+def summary_months(start_date: Optional[datetime], end_date: Optional[datetime]) \
+        -> Tuple[Optional[date], Optional[date]]:
+    """[first, end) of the months wholly inside the period, None when the
+    period is unbounded on that side."""
+    first_month = None
+    if start_date is not None:
+        first_month = month_start(naive(start_date))
+        if _midnight(first_month) < naive(start_date):
+            first_month = _next_month(first_month)
+    end_month = None
+    if end_date is not None:
+        # the month the instant after end_date falls in is not complete
+        end_month = month_start(naive(end_date) + timedelta(microseconds=1))
+    return first_month, end_month
+
+
+def summary_totals(user_id: int, first_month: Optional[date],
+                   end_month: Optional[date]) -> Select:
+    filters = [CategorySummaryDB.user_id == user_id]
+    if first_month is not None:
+        filters.append(CategorySummaryDB.month >= first_month)
+    if end_month is not None:
+        filters.append(CategorySummaryDB.month < end_month)
+    return select(CategorySummaryDB.kind, CategorySummaryDB.category_id,
+                  func.sum(CategorySummaryDB.total),
+                  func.sum(CategorySummaryDB.item_count)) \
+        .where(*filters) \
+        .group_by(CategorySummaryDB.kind, CategorySummaryDB.category_id)
+
+
+def line_item_totals(*statement_filters) -> List[Select]:
+    """Category id totals of the line items of the statements matching the
+    filters, a query per kind to UNION ALL."""
+    return [
+        select(literal(kind).label("kind"), model.category_id,
+               func.sum(model.amount), func.count(model.id))
+        .join(StatementDB, model.statement_id == StatementDB.id)
+        .where(*statement_filters)
+        .group_by(model.category_id)
+        for kind, model in LINE_ITEMS]
+
+
+def build_breakdown(rows: Iterable[CategoryRow], **fields) -> CategoryBreakdown:
+    """Merge the rows per kind and category, largest totals first."""
+    totals = {}
+    for kind, category, total, count in rows:
+        entry = totals.setdefault((kind, category), [0.0, 0])
+        entry[0] += total
+        entry[1] += count
+
+    items = {INCOME: [], EXPENDITURE: []}
+    for (kind, category), (total, count) in totals.items():
+        items[kind].append((category, total, count))
+    incomes, total_income = _category_totals(items[INCOME])
+    expenditures, total_expenditure = _category_totals(items[EXPENDITURE])
+    return CategoryBreakdown(total_income=total_income,
+                             total_expenditure=total_expenditure,
+                             incomes=incomes, expenditures=expenditures, **fields)
+
+
+def _category_totals(items: List[Tuple[str, float, int]]) \
+        -> Tuple[List[CategoryTotal], float]:
+    kind_total = sum(total for _, total, _ in items)
+    return [CategoryTotal(category=category, total=total, count=count,
+                          share=total / kind_total if kind_total else 0.0)
+            for category, total, count in sorted(items,
+                                                 key=lambda item: (-item[1], item[0]))
+            ], kind_total
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def _midnight(day: date) -> datetime:
+    return datetime(day.year, day.month, day.day)
@@ -0,0 +1,106 @@
+import threading
+from typing import Dict, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+
+from service.categories.summary import UPSERT_INSERTS
+from service.models import CategoryDB
+
+
+class CategoryRegistry:
+    """In-memory id <-> name map of the category table.
+
+    Loaded at startup and extended as new names are interned or read, so
+    statements resolve their category ids and breakdowns their names without
+    a query once a category has been seen. Category rows are never updated or
+    deleted, so an entry cannot go stale against the database it came from.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._ids: Dict[str, int] = {}
+        self._names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def load(self, connection: Connection) -> int:
+        """Add every category of the database, returns how many there are."""
+        self._add(connection.execute(select(CategoryDB.id, CategoryDB.name)))
+        return len(self)
+
+    def known_ids(self, names: Iterable[str]) -> Dict[str, int]:
+        """The ids of the names already in the registry."""
+        with self._lock:
+            ids = {name: self._ids[name] for name in set(names) if name in self._ids}
+            self._count(len(ids), len(set(names)) - len(ids))
+            return ids
+
+    def known_names(self, category_ids: Iterable[int]) -> Dict[int, str]:
+        """The names of the ids already in the registry."""
+        with self._lock:
+            names = {category_id: self._names[category_id]
+                     for category_id in set(category_ids)
+                     if category_id in self._names}
+            self._count(len(names), len(set(category_ids)) - len(names))
+            return names
+
+    def intern(self, connection: Connection, names: Iterable[str]) -> Dict[str, int]:
+        """The ids of ``names``, inserting the new ones.
+
+        Run it in a transaction of its own, committed before the ids are used:
+        they are cached, and must not vanish with a rolled back statement.
+        """
+        names = set(names)
+        if not names:
+            return {}
+        dialect_name = connection.dialect.name
+        if dialect_name not in UPSERT_INSERTS:
+            raise NotImplementedError(
+                f"category interning is not supported on {dialect_name}")
+        connection.execute(
+            UPSERT_INSERTS[dialect_name](CategoryDB).on_conflict_do_nothing(
+                index_elements=["name"]),
+            [{"name": name} for name in sorted(names)])
+        return self.read(connection, CategoryDB.name.in_(names))
+
+    def names(self, connection, category_ids: Iterable[int]) -> Dict[int, str]:
+        """The names of ``category_ids``, read from the database when unknown."""
+        names = self.known_names(category_ids)
+        missing = set(category_ids) - names.keys()
+        if missing:
+            names.update({category_id: name for name, category_id in self.read(
+                connection, CategoryDB.id.in_(missing)).items()})
+        return names
+
+    def read(self, connection, *filters) -> Dict[str, int]:
+        """Read and add the categories matching the filters, by name."""
+        rows = connection.execute(select(CategoryDB.id, CategoryDB.name)
+                                  .where(*filters)).all()
+        self._add(rows)
+        return {name: category_id for category_id, name in rows}
+
+    def clear(self):
+        with self._lock:
+            self._ids.clear()
+            self._names.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """In the shape of LRUCache.stats(), for the cache metrics."""
+        with self._lock:
+            return {"entries": len(self._ids), "max_entries": len(self._ids),
+                    "hits": self.hits, "misses": self.misses, "evictions": 0,
+                    "expirations": 0, "invalidations": 0}
+
+    def _add(self, rows: Iterable):
+        with self._lock:
+            for category_id, name in rows:
+                self._ids[name] = category_id
+                self._names[category_id] = name
+
+    def _count(self, hits: int, misses: int):
+        self.hits += hits
+        self.misses += misses
@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from service.categories.category_service import CategoryService
+from service.dependencies import get_category_service
+from service.profiling.route import ProfiledRoute
+from service.responses import ModelResponse
+from service.schemas.category_schema import CategoryBreakdown
+from service.statements.statement_service import UserNotFoundError, \
+    StatementNotFoundError, USER_NOT_FOUND, STATEMENT_NOT_FOUND
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+@router.get("", response_model=CategoryBreakdown, status_code=status.HTTP_200_OK)
+def get_category_breakdown(
+    user_id: int,
+    report_id: Optional[int] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    category_service: CategoryService = Depends(get_category_service)
+):
+    try:
+        if report_id:
+            breakdown = category_service.get_statement_breakdown(report_id, user_id)
+        else:
+            breakdown = category_service.get_period_breakdown(user_id, start_date,
+                                                              end_date)
+        return ModelResponse(breakdown)
+    except UserNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=USER_NOT_FOUND)
+    except StatementNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=STATEMENT_NOT_FOUND)
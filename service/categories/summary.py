@@ -0,0 +1,82 @@
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import Date, Insert, cast, func, insert, literal, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from service.models import StatementDB, IncomeDB, ExpenditureDB, CategorySummaryDB
+
+INCOME = "income"
+EXPENDITURE = "expenditure"
+LINE_ITEMS = ((INCOME, IncomeDB), (EXPENDITURE, ExpenditureDB))
+
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+SUMMARY_KEY = ("user_id", "month", "kind", "category_id")
+
+
+def month_start(report_date: datetime) -> date:
+    return date(report_date.year, report_date.month, 1)
+
+
+def summary_rows(statements: Iterable[StatementDB]) -> List[Dict]:
+    """The additions to category_summary of new statements, one row per user,
+    month, kind and category."""
+    totals: Dict[Tuple, List] = {}
+    for statement in statements:
+        month = month_start(statement.report_date)
+        for kind, items in ((INCOME, statement.incomes),
+                            (EXPENDITURE, statement.expenditures)):
+            for item in items:
+                entry = totals.setdefault(
+                    (statement.user_id, month, kind, item.category_id), [0.0, 0])
+                entry[0] += item.amount
+                entry[1] += 1
+    return [{"user_id": user_id, "month": month, "kind": kind,
+             "category_id": category_id, "total": total, "item_count": item_count}
+            for (user_id, month, kind, category_id), (total, item_count)
+            in totals.items()]
+
+
+def category_summary_upsert(dialect_name: str) -> Insert:
+    """INSERT of summary rows that adds to the existing row of the same key."""
+    if dialect_name not in UPSERT_INSERTS:
+        raise NotImplementedError(
+            f"category_summary upserts are not supported on {dialect_name}")
+    statement = UPSERT_INSERTS[dialect_name](CategorySummaryDB)
+    return statement.on_conflict_do_update(
+        index_elements=list(SUMMARY_KEY),
+        set_={"total": CategorySummaryDB.total + statement.excluded.total,
+              "item_count": CategorySummaryDB.item_count
+              + statement.excluded.item_count})
+
+
+def add_to_category_summary(session: Session, statements: Iterable[StatementDB]):
+    """Add new statements to category_summary, in the session's transaction so
+    the summary commits with them."""
+    # line items created with only a category name get its id on flush
+    session.flush()
+    rows = summary_rows(statements)
+    if rows:
+        session.execute(category_summary_upsert(session.get_bind().dialect.name),
+                        rows)
+
+
+def month_of(column, dialect_name: str):
+    """SQL expression truncating a timestamp column to its month's first day."""
+    if dialect_name == "sqlite":
+        return func.date(column, "start of month", type_=Date)
+    return cast(func.date_trunc("month", column), Date)
+
+
+def category_summary_backfill(dialect_name: str) -> Insert:
+    """Fill an empty category_summary from the existing line items."""
+    month = month_of(StatementDB.report_date, dialect_name)
+    return insert(CategorySummaryDB).from_select(
+        [*SUMMARY_KEY, "total", "item_count"],
+        union_all(*(select(StatementDB.user_id, month, literal(kind),
+                           model.category_id, func.sum(model.amount),
+                           func.count(model.id))
+                    .join(StatementDB, model.statement_id == StatementDB.id)
+                    .group_by(StatementDB.user_id, month, model.category_id)
+                    for kind, model in LINE_ITEMS)))
@@ -0,0 +1,168 @@
+from datetime import datetime
+
+import pytest
+from hamcrest import assert_that, equal_to, close_to
+from sqlalchemy import select
+
+from service.categories.category_service import CategoryService, summary_months
+from service.categories.registry import CategoryRegistry
+from service.categories.summary import add_to_category_summary, \
+    category_summary_backfill
+from service.metrics.queries import assert_max_queries
+from service.models import UserDB, StatementDB, CategoryDB, IncomeDB, \
+    ExpenditureDB, CategorySummaryDB
+from service.schemas.expenditure_schema import ExpenditureSchema
+from service.schemas.income_schema import IncomeSchema
+from service.schemas.statement_schema import StatementRequest
+from service.statements.statement_service import StatementService, \
+    StatementNotFoundError, UserNotFoundError, intern_categories, line_items
+from service.users.user_service import UserService
+from service.users.utils import hash_password
+
+
+@pytest.fixture
+def user_id(db):
+    user = UserDB(username="steve", password=hash_password("minecraft"))
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+@pytest.fixture
+def category_service(db):
+    return CategoryService(user_service=UserService(db), db=db)
+
+
+def add_statement(db, user_id, report_date, incomes=(), expenditures=()):
+    statement = StatementDB(
+        user_id=user_id, report_date=report_date,
+        incomes=[IncomeDB(category=category, amount=amount)
+                 for category, amount in incomes],
+        expenditures=[ExpenditureDB(category=category, amount=amount)
+                      for category, amount in expenditures])
+    intern_categories(db, CategoryRegistry(), line_items([statement]))
+    db.add(statement)
+    add_to_category_summary(db, [statement])
+    db.commit()
+    return statement
+
+
+@pytest.fixture
+def statements(db, user_id):
+    return [
+        add_statement(db, user_id, datetime(2025, 1, 10),
+                      [("Salary", 3000.0)], [("Rent", 1000.0)]),
+        add_statement(db, user_id, datetime(2025, 1, 31, 23),
+                      [("Bonus", 500.0)], [("Food", 200.0)]),
+        add_statement(db, user_id, datetime(2025, 2, 15),
+                      [("Salary", 3000.0)], [("Rent", 1000.0), ("Food", 300.0)]),
+        add_statement(db, user_id, datetime(2025, 3, 1),
+                      [("Salary", 3000.0)], [("Utilities", 150.0)]),
+        add_statement(db, user_id, datetime(2025, 3, 20),
+                      [("Salary", 3000.0)], [("Rent", 1000.0)]),
+    ]
+
+
+def summary(db):
+    return {(row.month.isoformat(), row.kind, row.name): (row.total, row.item_count)
+            for row in db.execute(
+                select(CategorySummaryDB.month, CategorySummaryDB.kind, CategoryDB.name,
+                       CategorySummaryDB.total, CategorySummaryDB.item_count)
+                .join(CategoryDB, CategoryDB.id == CategorySummaryDB.category_id))}
+
+
+def test_summary_adds_up_the_month_of_each_category(db, statements):
+    rows = summary(db)
+
+    assert_that(rows[("2025-01-01", "income", "Salary")], equal_to((3000.0, 1)))
+    assert_that(rows[("2025-01-01", "expenditure", "Food")], equal_to((200.0, 1)))
+    assert_that(rows[("2025-03-01", "expenditure", "Rent")], equal_to((1000.0, 1)))
+    assert_that(len(rows), equal_to(10))
+
+
+def test_create_statement_updates_the_summary(db, user_id):
+    statement_service = StatementService(user_service=UserService(db), db=db)
+    request = StatementRequest(
+        user_id=user_id, incomes=[IncomeSchema(category="Salary", amount=100.0)],
+        expenditures=[ExpenditureSchema(category="Food", amount=10.0),
+                      ExpenditureSchema(category="Food", amount=5.0)])
+
+    statement = statement_service.create_statement(request)
+    statement_service.create_statements_bulk([request, request])
+
+    month = statement.report_date.date().replace(day=1).isoformat()
+    rows = summary(db)
+    assert_that(rows[(month, "income", "Salary")], equal_to((300.0, 3)))
+    assert_that(rows[(month, "expenditure", "Food")], equal_to((45.0, 6)))
+
+
+def test_backfill_matches_the_maintained_summary(db, statements):
+    maintained = summary(db)
+    db.query(CategorySummaryDB).delete()
+    db.execute(category_summary_backfill(db.get_bind().dialect.name))
+    db.commit()
+
+    assert_that(summary(db), equal_to(maintained))
+
+
+def test_statement_breakdown(category_service, statements, user_id):
+    breakdown = category_service.get_statement_breakdown(statements[2].id, user_id)
+
+    assert_that([(item.category, item.total, item.count, item.share)
+                 for item in breakdown.expenditures],
+                equal_to([("Rent", 1000.0, 1, 1000.0 / 1300.0),
+                          ("Food", 300.0, 1, 300.0 / 1300.0)]))
+    assert_that(breakdown.total_income, equal_to(3000.0))
+
+
+def test_statement_breakdown_of_another_users_statement(category_service, db,
+                                                        statements):
+    other = UserDB(username="alex", password=hash_password("minecraft"))
+    db.add(other)
+    db.commit()
+
+    with pytest.raises(StatementNotFoundError):
+        category_service.get_statement_breakdown(statements[0].id, other.id)
+
+
+def test_period_breakdown_combines_summary_months_and_partial_months(
+        category_service, statements, user_id):
+    # the registry reads the category names once
+    with assert_max_queries(3):
+        category_service.get_period_breakdown(
+            user_id, datetime(2025, 1, 15), datetime(2025, 3, 10))
+    with assert_max_queries(2):
+        breakdown = category_service.get_period_breakdown(
+            user_id, datetime(2025, 1, 15), datetime(2025, 3, 10))
+
+    assert_that({item.category: (item.total, item.count)
+                 for item in breakdown.expenditures},
+                equal_to({"Food": (500.0, 2), "Rent": (1000.0, 1),
+                          "Utilities": (150.0, 1)}))
+    assert_that(breakdown.total_income, close_to(6500.0, 1e-9))
+
+
+@pytest.mark.parametrize("start_date, end_date, expected_income", [
+    (None, None, 12500.0),
+    (datetime(2025, 2, 1), None, 9000.0),
+    (None, datetime(2025, 1, 31, 23, 59, 59, 999999), 3500.0),
+    (datetime(2025, 1, 5), datetime(2025, 1, 20), 3000.0),
+    (datetime(2025, 4, 1), datetime(2025, 4, 30), 0.0),
+])
+def test_period_breakdown_bounds(category_service, statements, user_id, start_date,
+                                 end_date, expected_income):
+    breakdown = category_service.get_period_breakdown(user_id, start_date, end_date)
+
+    assert_that(breakdown.total_income, equal_to(expected_income))
+
+
+def test_summary_months_are_the_whole_months_of_the_period():
+    assert_that(summary_months(datetime(2025, 1, 1), datetime(2025, 2, 28, 12)),
+                equal_to((datetime(2025, 1, 1).date(), datetime(2025, 2, 1).date())))
+    assert_that(summary_months(datetime(2025, 1, 2), None),
+                equal_to((datetime(2025, 2, 1).date(), None)))
+
+
+def test_period_breakdown_user_not_found(category_service):
+    with pytest.raises(UserNotFoundError):
+        category_service.get_period_breakdown(999, None, None)
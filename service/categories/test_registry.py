@@ -0,0 +1,105 @@
+import pytest
+from hamcrest import assert_that, equal_to, has_length
+from sqlalchemy import func, select
+
+from service.categories.registry import CategoryRegistry
+from service.metrics.queries import assert_max_queries, track_queries
+from service.models import UserDB, StatementDB, CategoryDB, IncomeDB
+from service.schemas.expenditure_schema import ExpenditureSchema
+from service.schemas.income_schema import IncomeSchema
+from service.schemas.statement_schema import StatementRequest
+from service.statements.statement_service import StatementService, \
+    intern_categories
+from service.users.user_service import UserService
+from service.users.utils import hash_password
+
+
+@pytest.fixture
+def user_id(db):
+    user = UserDB(username="steve", password=hash_password("minecraft"))
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+@pytest.fixture
+def registry():
+    return CategoryRegistry()
+
+
+def category_count(db):
+    return db.scalar(select(func.count(CategoryDB.id)))
+
+
+def test_intern_inserts_new_names_once(db, registry):
+    engine = db.get_bind()
+    with engine.begin() as connection:
+        first = registry.intern(connection, ["Salary", "Rent"])
+    with engine.begin() as connection:
+        second = registry.intern(connection, ["Rent", "Food"])
+
+    assert_that(second["Rent"], equal_to(first["Rent"]))
+    assert_that(category_count(db), equal_to(3))
+    assert_that(registry.known_ids(["Salary", "Food", "Bonus"]),
+                equal_to({"Salary": first["Salary"], "Food": second["Food"]}))
+
+
+def test_load_and_names(db, registry):
+    db.add_all([CategoryDB(name="Salary"), CategoryDB(name="Rent")])
+    db.commit()
+    with db.get_bind().connect() as connection:
+        loaded = registry.load(connection)
+
+    assert_that(loaded, equal_to(2))
+    ids = registry.known_ids(["Salary", "Rent"])
+    with assert_max_queries(0):
+        names = registry.names(db, ids.values())
+    assert_that(names, equal_to({ids["Salary"]: "Salary", ids["Rent"]: "Rent"}))
+
+
+def test_names_reads_unknown_ids(db, registry):
+    category = CategoryDB(name="Salary")
+    db.add(category)
+    db.commit()
+
+    assert_that(registry.names(db, [category.id]), equal_to({category.id: "Salary"}))
+    assert_that(registry.known_ids(["Salary"]), equal_to({"Salary": category.id}))
+
+
+def test_create_statement_resolves_known_categories_without_a_query(db, user_id,
+                                                                    registry):
+    statement_service = StatementService(user_service=UserService(db), db=db,
+                                         categories=registry)
+    request = StatementRequest(
+        user_id=user_id, incomes=[IncomeSchema(category="Salary", amount=100.0)],
+        expenditures=[ExpenditureSchema(category="Rent", amount=10.0),
+                      ExpenditureSchema(category=" Rent ", amount=5.0)])
+    statement_service.create_statement(request)
+
+    with track_queries() as stats:
+        statement_service.create_statements_bulk([request, request])
+        statement = statement_service.create_statement(request)
+
+    assert_that([query for query in stats.statements
+                 if query.startswith(("INSERT INTO category ", "SELECT category.id"))],
+                equal_to([]))
+    assert_that(category_count(db), equal_to(2))
+    assert_that([item.category for item in statement.expenditures],
+                equal_to(["Rent", "Rent"]))
+
+
+def test_line_items_created_by_name_share_the_category(db, user_id, registry):
+    incomes = [IncomeDB(category="Salary", amount=100.0),
+               IncomeDB(category="Salary", amount=50.0)]
+    intern_categories(db, registry, incomes)
+    db.add(StatementDB(user_id=user_id, incomes=incomes))
+    db.commit()
+    db.expunge_all()
+
+    with assert_max_queries(1):
+        incomes = db.scalars(select(IncomeDB)).all()
+        names = {(income.category_id, income.category) for income in incomes}
+    assert_that(incomes, has_length(2))
+    assert_that(names, has_length(1))
+    assert_that(incomes[0].category, equal_to("Salary"))
+    assert_that(category_count(db), equal_to(1))
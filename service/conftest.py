@@ -1,19 +1,25 @@
 import os
 
 import pytest
+import pytest_asyncio
 from dotenv import load_dotenv
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 
 from service.db import Base
+from service.metrics.queries import instrument_queries
 
 # Load environment variables from .env file
 load_dotenv()
 
 TEST_DATABASE_URL = "sqlite:///./test_service.db"
+TEST_ASYNC_DATABASE_URL = "sqlite+aiosqlite:///./test_service.db"
 
 engine = create_engine(TEST_DATABASE_URL, connect_args={"check_same_thread": False})
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# lets tests bound the statements a code path runs with assert_max_queries
+instrument_queries(engine)
 
 
 @pytest.fixture(scope="function")
@@ -29,3 +35,15 @@ def db():
 
     if os.path.exists("test_service.db"):
         os.remove("test_service.db")
+
+
+@pytest_asyncio.fixture(scope="function")
+async def async_db(db):
+    async_engine = create_async_engine(TEST_ASYNC_DATABASE_URL)
+    session = async_sessionmaker(async_engine, autoflush=False,
+                                 expire_on_commit=False)()
+
+    yield session
+
+    await session.close()
+    await async_engine.dispose()
@@ -1,10 +1,110 @@
-from sqlalchemy import create_engine
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, \
+    create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from service.settings import Settings, get_settings
+
+
+def create_db_engine(url: Optional[str] = None,
+                     settings: Optional[Settings] = None) -> Engine:
+    """Create a sync engine configured from the settings.
+
+    ``url`` defaults to the configured database; pool sizing and, for SQLite,
+    the connection pragmas come from the settings either way.
+    """
+    settings = settings or get_settings()
+    url = make_url(url or settings.resolved_database_url)
+    engine = create_engine(url, **engine_options(url, settings))
+    _listen_for_pragmas(engine, url, settings)
+    return engine
+
+
+def create_async_db_engine(url: Optional[str] = None,
+                           settings: Optional[Settings] = None) -> AsyncEngine:
+    settings = settings or get_settings()
+    url = make_url(url or settings.resolved_async_database_url)
+    engine = create_async_engine(url, **engine_options(url, settings))
+    _listen_for_pragmas(engine.sync_engine, url, settings)
+    return engine
+
+
+def engine_options(url: URL, settings: Settings) -> Dict[str, Any]:
+    options: Dict[str, Any] = {"pool_pre_ping": settings.db_pool_pre_ping}
+    if url.get_backend_name() == "sqlite":
+        if url.get_driver_name() == "pysqlite":
+            options["connect_args"] = {"check_same_thread": False}
+        if _is_private_memory_db(url):
+            # one connection per thread (or one in total for aiosqlite) is the
+            # only way to see a private in-memory database, keep the default pool
+            return options
+        options["poolclass"] = AsyncAdaptedQueuePool if url.get_dialect().is_async \
+            else QueuePool
+
+    options.update(
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout_seconds,
+        # an in-memory database is gone once its last connection is closed
+        pool_recycle=-1 if _is_memory_db(url) else settings.db_pool_recycle_seconds
+    )
+    return options
+
+
+def sqlite_pragmas(url: URL, settings: Settings) -> List[str]:
+    pragmas = []
+    # only a connection that can write may switch the journal mode
+    if settings.sqlite_journal_mode and not _is_memory_db(url) \
+            and url.query.get("mode") != "ro":
+        pragmas.append(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+    if settings.sqlite_synchronous:
+        pragmas.append(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+    if settings.sqlite_mmap_size is not None:
+        pragmas.append(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+    if settings.sqlite_cache_size is not None:
+        pragmas.append(f"PRAGMA cache_size={int(settings.sqlite_cache_size)}")
+    return pragmas
+
+
+def _listen_for_pragmas(engine: Engine, url: URL, settings: Settings):
+    if url.get_backend_name() != "sqlite":
+        return
+    pragmas = sqlite_pragmas(url, settings)
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
+
+
+def _is_memory_db(url: URL) -> bool:
+    return _is_private_memory_db(url) or url.query.get("mode") == "memory" \
+        or ":memory:" in url.database
 
-DATABASE_URL = "sqlite:///./ophelos.db"
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+def _is_private_memory_db(url: URL) -> bool:
+    return url.database in (None, "", ":memory:")
+
+
+DATABASE_URL = get_settings().resolved_database_url
+READ_DATABASE_URL = get_settings().resolved_read_database_url
+
+engine = create_db_engine(DATABASE_URL)
+# the primary doubles as the read engine when no replica is configured
+read_engine = create_db_engine(READ_DATABASE_URL) if READ_DATABASE_URL else engine
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 
@@ -14,3 +114,29 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """Session for queries that never write, served by the read engine."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+@lru_cache
+def get_async_engine() -> AsyncEngine:
+    # created on first use so the sync deployment does not need the async driver
+    return create_async_db_engine()
+
+
+@lru_cache
+def get_async_sessionmaker() -> async_sessionmaker:
+    return async_sessionmaker(get_async_engine(), autoflush=False,
+                              expire_on_commit=False)
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
@@ -1,23 +1,92 @@
+from typing import Optional
+
 from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from service.db import get_db
+from service.categories.category_service import CategoryService
+from service.categories.registry import CategoryRegistry
+from service.db import SessionLocal, get_db, get_read_db, get_async_db
+from service.metrics.registry import MetricsRegistry
+from service.profiling.profiler import ProfileStore
+from service.ratings.async_rating_service import AsyncRatingService
+from service.ratings.prefix_index import PrefixIndexRegistry
+from service.ratings.rating_cache import RatingCache
 from service.ratings.rating_service import RatingService
+from service.statements.async_statement_service import AsyncStatementService
+from service.statements.group_commit import GroupCommitWriter
 from service.statements.statement_service import StatementService
+from service.users.async_user_service import AsyncUserService
+from service.settings import get_settings
+from service.users.user_cache import UserExistenceCache
 from service.users.user_service import UserService
 
+settings = get_settings()
+prefix_index_registry = PrefixIndexRegistry(
+    max_users=settings.prefix_index_max_users,
+    ttl_seconds=settings.prefix_index_ttl_seconds)
+user_existence_cache = UserExistenceCache(
+    max_entries=settings.user_cache_max_entries)
+rating_cache = RatingCache(max_entries=settings.rating_cache_max_entries,
+                           ttl_seconds=settings.rating_cache_ttl_seconds)
+metrics_registry = MetricsRegistry()
+profile_store = ProfileStore(max_entries=settings.profiling_max_profiles)
+category_registry = CategoryRegistry()
+# started and stopped by the app's lifespan
+group_commit_writer: Optional[GroupCommitWriter] = GroupCommitWriter(
+    SessionLocal, metrics_registry, listeners=[prefix_index_registry, rating_cache],
+    categories=category_registry,
+    max_batch_size=settings.group_commit_max_batch_size,
+    max_delay_seconds=settings.group_commit_max_delay_seconds,
+    timeout_seconds=settings.group_commit_timeout_seconds) \
+    if settings.group_commit_enabled else None
+
 
 def get_user_service(db: Session = Depends(get_db)) -> UserService:
-    return UserService(db)
+    return UserService(db, existence_cache=user_existence_cache)
 
 
 def get_statement_service(
         user_service: UserService = Depends(get_user_service),
-        db: Session = Depends(get_db)
+        db: Session = Depends(get_db),
+        read_db: Session = Depends(get_read_db)
 ) -> StatementService:
-    return StatementService(user_service=user_service, db=db)
+    return StatementService(user_service=user_service, db=db,
+                            listeners=[prefix_index_registry, rating_cache],
+                            read_db=read_db, categories=category_registry,
+                            writer=group_commit_writer)
 
 
-def get_rating_service(db: Session = Depends(get_db),
+def get_rating_service(db: Session = Depends(get_read_db),
                        statement_service: StatementService =
                        Depends(get_statement_service)) -> RatingService:
-    return RatingService(db=db, statement_service=statement_service)
+    return RatingService(db=db, statement_service=statement_service,
+                         prefix_index=prefix_index_registry, cache=rating_cache)
+
+
+def get_category_service(user_service: UserService = Depends(get_user_service),
+                         read_db: Session = Depends(get_read_db)) -> CategoryService:
+    return CategoryService(user_service=user_service, db=read_db,
+                           categories=category_registry)
+
+
+def get_async_user_service(db: AsyncSession = Depends(get_async_db)) \
+        -> AsyncUserService:
+    return AsyncUserService(db, existence_cache=user_existence_cache)
+
+
+def get_async_statement_service(
+        user_service: AsyncUserService = Depends(get_async_user_service),
+        db: AsyncSession = Depends(get_async_db)
+) -> AsyncStatementService:
+    return AsyncStatementService(user_service=user_service, db=db,
+                                 listeners=[prefix_index_registry, rating_cache],
+                                 categories=category_registry,
+                                 writer=group_commit_writer)
+
+
+def get_async_rating_service(db: AsyncSession = Depends(get_async_db),
+                             statement_service: AsyncStatementService =
+                             Depends(get_async_statement_service)) \
+        -> AsyncRatingService:
+    return AsyncRatingService(db=db, statement_service=statement_service,
+                              cache=rating_cache)
@@ -1,7 +1,9 @@
 from fastapi import APIRouter, status
 from pydantic import BaseModel
 
-router = APIRouter()
+from service.profiling.route import ProfiledRoute
+
+router = APIRouter(route_class=ProfiledRoute)
 
 
 class Health(BaseModel):
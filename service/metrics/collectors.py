@@ -0,0 +1,106 @@
+import time
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import Engine, event
+
+from service.metrics.registry import MetricsRegistry, LabelValues
+
+
+class EngineMetrics:
+    """Pool usage and the count, duration and errors of the SQL statements run
+    on each added engine, labelled with the engine's name."""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.engines: Dict[str, Engine] = {}
+        self.checkouts = registry.counter(
+            "ophelos_db_pool_checkouts_total",
+            "Connections checked out of the pool.", ("engine",))
+        self.queries = registry.counter(
+            "ophelos_db_queries_total", "SQL statements executed.", ("engine",))
+        self.query_errors = registry.counter(
+            "ophelos_db_query_errors_total", "SQL statements that raised.",
+            ("engine",))
+        self.query_duration = registry.histogram(
+            "ophelos_db_query_duration_seconds",
+            "Time spent executing SQL statements.", ("engine",))
+        registry.callback("ophelos_db_pool_checked_out",
+                          "Connections currently checked out.", ("engine",),
+                          lambda: self._pool_values("checkedout"))
+        registry.callback("ophelos_db_pool_overflow",
+                          "Connections open beyond the pool size, negative while "
+                          "the pool is still filling.", ("engine",),
+                          lambda: self._pool_values("overflow"))
+        registry.callback("ophelos_db_pool_size", "Configured pool size.",
+                          ("engine",), lambda: self._pool_values("size"))
+
+    def add(self, name: str, engine: Engine):
+        if name in self.engines:
+            return
+        self.engines[name] = engine
+        labels = (name,)
+
+        @event.listens_for(engine, "checkout")
+        def count_checkout(dbapi_connection, connection_record, connection_proxy):
+            self.checkouts.inc(labels)
+
+        @event.listens_for(engine, "before_cursor_execute")
+        def start_query(connection, cursor, statement, parameters, context,
+                        executemany):
+            connection.info.setdefault("metrics_query_started", []).append(
+                time.perf_counter())
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def end_query(connection, cursor, statement, parameters, context,
+                      executemany):
+            started = connection.info["metrics_query_started"].pop()
+            self.queries.inc(labels)
+            self.query_duration.observe(time.perf_counter() - started, labels)
+
+        @event.listens_for(engine, "handle_error")
+        def count_error(exception_context):
+            self.query_errors.inc(labels)
+            connection = exception_context.connection
+            if connection is not None and connection.info.get("metrics_query_started"):
+                connection.info["metrics_query_started"].pop()
+
+    def _pool_values(self, method: str) -> List[Tuple[LabelValues, float]]:
+        # SingletonThreadPool and StaticPool do not size themselves
+        return [((name,), getattr(engine.pool, method)())
+                for name, engine in self.engines.items()
+                if hasattr(engine.pool, method)]
+
+
+class CacheMetrics:
+    """The ``stats()`` of each added service.cache.LRUCache (or anything with
+    the same statistics), read when the metrics are scraped."""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.caches: Dict[str, Any] = {}
+        registry.callback(
+            "ophelos_cache_entries", "Entries held by the cache.", ("cache",),
+            lambda: [((name,), stats["entries"])
+                     for name, stats in self._stats().items()])
+        registry.callback(
+            "ophelos_cache_max_entries", "Capacity of the cache.", ("cache",),
+            lambda: [((name,), stats["max_entries"])
+                     for name, stats in self._stats().items()])
+        registry.callback(
+            "ophelos_cache_requests_total", "Cache lookups by result.",
+            ("cache", "result"),
+            lambda: [((name, result), stats[key])
+                     for name, stats in self._stats().items()
+                     for result, key in (("hit", "hits"), ("miss", "misses"))],
+            type="counter")
+        registry.callback(
+            "ophelos_cache_removals_total", "Entries dropped from the cache.",
+            ("cache", "reason"),
+            lambda: [((name, reason), stats[reason])
+                     for name, stats in self._stats().items()
+                     for reason in ("evictions", "expirations", "invalidations")],
+            type="counter")
+
+    def add(self, name: str, cache: Any):
+        self.caches[name] = cache
+
+    def _stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: cache.stats() for name, cache in list(self.caches.items())}
@@ -0,0 +1,55 @@
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from service.metrics.registry import MetricsRegistry
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Counts HTTP requests and times them per route template.
+
+    Plain ASGI rather than BaseHTTPMiddleware, so a request costs a few dict
+    updates and no extra task or response copy.
+    """
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry):
+        self.app = app
+        self.requests = registry.counter(
+            "ophelos_http_requests_total", "HTTP requests handled.",
+            ("method", "route", "status"))
+        self.duration = registry.histogram(
+            "ophelos_http_request_duration_seconds",
+            "Time from receiving an HTTP request to the end of its response.",
+            ("method", "route"))
+        self.in_flight = registry.gauge(
+            "ophelos_http_requests_in_flight", "HTTP requests being handled.")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.in_flight.dec()
+            # the router stores the matched route in the scope we passed down;
+            # its path template keeps one series per endpoint, not per id
+            route = scope.get("route")
+            route = getattr(route, "path", UNMATCHED_ROUTE)
+            method = scope["method"]
+            self.requests.inc((method, route, str(status_code)))
+            self.duration.observe(elapsed, (method, route))
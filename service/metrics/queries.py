@@ -0,0 +1,144 @@
+import logging
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional
+
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+QUERY_TIME_HEADER = "X-DB-Time-Ms"
+
+
+class QueryStats:
+    """SQL statements run while tracking, and the time spent in them."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter = Counter()
+
+    def most_repeated(self) -> tuple:
+        """(statement, times) of the statement run most often, the usual shape
+        of an N+1: the same SELECT once per parent row."""
+        return self.statements.most_common(1)[0] if self.statements else ("", 0)
+
+
+# the QueryStats of the current request (or track_queries block); it is copied
+# into the threadpool with the rest of the context, so sync endpoints and
+# dependencies add to the same object
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None)
+
+
+def instrument_queries(engine: Engine):
+    """Add the statements run on ``engine`` to the tracked QueryStats."""
+    if event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def _before_cursor_execute(connection, cursor, statement, parameters, context,
+                           executemany):
+    if _current_stats.get() is not None:
+        connection.info.setdefault("query_stats_started", []).append(
+            time.perf_counter())
+
+
+def _after_cursor_execute(connection, cursor, statement, parameters, context,
+                          executemany):
+    stats = _current_stats.get()
+    started = connection.info.get("query_stats_started")
+    if stats is None or not started:
+        return
+    stats.count += 1
+    stats.duration += time.perf_counter() - started.pop()
+    stats.statements[statement] += 1
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    stats = QueryStats()
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(max_count: int) -> Iterator[QueryStats]:
+    """Fail unless the block runs at most ``max_count`` statements on the
+    instrumented engines."""
+    with track_queries() as stats:
+        yield stats
+    if stats.count > max_count:
+        raise AssertionError(
+            f"Expected at most {max_count} queries, {stats.count} were run:\n"
+            + "\n".join(f"{times} x {statement}"
+                        for statement, times in stats.statements.most_common()))
+
+
+class QueryStatsMiddleware:
+    """Counts the SQL statements and DB time of each request.
+
+    Both are returned in response headers and logged as one key=value line per
+    request, at WARNING when one statement repeats ``repeated_query_threshold``
+    times or more.
+    """
+
+    def __init__(self, app: ASGIApp, repeated_query_threshold: int = 10):
+        self.app = app
+        self.repeated_query_threshold = repeated_query_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        with track_queries() as stats:
+            async def send_with_stats(message: Message):
+                nonlocal status_code
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    message["headers"] = list(message.get("headers", [])) + \
+                        _stats_headers(stats)
+                await send(message)
+
+            started = time.perf_counter()
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                self._log(scope, status_code, stats, time.perf_counter() - started)
+
+    def _log(self, scope: Scope, status_code: int, stats: QueryStats,
+             elapsed: float):
+        route = getattr(scope.get("route"), "path", scope["path"])
+        statement, times = stats.most_repeated()
+        fields = {"method": scope["method"], "route": route, "status": status_code,
+                  "queries": stats.count, "db_ms": round(stats.duration * 1000, 3),
+                  "duration_ms": round(elapsed * 1000, 3)}
+        if times >= self.repeated_query_threshold:
+            logger.warning(_logfmt({**fields, "repeated_query_times": times,
+                                    "repeated_query": " ".join(statement.split())}),
+                           extra={"query_stats": fields})
+        else:
+            logger.info(_logfmt(fields), extra={"query_stats": fields})
+
+
+def _stats_headers(stats: QueryStats) -> List[tuple]:
+    return [(QUERY_COUNT_HEADER.lower().encode(), str(stats.count).encode()),
+            (QUERY_TIME_HEADER.lower().encode(),
+             f"{stats.duration * 1000:.3f}".encode())]
+
+
+def _logfmt(fields: dict) -> str:
+    return " ".join(f'{key}="{value}"' if isinstance(value, str) and " " in value
+                    else f"{key}={value}" for key, value in fields.items())
@@ -0,0 +1,193 @@
+import math
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+# latency buckets in seconds, from a cached rating to a slow bulk insert
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+
+
+class Metric(ABC):
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def samples(self) -> Iterable[Tuple[str, LabelValues, float]]:
+        """(name suffix, label values, value) of every series."""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {_escape(self.documentation, help_text=True)}",
+                 f"# TYPE {self.name} {self.type}"]
+        for suffix, labelvalues, value in self.samples():
+            lines.append(f"{self.name}{suffix}"
+                         f"{_labels(self._names_for(suffix), labelvalues)} "
+                         f"{_value(value)}")
+        return lines
+
+    def _names_for(self, suffix: str) -> Tuple[str, ...]:
+        return self.labelnames
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labelvalues: LabelValues = (), amount: float = 1.0):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def value(self, labelvalues: LabelValues = ()) -> float:
+        return self._values.get(labelvalues, 0.0)
+
+    def samples(self):
+        with self._lock:
+            return [("", labelvalues, value)
+                    for labelvalues, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, labelvalues: LabelValues = (), amount: float = 1.0):
+        self.inc(labelvalues, -amount)
+
+    def set(self, value: float, labelvalues: LabelValues = ()):
+        with self._lock:
+            self._values[labelvalues] = value
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per series: a count per bucket plus +Inf, then the sum
+        self._series: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, labelvalues: LabelValues = ()):
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+            series[bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def count(self, labelvalues: LabelValues = ()) -> int:
+        series = self._series.get(labelvalues)
+        return sum(series[:-1]) if series else 0
+
+    def samples(self):
+        with self._lock:
+            series_items = sorted((labelvalues, list(series))
+                                  for labelvalues, series in self._series.items())
+        samples = []
+        for labelvalues, series in series_items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series):
+                cumulative += count
+                samples.append(("_bucket", labelvalues + (_value(bound),),
+                                cumulative))
+            samples.append(("_sum", labelvalues, series[-1]))
+            samples.append(("_count", labelvalues, cumulative))
+        return samples
+
+    def _names_for(self, suffix: str) -> Tuple[str, ...]:
+        return self.labelnames + ("le",) if suffix == "_bucket" else self.labelnames
+
+
+class CallbackMetric(Metric):
+    """Values read when the metrics are scraped, for state owned elsewhere
+    such as pool sizes and cache statistics."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Iterable[Tuple[LabelValues, float]]],
+                 type: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self.type = type
+        self.callback = callback
+
+    def samples(self):
+        return [("", labelvalues, value) for labelvalues, value in self.callback()]
+
+
+class MetricsRegistry:
+    """Process-local metrics rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, documentation: str,
+                labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str,
+              labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, labelnames: Sequence[str],
+                 callback: Callable[[], Iterable[Tuple[LabelValues, float]]],
+                 type: str = "gauge") -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, labelnames,
+                                            callback, type))
+
+    def register(self, metric: Metric) -> Metric:
+        """Add ``metric``, or return the one already registered under its name
+        so instrumenting twice does not duplicate series."""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+def _labels(names: Sequence[str], values: LabelValues) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"'
+                          for name, value in zip(names, values)) + "}"
+
+
+def _escape(value: str, help_text: bool = False) -> str:
+    value = value.replace("\\", "\\\\").replace("\n", "\\n")
+    return value if help_text else value.replace('"', '\\"')
+
+
+def _value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return repr(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value)
@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from starlette.responses import Response
+
+from service.dependencies import metrics_registry
+from service.profiling.route import ProfiledRoute
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+@router.get("", include_in_schema=False)
+def metrics():
+    return Response(metrics_registry.render(), media_type=PROMETHEUS_MEDIA_TYPE)
@@ -0,0 +1,85 @@
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from hamcrest import assert_that, equal_to, contains_string
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from service.cache import LRUCache
+from service.metrics.collectors import EngineMetrics, CacheMetrics
+from service.metrics.middleware import MetricsMiddleware
+from service.metrics.registry import MetricsRegistry
+
+
+@pytest.fixture
+def registry():
+    return MetricsRegistry()
+
+
+def test_engine_metrics_count_queries_checkouts_and_errors(registry, tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'metrics.db'}")
+    engine_metrics = EngineMetrics(registry)
+    engine_metrics.add("primary", engine)
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        connection.execute(text("SELECT 2"))
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM missing"))
+        assert_that(registry.render(),
+                    contains_string('ophelos_db_pool_checked_out{engine="primary"} 1'))
+
+    assert_that(engine_metrics.queries.value(("primary",)), equal_to(2))
+    assert_that(engine_metrics.query_errors.value(("primary",)), equal_to(1))
+    assert_that(engine_metrics.checkouts.value(("primary",)), equal_to(1))
+    assert_that(registry.render(), contains_string(
+        'ophelos_db_query_duration_seconds_count{engine="primary"} 2'))
+    engine.dispose()
+
+
+def test_cache_metrics_export_stats(registry):
+    cache = LRUCache(max_entries=10)
+    CacheMetrics(registry).add("rating", cache)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    rendered = registry.render()
+
+    assert_that(rendered, contains_string('ophelos_cache_entries{cache="rating"} 1'))
+    assert_that(rendered, contains_string(
+        'ophelos_cache_requests_total{cache="rating",result="hit"} 1'))
+    assert_that(rendered, contains_string(
+        'ophelos_cache_requests_total{cache="rating",result="miss"} 1'))
+
+
+def test_middleware_labels_requests_with_the_route_template(registry):
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, registry=registry)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        if item_id == 0:
+            raise HTTPException(status_code=404)
+        return {"id": item_id}
+
+    client = TestClient(app)
+    client.get("/items/1")
+    client.get("/items/2")
+    client.get("/items/0")
+    client.get("/nowhere")
+
+    rendered = registry.render()
+    assert_that(rendered, contains_string(
+        'ophelos_http_requests_total{method="GET",route="/items/{item_id}",'
+        'status="200"} 2'))
+    assert_that(rendered, contains_string(
+        'ophelos_http_requests_total{method="GET",route="/items/{item_id}",'
+        'status="404"} 1'))
+    assert_that(rendered, contains_string(
+        'ophelos_http_requests_total{method="GET",route="<unmatched>",'
+        'status="404"} 1'))
+    assert_that(rendered, contains_string(
+        'ophelos_http_request_duration_seconds_count{method="GET",'
+        'route="/items/{item_id}"} 3'))
+    assert_that(rendered, contains_string("ophelos_http_requests_in_flight 0"))
@@ -0,0 +1,75 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from hamcrest import assert_that, equal_to, contains_string
+from sqlalchemy import create_engine, text
+
+from service.metrics.queries import QueryStatsMiddleware, instrument_queries, \
+    assert_max_queries, track_queries, QUERY_COUNT_HEADER, QUERY_TIME_HEADER
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'queries.db'}")
+    instrument_queries(engine)
+    instrument_queries(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def client(engine):
+    app = FastAPI()
+    app.add_middleware(QueryStatsMiddleware, repeated_query_threshold=5)
+
+    @app.get("/queries/{count}")
+    def run_queries(count: int):
+        with engine.connect() as connection:
+            for _ in range(count):
+                connection.execute(text("SELECT 1"))
+        return {}
+
+    return TestClient(app)
+
+
+def test_request_query_stats_are_returned_in_headers(client):
+    response = client.get("/queries/3")
+
+    assert_that(response.headers[QUERY_COUNT_HEADER], equal_to("3"))
+    assert_that(float(response.headers[QUERY_TIME_HEADER]) >= 0, equal_to(True))
+
+
+def test_requests_are_logged_and_repeated_queries_flagged(client, caplog):
+    with caplog.at_level(logging.INFO, logger="service.metrics.queries"):
+        client.get("/queries/1")
+        client.get("/queries/6")
+
+    info, warning = caplog.records
+    assert_that(info.levelno, equal_to(logging.INFO))
+    assert_that(info.getMessage(), contains_string(
+        'method=GET route=/queries/{count} status=200 queries=1'))
+    assert_that(warning.levelno, equal_to(logging.WARNING))
+    assert_that(warning.getMessage(), contains_string(
+        'repeated_query_times=6 repeated_query="SELECT 1"'))
+    assert_that(warning.query_stats["queries"], equal_to(6))
+
+
+def test_queries_outside_tracking_are_not_counted(engine):
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        with track_queries() as stats:
+            connection.execute(text("SELECT 2"))
+
+    assert_that(stats.count, equal_to(1))
+
+
+def test_assert_max_queries_lists_the_statements(engine):
+    with pytest.raises(AssertionError) as exc_info:
+        with assert_max_queries(1), engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 1"))
+
+    assert_that(str(exc_info.value), contains_string(
+        "Expected at most 1 queries, 2 were run:\n2 x SELECT 1"))
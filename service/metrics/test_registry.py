@@ -0,0 +1,66 @@
+from hamcrest import assert_that, equal_to, contains_string, has_items
+
+from service.metrics.registry import MetricsRegistry
+
+
+def test_counter_renders_one_line_per_label_set():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests_total", "Requests.", ("route", "status"))
+
+    requests.inc(("/a", "200"))
+    requests.inc(("/a", "200"), amount=2)
+    requests.inc(("/b", "404"))
+
+    assert_that(registry.render(), equal_to(
+        '# HELP requests_total Requests.\n'
+        '# TYPE requests_total counter\n'
+        'requests_total{route="/a",status="200"} 3\n'
+        'requests_total{route="/b",status="404"} 1\n'))
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    duration = registry.histogram("duration_seconds", "Duration.", ("route",),
+                                  buckets=(0.1, 1.0))
+
+    for value in (0.05, 0.1, 0.5, 3.0):
+        duration.observe(value, ("/a",))
+
+    assert_that(registry.render().splitlines(), has_items(
+        'duration_seconds_bucket{route="/a",le="0.1"} 2',
+        'duration_seconds_bucket{route="/a",le="1"} 3',
+        'duration_seconds_bucket{route="/a",le="+Inf"} 4',
+        'duration_seconds_sum{route="/a"} 3.65',
+        'duration_seconds_count{route="/a"} 4'))
+    assert_that(duration.count(("/a",)), equal_to(4))
+
+
+def test_gauge_and_callback_values():
+    registry = MetricsRegistry()
+    in_flight = registry.gauge("in_flight", "In flight.")
+    registry.callback("entries", "Entries.", ("cache",),
+                      lambda: [(("rating",), 7)])
+
+    in_flight.inc()
+    in_flight.inc()
+    in_flight.dec()
+
+    assert_that(registry.render(), contains_string("in_flight 1\n"))
+    assert_that(registry.render(), contains_string('entries{cache="rating"} 7\n'))
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.counter("total", "Total.", ("route",)).inc(('say "hi"\\\n',))
+
+    assert_that(registry.render(),
+                contains_string('total{route="say \\"hi\\"\\\\\\n"} 1'))
+
+
+def test_registering_a_name_twice_returns_the_first_metric():
+    registry = MetricsRegistry()
+
+    first = registry.counter("total", "Total.")
+    second = registry.counter("total", "Total.")
+
+    assert_that(second is first, equal_to(True))
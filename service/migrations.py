@@ -0,0 +1,142 @@
+import logging
+from datetime import datetime, timezone
+from typing import Callable, List, NamedTuple
+
+from sqlalchemy import Column, DateTime, Engine, Integer, String, Table, inspect, \
+    select, text
+from sqlalchemy.engine import Connection
+
+from service.db import Base
+from service.categories.summary import category_summary_backfill
+from service.models import StatementDB, IncomeDB, ExpenditureDB, PortfolioRatingDB, \
+    CategoryDB, CategorySummaryDB
+from service.statements.statement_service import statement_totals_backfill
+
+logger = logging.getLogger(__name__)
+
+schema_version = Table(
+    "schema_version",
+    Base.metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+
+class Migration(NamedTuple):
+    version: int
+    description: str
+    apply: Callable[[Connection], None]
+
+
+def _add_statement_totals(connection: Connection):
+    existing = {column["name"] for column in inspect(connection).get_columns(
+        StatementDB.__tablename__)}
+    for name, ddl in (("total_income", "FLOAT NOT NULL DEFAULT 0"),
+                      ("total_expenditure", "FLOAT NOT NULL DEFAULT 0"),
+                      ("income_count", "INTEGER NOT NULL DEFAULT 0"),
+                      ("expenditure_count", "INTEGER NOT NULL DEFAULT 0")):
+        if name not in existing:
+            connection.execute(text(f"ALTER TABLE statement ADD COLUMN {name} {ddl}"))
+    connection.execute(statement_totals_backfill())
+
+
+def _add_lookup_indexes(connection: Connection):
+    _create_indexes(connection, StatementDB, IncomeDB, ExpenditureDB)
+
+
+def _add_portfolio_rating(connection: Connection):
+    PortfolioRatingDB.__table__.create(bind=connection, checkfirst=True)
+
+
+def _add_category_summary(connection: Connection):
+    # filled by migration 5, once the line items reference their categories
+    CategorySummaryDB.__table__.create(bind=connection, checkfirst=True)
+
+
+def _add_category_table(connection: Connection):
+    CategoryDB.__table__.create(bind=connection, checkfirst=True)
+    for model in (IncomeDB, ExpenditureDB):
+        table = model.__tablename__
+        existing = {column["name"] for column in inspect(connection).get_columns(
+            table)}
+        if "category" not in existing:
+            continue
+        connection.execute(text(
+            f"INSERT INTO category (name) SELECT DISTINCT category FROM {table} "
+            f"WHERE category NOT IN (SELECT name FROM category)"))
+        if "category_id" not in existing:
+            # nullable here: neither database adds a NOT NULL column without a
+            # default, the models always set it
+            connection.execute(text(
+                f"ALTER TABLE {table} ADD COLUMN category_id INTEGER "
+                f"REFERENCES category(id)"))
+        connection.execute(text(
+            f"UPDATE {table} SET category_id = (SELECT id FROM category "
+            f"WHERE category.name = {table}.category)"))
+        connection.execute(text(f"ALTER TABLE {table} DROP COLUMN category"))
+    _create_indexes(connection, IncomeDB, ExpenditureDB)
+
+    # category_summary is derived data, rebuilt keyed by category_id
+    summary = CategorySummaryDB.__table__
+    if "category" in {column["name"]
+                      for column in inspect(connection).get_columns(summary.name)}:
+        summary.drop(bind=connection)
+        summary.create(bind=connection)
+    connection.execute(summary.delete())
+    connection.execute(category_summary_backfill(connection.dialect.name))
+
+
+def _create_indexes(connection: Connection, *models):
+    for model in models:
+        existing = {column["name"] for column in inspect(connection).get_columns(
+            model.__tablename__)}
+        for index in model.__table__.indexes:
+            # the migration adding a column creates its indexes
+            if {column.name for column in index.columns} <= existing:
+                index.create(bind=connection, checkfirst=True)
+
+
+MIGRATIONS: List[Migration] = [
+    Migration(1, "denormalised statement totals", _add_statement_totals),
+    Migration(2, "statement(user_id, report_date) and line item statement_id "
+                 "indexes", _add_lookup_indexes),
+    Migration(3, "portfolio_rating table", _add_portfolio_rating),
+    Migration(4, "category_summary table", _add_category_summary),
+    Migration(5, "category table referenced by the line items, indexed, and "
+                 "category_summary, which is backfilled", _add_category_table),
+]
+
+
+def migrate(engine: Engine) -> int:
+    """Create missing tables and apply pending migrations, returns the version.
+
+    A database without a statement table is created from the models and
+    stamped with the latest version; databases created before versioning
+    start from version 0.
+    """
+    with engine.begin() as connection:
+        existing_schema = inspect(connection).has_table(StatementDB.__tablename__)
+        Base.metadata.create_all(bind=connection)
+
+        applied = set(connection.scalars(select(schema_version.c.version)))
+        for migration in MIGRATIONS:
+            if migration.version in applied:
+                continue
+            if existing_schema:
+                logger.info(f"Applying migration {migration.version}: "
+                            f"{migration.description}")
+                migration.apply(connection)
+            connection.execute(schema_version.insert().values(
+                version=migration.version,
+                description=migration.description,
+                applied_at=datetime.now(timezone.utc)
+            ))
+
+        return current_version(connection)
+
+
+def current_version(connection: Connection) -> int:
+    version = connection.scalar(select(schema_version.c.version)
+                                .order_by(schema_version.c.version.desc()))
+    return version or 0
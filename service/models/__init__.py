@@ -1,7 +1,11 @@
 # service/models/__init__.py
 from service.models.user import UserDB
 from service.models.statement import StatementDB
+from service.models.category import CategoryDB
 from service.models.income import IncomeDB
 from service.models.expenditure import ExpenditureDB
+from service.models.portfolio_rating import PortfolioRatingDB
+from service.models.category_summary import CategorySummaryDB
 
-__all__ = ["UserDB", "StatementDB", "IncomeDB", "ExpenditureDB"]
+__all__ = ["UserDB", "StatementDB", "CategoryDB", "IncomeDB", "ExpenditureDB",
+           "PortfolioRatingDB", "CategorySummaryDB"]
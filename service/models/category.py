@@ -0,0 +1,34 @@
+from typing import Optional
+
+from sqlalchemy import Column, Integer, String
+
+from service.db import Base
+
+
+class CategoryDB(Base):
+    """The distinct line item categories; line items store the id, so each name
+    is kept once and grouping compares integers."""
+    __tablename__ = "category"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    name = Column(String, nullable=False, unique=True)
+
+
+class CategorizedItem:
+    """The category of a line item by name, as the API reads and writes it.
+
+    A name given to a new item is kept until the statement services resolve
+    its ``category_id`` (see ``intern_categories``); loaded items read it from
+    ``category_row``, joined into the query that loads them.
+    """
+    _category: Optional[str] = None
+
+    @property
+    def category(self) -> Optional[str]:
+        if self._category is not None:
+            return self._category
+        return self.category_row.name if self.category_row is not None else None
+
+    @category.setter
+    def category(self, name: Optional[str]):
+        self._category = name
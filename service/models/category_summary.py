@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, ForeignKey, Date, Float, String, \
+    UniqueConstraint
+
+from service.db import Base
+
+
+class CategorySummaryDB(Base):
+    """Line item totals of one user, month and category, kept up to date as
+    statements are created so breakdowns read a few rows instead of the items."""
+    __tablename__ = "category_summary"
+    __table_args__ = (
+        # the upsert target, and the breakdown lookups by user and month range
+        UniqueConstraint("user_id", "month", "kind", "category_id",
+                         name="uq_category_summary_user_id_month_kind_category_id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    # first day of the month of the statements' report_date
+    month = Column(Date, nullable=False)
+    # "income" or "expenditure"
+    kind = Column(String, nullable=False)
+    category_id = Column(Integer, ForeignKey("category.id"), nullable=False)
+    total = Column(Float, nullable=False, default=0.0)
+    item_count = Column(Integer, nullable=False, default=0)
@@ -1,16 +1,21 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey
+from sqlalchemy import Column, Integer, Float, ForeignKey
 from sqlalchemy.orm import relationship
 
 from service.db import Base
+from service.models.category import CategorizedItem
 
 
-class ExpenditureDB(Base):
+class ExpenditureDB(CategorizedItem, Base):
     __tablename__ = "expenditure"
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
-    category = Column(String, nullable=False)
+    category_id = Column(Integer, ForeignKey("category.id"), nullable=False,
+                         index=True)
     amount = Column(Float, nullable=False)
-    statement_id = Column(Integer, ForeignKey("statement.id"), nullable=True)
+    statement_id = Column(Integer, ForeignKey("statement.id"), nullable=True,
+                          index=True)
 
     # one to many -> statement:expenditures
     statement = relationship("StatementDB", back_populates="expenditures")
+    # many to one -> category, loaded with the line item
+    category_row = relationship("CategoryDB", lazy="joined", innerjoin=True)
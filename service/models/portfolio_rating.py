@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Float, String, Index
+
+from service.db import Base
+
+
+class PortfolioRatingDB(Base):
+    """One user's rating in a month-end portfolio run, keyed by run_at."""
+    __tablename__ = "portfolio_rating"
+    __table_args__ = (
+        Index("ix_portfolio_rating_run_at_user_id", "run_at", "user_id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_at = Column(DateTime, nullable=False)
+    user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
+    # the rated period, None when unbounded
+    period_start = Column(DateTime, nullable=True)
+    period_end = Column(DateTime, nullable=True)
+
+    total_income = Column(Float, nullable=False)
+    total_expenditure = Column(Float, nullable=False)
+    disposable_income = Column(Float, nullable=False)
+    ratio = Column(Float, nullable=False)
+    grade = Column(String(1), nullable=False)
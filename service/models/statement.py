@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, Float, Index
 from datetime import datetime, timezone
 
 from sqlalchemy.orm import relationship
@@ -8,11 +8,23 @@ from service.db import Base
 
 class StatementDB(Base):
     __tablename__ = "statement"
+    __table_args__ = (
+        # period lookups filter on the user and a report_date range
+        Index("ix_statement_user_id_report_date", "user_id", "report_date"),
+    )
 
     id = Column(Integer, primary_key=True, index=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey("user.id"), nullable=False)
     report_date = Column(DateTime, default=datetime.now(timezone.utc))
 
+    # denormalised from the line items at write time, statements are immutable
+    total_income = Column(Float, nullable=False, default=0.0, server_default="0")
+    total_expenditure = Column(Float, nullable=False, default=0.0,
+                               server_default="0")
+    income_count = Column(Integer, nullable=False, default=0, server_default="0")
+    expenditure_count = Column(Integer, nullable=False, default=0,
+                               server_default="0")
+
     # one to many -> user:statements
     user = relationship("UserDB", back_populates="statements")
     # one to many -> statement:incomes
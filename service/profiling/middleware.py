@@ -0,0 +1,95 @@
+import hmac
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Optional
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from service.profiling.profiler import Profile, ProfileStore, StackSampler, \
+    DEFAULT_INTERVAL_SECONDS, current_profile, profiled_thread
+
+PROFILE_TOKEN_HEADER = "X-Profile-Token"
+REQUEST_ID_HEADER = "X-Request-ID"
+PROFILE_ID_HEADER = "X-Profile-Id"
+# client request ids are used as store keys and in file names
+REQUEST_ID_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,64}")
+
+
+class ProfilingMiddleware:
+    """Profiles the requests that carry the profiling token, and a random
+    ``sample_rate`` share of the others, into ``store``.
+
+    A profiled response has the id its profile is stored under in
+    X-Profile-Id: the client's X-Request-ID when it is a valid one, a new one
+    otherwise. One request per process is profiled at a time; requests that
+    ask while another is profiled run as usual. Only the routes of routers
+    built with ``route_class=ProfiledRoute`` have their sync code profiled.
+    """
+
+    def __init__(self, app: ASGIApp, store: ProfileStore, token: Optional[str] = None,
+                 sample_rate: float = 0.0,
+                 interval: float = DEFAULT_INTERVAL_SECONDS):
+        self.app = app
+        self.store = store
+        self.token = token.encode() if token else None
+        self.sample_rate = sample_rate
+        self.interval = interval
+        self._profiling = threading.Lock()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self._wanted(scope) \
+                or not self._profiling.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self._profile(scope, receive, send)
+        finally:
+            self._profiling.release()
+
+    def _wanted(self, scope: Scope) -> bool:
+        if self.token is not None:
+            token = _header(scope, PROFILE_TOKEN_HEADER)
+            if token is not None and hmac.compare_digest(token, self.token):
+                return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    async def _profile(self, scope: Scope, receive: Receive, send: Send):
+        request_id = (_header(scope, REQUEST_ID_HEADER) or b"").decode("latin-1")
+        if not REQUEST_ID_PATTERN.fullmatch(request_id):
+            request_id = uuid.uuid4().hex
+        query = scope.get("query_string", b"").decode("latin-1")
+        profile = Profile(request_id, scope["method"],
+                          f"{scope['path']}?{query}" if query else scope["path"])
+
+        async def send_with_profile_id(message: Message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + \
+                    [(PROFILE_ID_HEADER.lower().encode(), request_id.encode())]
+            await send(message)
+
+        sampler = StackSampler(profile, self.interval)
+        started = time.perf_counter()
+        context_token = current_profile.set(profile)
+        sampler.start()
+        try:
+            # the event loop thread; ProfiledRoute adds the threadpool workers
+            with profiled_thread():
+                await self.app(scope, receive, send_with_profile_id)
+        finally:
+            sampler.stop()
+            current_profile.reset(context_token)
+            profile.duration = time.perf_counter() - started
+            self.store.add(profile)
+
+
+def _header(scope: Scope, name: str) -> Optional[bytes]:
+    name = name.lower().encode()
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
@@ -0,0 +1,171 @@
+import marshal
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from service.cache import LRUCache
+
+# cProfile's key for a function: (filename, first line, name)
+Function = Tuple[str, int, str]
+Stack = Tuple[Function, ...]
+
+SERVICE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INTERVAL_SECONDS = 0.002
+DEFAULT_MAX_PROFILES = 100
+
+
+class Profile:
+    """Stack samples taken while one request was handled."""
+
+    def __init__(self, request_id: str, method: str, path: str):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.status_code: Optional[int] = None
+        self.created_at = datetime.now(timezone.utc)
+        self.duration = 0.0
+        # stack, root first -> (samples, seconds)
+        self.stacks: Dict[Stack, List[float]] = {}
+        # the threads running the request's code right now
+        self.thread_ids: Set[int] = set()
+
+    @property
+    def samples(self) -> int:
+        return sum(int(count) for count, _ in self.stacks.values())
+
+    def add_sample(self, stack: Stack, seconds: float):
+        entry = self.stacks.setdefault(stack, [0, 0.0])
+        entry[0] += 1
+        entry[1] += seconds
+
+    def collapsed(self) -> str:
+        """One ``root;...;leaf count`` line per stack, the input of
+        flamegraph.pl, speedscope and most flame graph viewers."""
+        return "".join(f"{';'.join(_label(function) for function in stack)} "
+                       f"{int(count)}\n"
+                       for stack, (count, _) in sorted(self.stacks.items()))
+
+    def pstats(self) -> bytes:
+        """The samples as a marshalled pstats table, readable by
+        ``pstats.Stats`` and snakeviz.
+
+        Times are the sampled wall-clock times; call counts are the number of
+        samples a function was on the stack, not the calls made.
+        """
+        stats: Dict[Function, list] = {}
+        for stack, (count, seconds) in self.stacks.items():
+            for function in set(stack):
+                entry = stats.setdefault(function, [0, 0, 0.0, 0.0, {}])
+                entry[0] += count
+                entry[1] += count
+                entry[3] += seconds
+            stats[stack[-1]][2] += seconds
+            for caller, callee in set(zip(stack, stack[1:])):
+                callers = stats[callee][4]
+                ncalls, primitive, own, cumulative = callers.get(caller,
+                                                                 (0, 0, 0.0, 0.0))
+                callers[caller] = (ncalls + count, primitive + count,
+                                   own + (seconds if callee == stack[-1] else 0.0),
+                                   cumulative + seconds)
+        return marshal.dumps({function: tuple(entry)
+                              for function, entry in stats.items()})
+
+
+class StackSampler:
+    """Samples the stacks of the threads running a request into its Profile.
+
+    cProfile only sees the thread it is enabled in, and the sync endpoints run
+    in the threadpool, so a request is profiled from a background thread that
+    samples the threads in ``profile.thread_ids`` (see ``profiled_thread``).
+    Samples with no frame under ``root`` (the event loop waiting) are skipped.
+    The event loop thread is shared, so the async code of requests handled
+    concurrently with the profiled one may still show up.
+    """
+
+    def __init__(self, profile: Profile, interval: float = DEFAULT_INTERVAL_SECONDS,
+                 root: str = SERVICE_ROOT):
+        self.profile = profile
+        self.interval = interval
+        self._prefix = os.path.join(root, "")
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler",
+                                        daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        previous = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, previous = now - previous, now
+            frames = sys._current_frames()
+            for thread_id in set(self.profile.thread_ids):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = self._stack(frame)
+                if stack is not None:
+                    self.profile.add_sample(stack, elapsed)
+
+    def _stack(self, frame) -> Optional[Stack]:
+        stack = []
+        in_service = False
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+            in_service = in_service or code.co_filename.startswith(self._prefix)
+            frame = frame.f_back
+        return tuple(reversed(stack)) if in_service else None
+
+
+# the profile of the request being handled, set by ProfilingMiddleware
+current_profile: ContextVar[Optional[Profile]] = ContextVar("current_profile",
+                                                            default=None)
+
+
+@contextmanager
+def profiled_thread() -> Iterator[None]:
+    """Have the current request's profile sample this thread in the block."""
+    profile = current_profile.get()
+    thread_id = threading.get_ident()
+    if profile is None or thread_id in profile.thread_ids:
+        yield
+        return
+    profile.thread_ids.add(thread_id)
+    try:
+        yield
+    finally:
+        profile.thread_ids.discard(thread_id)
+
+
+class ProfileStore(LRUCache):
+    """The latest profiles, keyed by request id."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_PROFILES):
+        super().__init__(max_entries)
+
+    def add(self, profile: Profile):
+        self.set(profile.request_id, profile)
+
+    def profiles(self) -> List[Profile]:
+        """Newest first."""
+        with self._lock:
+            profiles = [value for _, value in self._entries.values()]
+        return sorted(profiles, key=lambda profile: profile.created_at, reverse=True)
+
+
+def _label(function: Function) -> str:
+    filename, line, name = function
+    if filename.startswith(SERVICE_ROOT):
+        filename = os.path.relpath(filename, os.path.dirname(SERVICE_ROOT))
+    return f"{name} ({filename}:{line})"
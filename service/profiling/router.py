@@ -0,0 +1,52 @@
+import hmac
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from starlette.responses import PlainTextResponse, Response
+
+from service.dependencies import profile_store
+from service.profiling.profiler import Profile
+from service.responses import ModelResponse
+from service.schemas.profile_schema import ProfileList, ProfileSummary
+from service.settings import get_settings
+
+PROFILING_FORBIDDEN = "A valid X-Profile-Token is required"
+PROFILE_NOT_FOUND = "Profile not found"
+
+
+def require_profiling_token(x_profile_token: Optional[str] = Header(None)):
+    token = get_settings().profiling_token
+    if not token or x_profile_token is None \
+            or not hmac.compare_digest(x_profile_token.encode(), token.encode()):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail=PROFILING_FORBIDDEN)
+
+
+router = APIRouter(dependencies=[Depends(require_profiling_token)])
+
+
+@router.get("", response_model=ProfileList, include_in_schema=False)
+def list_profiles():
+    return ModelResponse(ProfileList(profiles=[
+        _summary(profile) for profile in profile_store.profiles()]))
+
+
+@router.get("/{request_id}", include_in_schema=False)
+def get_profile(request_id: str, format: Literal["collapsed", "pstats"] = "collapsed"):
+    profile = profile_store.peek(request_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=PROFILE_NOT_FOUND)
+    if format == "pstats":
+        return Response(profile.pstats(), media_type="application/octet-stream",
+                        headers={"Content-Disposition":
+                                 f'attachment; filename="{request_id}.pstats"'})
+    return PlainTextResponse(profile.collapsed())
+
+
+def _summary(profile: Profile) -> ProfileSummary:
+    return ProfileSummary(request_id=profile.request_id, method=profile.method,
+                          path=profile.path, status_code=profile.status_code,
+                          created_at=profile.created_at,
+                          duration_ms=round(profile.duration * 1000, 3),
+                          samples=profile.samples)
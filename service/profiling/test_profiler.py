@@ -0,0 +1,96 @@
+import marshal
+import pstats
+import threading
+import time
+
+from hamcrest import assert_that, equal_to, has_item, contains_string, greater_than
+
+from service.profiling.profiler import Profile, ProfileStore, StackSampler, \
+    current_profile, profiled_thread
+
+ROOT = ("/srv/app.py", 1, "handle")
+QUERY = ("/srv/db.py", 10, "query")
+RENDER = ("/srv/json.py", 20, "render")
+
+
+def profile_with_samples() -> Profile:
+    profile = Profile("request-1", "GET", "/api/ratings")
+    for _ in range(3):
+        profile.add_sample((ROOT, QUERY), 0.01)
+    profile.add_sample((ROOT, RENDER), 0.01)
+    return profile
+
+
+def test_collapsed_stacks_count_samples_per_stack():
+    collapsed = profile_with_samples().collapsed()
+
+    assert_that(collapsed, equal_to(
+        "handle (/srv/app.py:1);query (/srv/db.py:10) 3\n"
+        "handle (/srv/app.py:1);render (/srv/json.py:20) 1\n"))
+
+
+def test_pstats_are_readable_by_pstats(tmp_path):
+    path = tmp_path / "request-1.pstats"
+    path.write_bytes(profile_with_samples().pstats())
+
+    stats = pstats.Stats(str(path)).stats
+    calls, primitive, own, cumulative, callers = stats[ROOT]
+    assert_that((calls, round(own, 6), round(cumulative, 6)), equal_to((4, 0, 0.04)))
+    calls, primitive, own, cumulative, callers = stats[QUERY]
+    assert_that((calls, round(own, 6), round(cumulative, 6)),
+                equal_to((3, 0.03, 0.03)))
+    assert_that(list(callers), equal_to([ROOT]))
+
+
+def test_recursive_functions_are_counted_once_per_sample():
+    profile = Profile("request-1", "GET", "/")
+    profile.add_sample((ROOT, QUERY, QUERY), 0.01)
+
+    stats = marshal.loads(profile.pstats())
+
+    assert_that(stats[QUERY][:4], equal_to((1, 1, 0.01, 0.01)))
+
+
+def busy_wait(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(100))
+
+
+def profiled_busy_wait(profile: Profile, stop: threading.Event):
+    current_profile.set(profile)
+    with profiled_thread():
+        busy_wait(stop)
+
+
+def test_sampler_records_the_threads_of_the_profile():
+    profile = Profile("request-1", "GET", "/")
+    stop = threading.Event()
+    worker = threading.Thread(target=profiled_busy_wait, args=(profile, stop))
+    other = threading.Thread(target=busy_wait, args=(stop,))
+    worker.start()
+    other.start()
+    sampler = StackSampler(profile, interval=0.001)
+    sampler.start()
+    time.sleep(0.05)
+    sampler.stop()
+    stop.set()
+    worker.join()
+    other.join()
+
+    assert_that(profile.samples, greater_than(0))
+    assert_that([stack[-1][2] for stack in profile.stacks], has_item("busy_wait"))
+    assert_that(all(("profiled_busy_wait" in {name for _, _, name in stack})
+                    for stack in profile.stacks), equal_to(True))
+    assert_that(profile.thread_ids, equal_to(set()))
+    assert_that(profile.collapsed(),
+                contains_string("busy_wait (service/profiling/test_profiler.py:"))
+
+
+def test_store_keeps_the_latest_profiles_newest_first():
+    store = ProfileStore(max_entries=2)
+    for request_id in ("first", "second", "third"):
+        store.add(Profile(request_id, "GET", "/"))
+
+    assert_that([profile.request_id for profile in store.profiles()],
+                equal_to(["third", "second"]))
+    assert_that(store.peek("first"), equal_to(None))
@@ -0,0 +1,119 @@
+import pstats
+import threading
+import time
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from fastapi.testclient import TestClient
+from hamcrest import assert_that, equal_to, contains_string, is_not, has_key, \
+    has_item
+
+from service.dependencies import profile_store
+from service.profiling import router as profiling_router
+from service.profiling.middleware import ProfilingMiddleware, PROFILE_ID_HEADER, \
+    PROFILE_TOKEN_HEADER, REQUEST_ID_HEADER
+from service.profiling.route import ProfiledRoute
+from service.settings import get_settings
+
+TOKEN = "let-me-profile"
+
+
+def slow_endpoint():
+    started = time.perf_counter()
+    while time.perf_counter() - started < 0.03:
+        pass
+    return {}
+
+
+def busy_elsewhere(stop: threading.Event):
+    while not stop.is_set():
+        sum(range(100))
+
+
+def build_app(**options) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(ProfilingMiddleware, store=profile_store, interval=0.001,
+                       **options)
+    router = APIRouter(route_class=ProfiledRoute)
+    router.get("/slow")(slow_endpoint)
+    app.include_router(router)
+    return app
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(get_settings(), "profiling_token", TOKEN)
+    app = build_app(token=TOKEN)
+    app.include_router(profiling_router.router, prefix="/admin/profiles")
+    yield TestClient(app)
+    profile_store.clear()
+
+
+def test_requests_without_the_token_are_not_profiled(client):
+    response = client.get("/slow", headers={PROFILE_TOKEN_HEADER: "wrong"})
+
+    assert_that(response.headers, is_not(has_key(PROFILE_ID_HEADER.lower())))
+    assert_that(profile_store.profiles(), equal_to([]))
+
+
+def test_profiled_request_is_retrievable_by_request_id(client, tmp_path):
+    response = client.get("/slow?size=large", headers={PROFILE_TOKEN_HEADER: TOKEN,
+                                                       REQUEST_ID_HEADER: "slow-1"})
+    assert_that(response.status_code, equal_to(200))
+    assert_that(response.headers[PROFILE_ID_HEADER], equal_to("slow-1"))
+
+    listing = client.get("/admin/profiles", headers={PROFILE_TOKEN_HEADER: TOKEN})
+    summary, = listing.json()["profiles"]
+    assert_that((summary["request_id"], summary["path"], summary["status_code"]),
+                equal_to(("slow-1", "/slow?size=large", 200)))
+
+    collapsed = client.get("/admin/profiles/slow-1",
+                           headers={PROFILE_TOKEN_HEADER: TOKEN})
+    assert_that(collapsed.headers["content-type"], contains_string("text/plain"))
+    assert_that(collapsed.text, contains_string("slow_endpoint (service/profiling/"))
+
+    binary = client.get("/admin/profiles/slow-1", params={"format": "pstats"},
+                        headers={PROFILE_TOKEN_HEADER: TOKEN})
+    path = tmp_path / "slow-1.pstats"
+    path.write_bytes(binary.content)
+    assert_that([name for _, _, name in pstats.Stats(str(path)).stats],
+                has_item("slow_endpoint"))
+
+
+def test_only_the_threads_running_the_request_are_sampled(client):
+    stop = threading.Event()
+    other = threading.Thread(target=busy_elsewhere, args=(stop,))
+    other.start()
+    try:
+        response = client.get("/slow", headers={PROFILE_TOKEN_HEADER: TOKEN})
+    finally:
+        stop.set()
+        other.join()
+
+    profile = profile_store.peek(response.headers[PROFILE_ID_HEADER])
+    leaves = [stack[-1][2] for stack in profile.stacks]
+    assert_that(leaves, has_item("slow_endpoint"))
+    assert_that(leaves, is_not(has_item("busy_elsewhere")))
+    assert_that(profile.thread_ids, equal_to(set()))
+
+
+def test_invalid_request_ids_are_replaced(client):
+    response = client.get("/slow", headers={PROFILE_TOKEN_HEADER: TOKEN,
+                                            REQUEST_ID_HEADER: "../../etc"})
+
+    assert_that(len(response.headers[PROFILE_ID_HEADER]), equal_to(32))
+
+
+def test_admin_endpoints_need_the_token(client):
+    assert_that(client.get("/admin/profiles").status_code, equal_to(403))
+    assert_that(client.get("/admin/profiles/missing", headers={
+        PROFILE_TOKEN_HEADER: TOKEN}).status_code, equal_to(404))
+
+
+def test_sample_rate_profiles_requests_without_the_token():
+    try:
+        response = TestClient(build_app(sample_rate=1.0)).get("/slow")
+        assert_that(profile_store.peek(response.headers[PROFILE_ID_HEADER]),
+                    is_not(None))
+    finally:
+        profile_store.clear()
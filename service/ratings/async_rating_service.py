@@ -0,0 +1,55 @@
+from datetime import datetime
+from typing import Awaitable, Callable, Optional, Tuple
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from service.ratings.rating_cache import RatingCache
+from service.ratings.rating_service import build_rating
+from service.schemas.rating_schema import RatingResponse
+from service.statements.async_statement_service import AsyncStatementService
+
+
+class AsyncRatingService:
+    def __init__(self, db: AsyncSession, statement_service: AsyncStatementService,
+                 cache: Optional[RatingCache] = None):
+        self.db = db
+        self.statement_service = statement_service
+        self.cache = cache
+
+    async def calculate_ie_rating(self, report_id: int, user_id: int) \
+            -> RatingResponse:
+        return await self._cached(user_id, ("report", report_id),
+                                  lambda: self._ie_rating(report_id, user_id))
+
+    async def calculate_period_rating(self, user_id: int,
+                                      start_date: Optional[datetime],
+                                      end_date: Optional[datetime]) \
+            -> RatingResponse:
+        return await self._cached(
+            user_id, ("period", start_date, end_date),
+            lambda: self._period_rating(user_id, start_date, end_date))
+
+    async def _cached(self, user_id: int, query: Tuple,
+                      calculate: Callable[[], Awaitable[RatingResponse]]) \
+            -> RatingResponse:
+        if self.cache is None:
+            return await calculate()
+
+        rating = self.cache.get_rating(user_id, query)
+        if rating is None:
+            write_token = self.cache.write_token(user_id)
+            rating = await calculate()
+            self.cache.set_rating(user_id, query, rating, write_token)
+        return rating
+
+    async def _ie_rating(self, report_id: int, user_id: int) -> RatingResponse:
+        total_income, total_expenditure = \
+            await self.statement_service.get_statement_totals(report_id, user_id)
+        return build_rating(total_income, total_expenditure)
+
+    async def _period_rating(self, user_id: int, start_date: Optional[datetime],
+                             end_date: Optional[datetime]) -> RatingResponse:
+        total_income, total_expenditure = \
+            await self.statement_service.get_period_totals(user_id, start_date,
+                                                           end_date)
+        return build_rating(total_income, total_expenditure)
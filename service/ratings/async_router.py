@@ -0,0 +1,41 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from service.dependencies import get_async_rating_service
+from service.profiling.route import ProfiledRoute
+from service.ratings.async_rating_service import AsyncRatingService
+from service.ratings.router import parse_iso_date
+from service.responses import ModelResponse
+from service.schemas.rating_schema import RatingResponse
+from service.statements.statement_service import UserNotFoundError, \
+    StatementNotFoundError, USER_NOT_FOUND, STATEMENT_NOT_FOUND
+
+router = APIRouter(route_class=ProfiledRoute)
+
+
+@router.get("", response_model=RatingResponse, status_code=status.HTTP_200_OK)
+async def calculate_rating(
+    report_id: Optional[int] = None,
+    user_id: int = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    rating_service: AsyncRatingService = Depends(get_async_rating_service)
+):
+    try:
+        if report_id:
+            result = await rating_service.calculate_ie_rating(report_id, user_id)
+        else:
+            parsed_start_date = parse_iso_date(start_date)
+            parsed_end_date = parse_iso_date(end_date)
+            result = await rating_service.calculate_period_rating(
+                user_id, parsed_start_date, parsed_end_date)
+        return ModelResponse(result)
+    except UserNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=USER_NOT_FOUND)
+    except StatementNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=STATEMENT_NOT_FOUND)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
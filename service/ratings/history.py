@@ -0,0 +1,101 @@
+from datetime import date, timedelta
+from typing import Iterable, List, Literal, Sequence, Tuple
+
+Interval = Literal["day", "week", "month"]
+# (day, statements, total income, total expenditure), ordered by day
+DailyTotals = Tuple[date, int, float, float]
+Period = Tuple[date, date]
+PeriodTotals = Tuple[int, float, float]
+
+ONE_DAY = timedelta(days=1)
+START_AFTER_END = "start_date must not be after end_date"
+
+
+def history_periods(start: date, end: date, interval: Interval) -> List[Period]:
+    """Calendar days, ISO weeks or months from ``start`` to ``end`` inclusive,
+    the first and last clipped to the range."""
+    if start > end:
+        raise ValueError(START_AFTER_END)
+
+    periods = []
+    period_start = start
+    while period_start <= end:
+        period_end = min(_interval_end(period_start, interval), end)
+        periods.append((period_start, period_end))
+        period_start = period_end + ONE_DAY
+    return periods
+
+
+def count_periods(start: date, end: date, interval: Interval) -> int:
+    """len(history_periods(...)) without building them."""
+    if start > end:
+        raise ValueError(START_AFTER_END)
+    if interval == "day":
+        return (end - start).days + 1
+    if interval == "week":
+        return (_week_start(end) - _week_start(start)).days // 7 + 1
+    return (end.year - start.year) * 12 + end.month - start.month + 1
+
+
+def totals_by_period(daily: Sequence[DailyTotals],
+                     periods: Sequence[Period]) -> List[PeriodTotals]:
+    """Totals of the days falling in each period, in one pass over both."""
+    totals = []
+    position = 0
+    for period_start, period_end in periods:
+        while position < len(daily) and daily[position][0] < period_start:
+            position += 1
+        count, income, expenditure = 0, 0.0, 0.0
+        while position < len(daily) and daily[position][0] <= period_end:
+            _, day_count, day_income, day_expenditure = daily[position]
+            count += day_count
+            income += day_income
+            expenditure += day_expenditure
+            position += 1
+        totals.append((count, income, expenditure))
+    return totals
+
+
+def rolling_totals(daily: Sequence[DailyTotals], ends: Iterable[date],
+                   window_days: int) -> List[PeriodTotals]:
+    """Totals of the ``window_days`` days up to and including each end date.
+
+    ``ends`` must be ascending. The window slides with two pointers over the
+    days: each day is added once when the window reaches it and subtracted
+    once when it leaves.
+    """
+    totals = []
+    low = high = 0
+    count, income, expenditure = 0, 0.0, 0.0
+    for end in ends:
+        window_start = end - timedelta(days=window_days - 1)
+        while high < len(daily) and daily[high][0] <= end:
+            _, day_count, day_income, day_expenditure = daily[high]
+            count += day_count
+            income += day_income
+            expenditure += day_expenditure
+            high += 1
+        while low < high and daily[low][0] < window_start:
+            _, day_count, day_income, day_expenditure = daily[low]
+            count -= day_count
+            income -= day_income
+            expenditure -= day_expenditure
+            low += 1
+        if not count:
+            # no rounding residue from the subtractions in an empty window
+            income, expenditure = 0.0, 0.0
+        totals.append((count, income, expenditure))
+    return totals
+
+
+def _interval_end(day: date, interval: Interval) -> date:
+    if interval == "day":
+        return day
+    if interval == "week":
+        return _week_start(day) + timedelta(days=6)
+    next_month = date(day.year + day.month // 12, day.month % 12 + 1, 1)
+    return next_month - ONE_DAY
+
+
+def _week_start(day: date) -> date:
+    return day - timedelta(days=day.weekday())
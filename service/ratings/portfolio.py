@@ -0,0 +1,149 @@
+"""Month-end scoring of the whole book in one pass.
+
+Per-user totals are loaded with a single grouped query into NumPy arrays and
+rated with vectorised operations, following the same rules as
+``RatingService.calculate_period_rating``; the results are written to the
+``portfolio_rating`` table in bulk.
+"""
+import argparse
+import logging
+from datetime import datetime, timezone
+from typing import Dict, NamedTuple, Optional
+
+import numpy as np
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+
+from service.models import StatementDB, PortfolioRatingDB
+from service.ratings.rating_service import GRADE_THRESHOLDS, LOWEST_GRADE
+from service.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+class PortfolioTotals(NamedTuple):
+    user_ids: np.ndarray
+    total_income: np.ndarray
+    total_expenditure: np.ndarray
+
+
+class PortfolioScores(NamedTuple):
+    user_ids: np.ndarray
+    total_income: np.ndarray
+    total_expenditure: np.ndarray
+    disposable_income: np.ndarray
+    ratio: np.ndarray
+    grade: np.ndarray
+
+
+class PortfolioRun(NamedTuple):
+    run_at: datetime
+    rated: int
+    grades: Dict[str, int]
+
+
+class PortfolioRatingService:
+    def __init__(self, db: Session):
+        self.db = db
+
+    def rate_portfolio(self, start_date: Optional[datetime] = None,
+                       end_date: Optional[datetime] = None,
+                       run_at: Optional[datetime] = None) -> PortfolioRun:
+        """Rate every user with statements in the period and store the results."""
+        run_at = run_at or datetime.now(timezone.utc)
+        scores = score_portfolio(self.load_totals(start_date, end_date))
+        self.write_scores(scores, run_at, start_date, end_date)
+
+        grades, counts = np.unique(scores.grade, return_counts=True)
+        return PortfolioRun(run_at=run_at, rated=len(scores.user_ids),
+                            grades=dict(zip(grades.tolist(), counts.tolist())))
+
+    def load_totals(self, start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None) -> PortfolioTotals:
+        """Period totals of every user with at least one statement in it."""
+        query = select(
+            StatementDB.user_id,
+            func.sum(StatementDB.total_income),
+            func.sum(StatementDB.total_expenditure)
+        ).group_by(StatementDB.user_id).order_by(StatementDB.user_id)
+        if start_date:
+            query = query.where(StatementDB.report_date >= start_date)
+        if end_date:
+            query = query.where(StatementDB.report_date <= end_date)
+
+        rows = self.db.execute(query).all()
+        if not rows:
+            return PortfolioTotals(np.empty(0, dtype=np.int64),
+                                   np.empty(0), np.empty(0))
+
+        user_ids, total_income, total_expenditure = zip(*rows)
+        return PortfolioTotals(np.array(user_ids, dtype=np.int64),
+                               np.array(total_income, dtype=np.float64),
+                               np.array(total_expenditure, dtype=np.float64))
+
+    def write_scores(self, scores: PortfolioScores, run_at: datetime,
+                     start_date: Optional[datetime] = None,
+                     end_date: Optional[datetime] = None,
+                     chunk_size: Optional[int] = None):
+        chunk_size = chunk_size or get_settings().portfolio_write_chunk_size
+        columns = (scores.user_ids.tolist(), scores.total_income.tolist(),
+                   scores.total_expenditure.tolist(),
+                   scores.disposable_income.tolist(), scores.ratio.tolist(),
+                   scores.grade.tolist())
+        rows = [{
+            "run_at": run_at,
+            "period_start": start_date,
+            "period_end": end_date,
+            "user_id": user_id,
+            "total_income": total_income,
+            "total_expenditure": total_expenditure,
+            "disposable_income": disposable_income,
+            "ratio": ratio,
+            "grade": grade
+        } for user_id, total_income, total_expenditure, disposable_income, ratio,
+            grade in zip(*columns)]
+
+        for chunk_start in range(0, len(rows), chunk_size):
+            self.db.execute(insert(PortfolioRatingDB),
+                            rows[chunk_start:chunk_start + chunk_size])
+        self.db.commit()
+
+
+def score_portfolio(totals: PortfolioTotals) -> PortfolioScores:
+    total_income, total_expenditure = totals.total_income, totals.total_expenditure
+    ratio = np.divide(total_expenditure, total_income,
+                      out=np.ones_like(total_expenditure), where=total_income > 0)
+    return PortfolioScores(
+        user_ids=totals.user_ids,
+        total_income=total_income,
+        total_expenditure=total_expenditure,
+        disposable_income=total_income - total_expenditure,
+        ratio=ratio,
+        grade=calculate_grades(ratio)
+    )
+
+
+def calculate_grades(ratio: np.ndarray) -> np.ndarray:
+    """Vectorised ``calculate_grade``."""
+    return np.select([ratio <= threshold for threshold, _ in GRADE_THRESHOLDS],
+                     [grade for _, grade in GRADE_THRESHOLDS],
+                     default=LOWEST_GRADE)
+
+
+def main():
+    from service.db import SessionLocal
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--start", type=datetime.fromisoformat, default=None)
+    parser.add_argument("--end", type=datetime.fromisoformat, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    with SessionLocal() as db:
+        run = PortfolioRatingService(db).rate_portfolio(args.start, args.end)
+    logger.info(f"Rated {run.rated} users at {run.run_at.isoformat()}: "
+                f"{run.grades}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from service.cache import LRUCache, WriteLog
+from service.models import StatementDB
+from service.statements.statement_service import naive
+
+DEFAULT_MAX_USERS = 10_000
+DEFAULT_TTL_SECONDS = 300.0
+
+StatementTotals = Tuple[datetime, float, float]
+
+
+class PrefixSumIndex:
+    """Running income/expenditure sums of one user's statements by report_date.
+
+    Entry ``i`` of the cumulative lists holds the totals of the first ``i``
+    statements, so any period is two binary searches and a subtraction.
+    """
+
+    def __init__(self, statements: Iterable[StatementTotals] = ()):
+        self.report_dates: List[datetime] = []
+        self.cumulative_income: List[float] = [0.0]
+        self.cumulative_expenditure: List[float] = [0.0]
+        for report_date, total_income, total_expenditure in statements:
+            if not self.add(report_date, total_income, total_expenditure):
+                raise ValueError("Statements must be ordered by report_date")
+
+    def __len__(self):
+        return len(self.report_dates)
+
+    def add(self, report_date: datetime, total_income: float,
+            total_expenditure: float) -> bool:
+        report_date = naive(report_date)
+        if self.report_dates and report_date < self.report_dates[-1]:
+            return False
+
+        self.report_dates.append(report_date)
+        self.cumulative_income.append(self.cumulative_income[-1] + total_income)
+        self.cumulative_expenditure.append(
+            self.cumulative_expenditure[-1] + total_expenditure)
+        return True
+
+    def period_totals(self, start_date: Optional[datetime],
+                      end_date: Optional[datetime]) -> Tuple[int, float, float]:
+        low = bisect_left(self.report_dates, naive(start_date)) \
+            if start_date else 0
+        high = bisect_right(self.report_dates, naive(end_date)) \
+            if end_date else len(self.report_dates)
+        if high <= low:
+            return 0, 0.0, 0.0
+
+        return (high - low,
+                self.cumulative_income[high] - self.cumulative_income[low],
+                self.cumulative_expenditure[high] - self.cumulative_expenditure[low])
+
+
+class PrefixIndexRegistry:
+    """Process-wide, bounded set of per-user prefix-sum indexes.
+
+    Indexes are kept current by the statements created in this process; the
+    TTL bounds how long writes made by other processes can go unseen.
+    """
+
+    def __init__(self, max_users: int = DEFAULT_MAX_USERS,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        self._indexes = LRUCache(max_users, ttl_seconds)
+        self._lock = threading.Lock()
+        # statements created per user, so a load only races its own user's writes
+        self._writes = WriteLog(max_users)
+
+    def period_totals(self, user_id: int, start_date: Optional[datetime],
+                      end_date: Optional[datetime],
+                      loader: Callable[[int], Iterable[StatementTotals]]) \
+            -> Tuple[int, float, float]:
+        with self._lock:
+            index = self._indexes.get(user_id)
+            if index is not None:
+                return index.period_totals(start_date, end_date)
+            writes = self._writes.token()
+
+        index = PrefixSumIndex(loader(user_id))
+        with self._lock:
+            # a statement committed while loading may be missing from the rows
+            if self._writes.unchanged_since(user_id, writes):
+                self._indexes.set(user_id, index)
+        return index.period_totals(start_date, end_date)
+
+    def statement_created(self, statement: StatementDB):
+        with self._lock:
+            self._writes.record(statement.user_id)
+            index = self._indexes.peek(statement.user_id)
+            if index is not None and not index.add(statement.report_date,
+                                                   statement.total_income,
+                                                   statement.total_expenditure):
+                self._indexes.pop(statement.user_id)
+
+    def invalidate(self, user_id: Optional[int] = None):
+        with self._lock:
+            if user_id is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(user_id)
+
+    def stats(self):
+        return self._indexes.stats()
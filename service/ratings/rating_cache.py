@@ -0,0 +1,59 @@
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+from service.cache import LRUCache, WriteLog
+from service.models import StatementDB
+from service.schemas.rating_schema import RatingResponse
+
+DEFAULT_MAX_ENTRIES = 10_000
+DEFAULT_TTL_SECONDS = 60.0
+
+
+class RatingCache(LRUCache):
+    """RatingResponse cache keyed on the user and the query parameters.
+
+    All of a user's entries are dropped when a statement is created for
+    them; the TTL bounds staleness from writes made by other processes.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        super().__init__(max_entries, ttl_seconds)
+        self._keys_by_user: Dict[int, Set[Tuple]] = {}
+        # statements created per user, so a rating only races its own user's writes
+        self._writes = WriteLog(max_entries)
+
+    def get_rating(self, user_id: int, query: Tuple) -> Optional[RatingResponse]:
+        return self.get((user_id, *query))
+
+    def write_token(self, user_id: int) -> int:
+        """Taken before computing a rating of the user and handed back to
+        set_rating."""
+        with self._lock:
+            return self._writes.token()
+
+    def set_rating(self, user_id: int, query: Tuple, rating: RatingResponse,
+                   write_token: int):
+        with self._lock:
+            # a statement committed while computing may be missing from rating
+            if self._writes.unchanged_since(user_id, write_token):
+                self.set((user_id, *query), rating)
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            self._writes.record(user_id)
+            for key in list(self._keys_by_user.get(user_id, ())):
+                self.pop(key)
+
+    def statement_created(self, statement: StatementDB):
+        self.invalidate_user(statement.user_id)
+
+    def _added(self, key: Hashable):
+        self._keys_by_user.setdefault(key[0], set()).add(key)
+
+    def _remove(self, key: Hashable):
+        super()._remove(key)
+        keys = self._keys_by_user.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[key[0]]
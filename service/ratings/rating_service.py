@@ -1,27 +1,146 @@
-from datetime import datetime
-from typing import Optional, List
+from datetime import date, datetime, timedelta
+from typing import Optional, List, Tuple, Callable
 
 from sqlalchemy.orm import Session
 
 from service.models import StatementDB
-from service.schemas.rating_schema import RatingResponse
-from service.statements.statement_service import StatementService
+from service.ratings.history import Interval, history_periods, totals_by_period, \
+    rolling_totals
+from service.ratings.prefix_index import PrefixIndexRegistry, PrefixSumIndex
+from service.ratings.rating_cache import RatingCache
+from service.schemas.rating_schema import RatingResponse, RatingBatchItem, \
+    RatingBatchResult, RatingHistoryPoint, RatingHistoryResponse
+from service.statements.statement_service import StatementService, \
+    StatementNotFoundError, UserNotFoundError, NO_STATEMENTS_IN_PERIOD
 
 
 class RatingService:
-    def __init__(self, db: Session, statement_service: StatementService):
+    def __init__(self, db: Session, statement_service: StatementService,
+                 prefix_index: Optional[PrefixIndexRegistry] = None,
+                 cache: Optional[RatingCache] = None):
         self.db = db
         self.statement_service = statement_service
+        self.prefix_index = prefix_index
+        self.cache = cache
 
     def calculate_ie_rating(self, report_id: int, user_id: int) -> RatingResponse:
-        statement = self.statement_service.get_statement(report_id, user_id)
-        return self._calculate_rating_from_statements([statement])
+        return self._cached(user_id, ("report", report_id),
+                            lambda: self._ie_rating(report_id, user_id))
 
     def calculate_period_rating(self, user_id: int, start_date: Optional[datetime],
                                 end_date: Optional[datetime]) -> RatingResponse:
-        statements = self.statement_service.get_statements_in_period(
-            user_id, start_date, end_date)
-        return self._calculate_rating_from_statements(statements)
+        return self._cached(
+            user_id, ("period", start_date, end_date),
+            lambda: self._period_rating(user_id, start_date, end_date))
+
+    def _cached(self, user_id: int, query: Tuple,
+                calculate: Callable[[], RatingResponse]) -> RatingResponse:
+        if self.cache is None:
+            return calculate()
+
+        rating = self.cache.get_rating(user_id, query)
+        if rating is None:
+            write_token = self.cache.write_token(user_id)
+            rating = calculate()
+            self.cache.set_rating(user_id, query, rating, write_token)
+        return rating
+
+    def _ie_rating(self, report_id: int, user_id: int) -> RatingResponse:
+        total_income, total_expenditure = self.statement_service.get_statement_totals(
+            report_id, user_id)
+        return build_rating(total_income, total_expenditure)
+
+    def _period_rating(self, user_id: int, start_date: Optional[datetime],
+                       end_date: Optional[datetime]) -> RatingResponse:
+        if self.prefix_index is None:
+            total_income, total_expenditure = \
+                self.statement_service.get_period_totals(user_id, start_date,
+                                                         end_date)
+        else:
+            total_income, total_expenditure = self._indexed_period_totals(
+                user_id, start_date, end_date)
+        return build_rating(total_income, total_expenditure)
+
+    def calculate_batch_ratings(self, items: List[RatingBatchItem]) \
+            -> List[RatingBatchResult]:
+        existing_users = self.statement_service.user_service.get_existing_user_ids(
+            item.user_id for item in items)
+        report_items = [item for item in items
+                        if item.report_id and item.user_id in existing_users]
+        period_items = [item for item in items
+                        if not item.report_id and item.user_id in existing_users]
+
+        statements = self.statement_service.get_totals_for_statements(
+            item.report_id for item in report_items) if report_items else {}
+        indexes = {user_id: PrefixSumIndex(totals) for user_id, totals in
+                   self.statement_service.get_totals_by_date_for_users(
+                       item.user_id for item in period_items).items()} \
+            if period_items else {}
+
+        results = []
+        for index, item in enumerate(items):
+            try:
+                if item.user_id not in existing_users:
+                    raise UserNotFoundError()
+                if item.report_id:
+                    user_id, total_income, total_expenditure = statements.get(
+                        item.report_id, (None, 0.0, 0.0))
+                    if user_id != item.user_id:
+                        raise StatementNotFoundError()
+                else:
+                    count, total_income, total_expenditure = indexes.get(
+                        item.user_id, PrefixSumIndex()).period_totals(
+                        item.start_date, item.end_date)
+                    if not count:
+                        raise StatementNotFoundError(NO_STATEMENTS_IN_PERIOD)
+            except (UserNotFoundError, StatementNotFoundError) as e:
+                results.append(RatingBatchResult(index=index, error=str(e)))
+                continue
+
+            results.append(RatingBatchResult(
+                index=index, rating=build_rating(total_income, total_expenditure)))
+
+        return results
+
+    def calculate_rating_history(self, user_id: int, start: date, end: date,
+                                 interval: Interval = "month",
+                                 window_days: Optional[int] = None) \
+            -> RatingHistoryResponse:
+        """A rating per day, week or month from ``start`` to ``end``; with
+        ``window_days``, each point rates the trailing window ending on the
+        last day of its period instead.
+
+        The statements are read as one row per day and walked once.
+        """
+        periods = history_periods(start, end, interval)
+        if window_days:
+            daily = self.statement_service.get_daily_totals(
+                user_id, start - timedelta(days=window_days - 1), end)
+            totals = rolling_totals(daily, (period_end for _, period_end in periods),
+                                    window_days)
+            periods = [(period_end - timedelta(days=window_days - 1), period_end)
+                       for _, period_end in periods]
+        else:
+            daily = self.statement_service.get_daily_totals(user_id, start, end)
+            totals = totals_by_period(daily, periods)
+
+        return RatingHistoryResponse(
+            user_id=user_id, interval=interval, window_days=window_days,
+            points=[RatingHistoryPoint(
+                period_start=period_start, period_end=period_end,
+                statement_count=count,
+                rating=build_rating(income, expenditure) if count else None)
+                for (period_start, period_end), (count, income, expenditure)
+                in zip(periods, totals)])
+
+    def _indexed_period_totals(self, user_id: int, start_date: Optional[datetime],
+                               end_date: Optional[datetime]) -> Tuple[float, float]:
+        count, total_income, total_expenditure = self.prefix_index.period_totals(
+            user_id, start_date, end_date,
+            self.statement_service.get_statement_totals_by_date)
+        if not count:
+            raise StatementNotFoundError(NO_STATEMENTS_IN_PERIOD)
+        return total_income, total_expenditure
 
     def _calculate_rating_from_statements(self, statements: List[StatementDB])\
             -> RatingResponse:
@@ -34,19 +153,7 @@ class RatingService:
 
         total_income = sum(income.amount for income in incomes)
         total_expenditure = sum(exp.amount for exp in expenditures)
-        disposable_income = self.calculate_disposable_income(total_expenditure,
-                                                             total_income)
-
-        ratio = total_expenditure / total_income if total_income > 0 else 1.0
-        grade = calculate_grade(ratio)
-
-        return RatingResponse(
-            total_income=total_income,
-            total_expenditure=total_expenditure,
-            disposable_income=disposable_income,
-            ratio=ratio,
-            grade=grade
-        )
+        return build_rating(total_income, total_expenditure)
 
     @staticmethod
     def calculate_disposable_income(total_expenditure, total_income):
@@ -54,12 +161,29 @@ class RatingService:
         return disposable_income
 
 
+def build_rating(total_income: float, total_expenditure: float) -> RatingResponse:
+    disposable_income = RatingService.calculate_disposable_income(total_expenditure,
+                                                                  total_income)
+
+    ratio = total_expenditure / total_income if total_income > 0 else 1.0
+    grade = calculate_grade(ratio)
+
+    return RatingResponse(
+        total_income=total_income,
+        total_expenditure=total_expenditure,
+        disposable_income=disposable_income,
+        ratio=ratio,
+        grade=grade
+    )
+
+
+# (highest ratio, grade) in ascending order, shared with the portfolio scoring
+GRADE_THRESHOLDS = ((0.1, "A"), (0.3, "B"), (0.5, "C"))
+LOWEST_GRADE = "D"
+
+
 def calculate_grade(ratio: float) -> str:
-    if ratio <= 0.1:
-        return "A"
-    elif ratio <= 0.3:
-        return "B"
-    elif ratio <= 0.5:
-        return "C"
-    else:
-        return "D"
+    for threshold, grade in GRADE_THRESHOLDS:
+        if ratio <= threshold:
+            return grade
+    return LOWEST_GRADE
@@ -1,15 +1,20 @@
-from datetime import datetime
-from typing import Optional
+from datetime import date, datetime
+from typing import Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from service.dependencies import get_rating_service
+from service.profiling.route import ProfiledRoute
+from service.ratings.history import Interval, count_periods
 from service.ratings.rating_service import RatingService
-from service.schemas.rating_schema import RatingResponse
+from service.responses import ModelResponse
+from service.schemas.rating_schema import RatingResponse, RatingBatchItem, \
+    RatingBatchResponse, RatingHistoryResponse
+from service.settings import get_settings
 from service.statements.statement_service import UserNotFoundError, \
     StatementNotFoundError, USER_NOT_FOUND, STATEMENT_NOT_FOUND
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 
 @router.get("", response_model=RatingResponse, status_code=status.HTTP_200_OK)
@@ -28,7 +33,7 @@ def calculate_rating(
             parsed_end_date = parse_iso_date(end_date)
             result = rating_service.calculate_period_rating(
                 user_id, parsed_start_date, parsed_end_date)
-        return result
+        return ModelResponse(result)
     except UserNotFoundError:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail=USER_NOT_FOUND)
@@ -39,6 +44,49 @@ def calculate_rating(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@router.post("/batch", response_model=RatingBatchResponse,
+             status_code=status.HTTP_200_OK)
+def calculate_batch_ratings(
+    items: List[RatingBatchItem],
+    rating_service: RatingService = Depends(get_rating_service)
+):
+    max_items = get_settings().rating_batch_max_items
+    if len(items) > max_items:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"A batch accepts at most {max_items} items")
+
+    return ModelResponse(RatingBatchResponse(
+        results=rating_service.calculate_batch_ratings(items)))
+
+
+@router.get("/history", response_model=RatingHistoryResponse,
+            status_code=status.HTTP_200_OK)
+def calculate_rating_history(
+    user_id: int,
+    start_date: date,
+    end_date: date,
+    interval: Interval = "month",
+    window_days: Optional[int] = Query(None, ge=1),
+    rating_service: RatingService = Depends(get_rating_service)
+):
+    try:
+        max_points = get_settings().rating_history_max_points
+        if count_periods(start_date, end_date, interval) > max_points:
+            raise ValueError(f"A history returns at most {max_points} points, "
+                             f"use a longer interval or a shorter range")
+        max_window_days = get_settings().rating_history_max_window_days
+        if window_days and window_days > max_window_days:
+            raise ValueError(f"A window spans at most {max_window_days} days")
+        return ModelResponse(rating_service.calculate_rating_history(
+            user_id, start_date, end_date, interval, window_days))
+    except UserNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=USER_NOT_FOUND)
+    except (ValueError, OverflowError) as e:
+        # a window reaching back past the first representable date overflows
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+
 def parse_iso_date(date_str: Optional[str]) -> Optional[datetime]:
     if date_str:
         try:
@@ -0,0 +1,70 @@
+import pytest
+from hamcrest import assert_that, equal_to
+
+from service.models import UserDB
+from service.ratings.async_rating_service import AsyncRatingService
+from service.ratings.rating_service import RatingService
+from service.schemas.expenditure_schema import ExpenditureSchema
+from service.schemas.income_schema import IncomeSchema
+from service.schemas.statement_schema import StatementRequest
+from service.statements.async_statement_service import AsyncStatementService
+from service.statements.statement_service import StatementService, \
+    StatementNotFoundError, UserNotFoundError
+from service.users.async_user_service import AsyncUserService
+from service.users.user_service import UserService
+from service.users.utils import hash_password
+
+
+@pytest.fixture
+def user(db):
+    user = UserDB(username="test_user", password=hash_password("password"))
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture
+def rating_service(async_db):
+    statement_service = AsyncStatementService(
+        user_service=AsyncUserService(async_db), db=async_db)
+    return AsyncRatingService(db=async_db, statement_service=statement_service)
+
+
+@pytest.fixture
+def sync_rating_service(db):
+    statement_service = StatementService(user_service=UserService(db), db=db)
+    return RatingService(db=db, statement_service=statement_service)
+
+
+@pytest.mark.asyncio
+async def test_ratings_match_sync_service(rating_service, sync_rating_service, user):
+    statement = await rating_service.statement_service.create_statement(
+        StatementRequest(user_id=user.id,
+                         incomes=[IncomeSchema(category="Job", amount=10000.0)],
+                         expenditures=[ExpenditureSchema(category="Rent",
+                                                         amount=2000.0)]))
+
+    ie_rating = await rating_service.calculate_ie_rating(statement.id, user.id)
+    period_rating = await rating_service.calculate_period_rating(user.id, None,
+                                                                 None)
+
+    assert_that(ie_rating,
+                equal_to(sync_rating_service.calculate_ie_rating(statement.id,
+                                                                 user.id)))
+    assert_that(period_rating,
+                equal_to(sync_rating_service.calculate_period_rating(user.id, None,
+                                                                     None)))
+    assert_that(ie_rating.grade, equal_to("B"))
+
+
+@pytest.mark.asyncio
+async def test_calculate_ie_rating_statement_not_found(rating_service, user):
+    with pytest.raises(StatementNotFoundError):
+        await rating_service.calculate_ie_rating(report_id=9999, user_id=user.id)
+
+
+@pytest.mark.asyncio
+async def test_calculate_period_rating_user_not_found(rating_service):
+    with pytest.raises(UserNotFoundError):
+        await rating_service.calculate_period_rating(9999, None, None)
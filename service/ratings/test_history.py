@@ -0,0 +1,74 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+from hamcrest import assert_that, equal_to, close_to
+
+from service.ratings.history import history_periods, count_periods, \
+    totals_by_period, rolling_totals, START_AFTER_END
+
+DAILY = [
+    (date(2025, 1, 1), 1, 100.0, 10.0),
+    (date(2025, 1, 6), 2, 200.0, 40.0),
+    (date(2025, 2, 3), 1, 50.0, 50.0),
+]
+
+
+def test_weeks_start_on_monday_and_are_clipped_to_the_range():
+    assert_that(history_periods(date(2025, 1, 1), date(2025, 1, 15), "week"),
+                equal_to([(date(2025, 1, 1), date(2025, 1, 5)),
+                          (date(2025, 1, 6), date(2025, 1, 12)),
+                          (date(2025, 1, 13), date(2025, 1, 15))]))
+
+
+def test_months_end_on_the_last_day_of_the_month():
+    assert_that(history_periods(date(2024, 11, 15), date(2025, 2, 10), "month"),
+                equal_to([(date(2024, 11, 15), date(2024, 11, 30)),
+                          (date(2024, 12, 1), date(2024, 12, 31)),
+                          (date(2025, 1, 1), date(2025, 1, 31)),
+                          (date(2025, 2, 1), date(2025, 2, 10))]))
+
+
+@pytest.mark.parametrize("interval", ["day", "week", "month"])
+def test_count_periods_matches_the_periods(interval):
+    randomness = random.Random(0)
+    for _ in range(50):
+        start = date(2024, 1, 1) + timedelta(days=randomness.randint(0, 400))
+        end = start + timedelta(days=randomness.randint(0, 400))
+        assert_that(count_periods(start, end, interval),
+                    equal_to(len(history_periods(start, end, interval))))
+
+
+def test_start_after_end_is_rejected():
+    with pytest.raises(ValueError, match=START_AFTER_END):
+        history_periods(date(2025, 2, 1), date(2025, 1, 1), "day")
+
+
+def test_totals_by_period_sums_the_days_of_each_period():
+    periods = history_periods(date(2025, 1, 1), date(2025, 3, 31), "month")
+
+    assert_that(totals_by_period(DAILY, periods),
+                equal_to([(3, 300.0, 50.0), (1, 50.0, 50.0), (0, 0.0, 0.0)]))
+
+
+def test_rolling_totals_match_summing_each_window():
+    randomness = random.Random(1)
+    start = date(2025, 1, 1)
+    daily = [(start + timedelta(days=day), randomness.randint(1, 3),
+              randomness.uniform(0, 1000), randomness.uniform(0, 1000))
+             for day in sorted(randomness.sample(range(365), 120))]
+    ends = [start + timedelta(days=day) for day in range(0, 365, 7)]
+
+    for end, (count, income, expenditure) in zip(ends,
+                                                 rolling_totals(daily, ends, 30)):
+        window = [row for row in daily
+                  if end - timedelta(days=29) <= row[0] <= end]
+        assert_that(count, equal_to(sum(row[1] for row in window)))
+        assert_that(income, close_to(sum(row[2] for row in window), 1e-6))
+        assert_that(expenditure, close_to(sum(row[3] for row in window), 1e-6))
+
+
+def test_empty_windows_have_zero_totals():
+    ends = [date(2025, 1, 6), date(2025, 3, 1)]
+
+    assert_that(rolling_totals(DAILY, ends, 7)[1], equal_to((0, 0.0, 0.0)))
@@ -0,0 +1,109 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from hamcrest import assert_that, equal_to, has_length
+
+from service.models import UserDB, StatementDB, PortfolioRatingDB
+from service.ratings.portfolio import PortfolioRatingService, PortfolioTotals, \
+    score_portfolio, calculate_grades
+from service.ratings.rating_service import RatingService, calculate_grade
+from service.statements.statement_service import StatementService
+from service.users.user_service import UserService
+
+NOW = datetime(2025, 6, 30)
+
+
+@pytest.fixture
+def portfolio_service(db):
+    return PortfolioRatingService(db)
+
+
+@pytest.fixture
+def rating_service(db):
+    statement_service = StatementService(user_service=UserService(db), db=db)
+    return RatingService(db=db, statement_service=statement_service)
+
+
+@pytest.fixture
+def book(db):
+    # (income, expenditure) per statement, one user per entry
+    statements = {
+        "a": [(5000.0, 250.5), (1200.1, 0.0)],
+        "b": [(3000.0, 900.0)],
+        "c": [(0.0, 400.0)],
+        "d": [(2000.0, 1000.0), (1000.3, 3000.7), (10.0, 5.5)],
+        "e": [(100.0, 50.0)],
+    }
+    users = {}
+    for username, totals in statements.items():
+        user = UserDB(username=username, password="x")
+        db.add(user)
+        db.flush()
+        users[username] = user.id
+        for days_ago, (income, expenditure) in enumerate(totals):
+            db.add(StatementDB(user_id=user.id,
+                               report_date=NOW - timedelta(days=10 * days_ago),
+                               total_income=income, total_expenditure=expenditure))
+    db.commit()
+    return users
+
+
+def test_calculate_grades_matches_calculate_grade():
+    ratio = np.array([0.0, 0.1, 0.1000001, 0.3, 0.45, 0.5, 0.51, 1.0, 7.5])
+
+    assert_that(calculate_grades(ratio).tolist(),
+                equal_to([calculate_grade(value) for value in ratio.tolist()]))
+
+
+def test_score_portfolio_treats_zero_income_as_ratio_one():
+    scores = score_portfolio(PortfolioTotals(np.array([1, 2]), np.array([0.0, 100.0]),
+                                             np.array([400.0, 5.0])))
+
+    assert_that(scores.ratio.tolist(), equal_to([1.0, 0.05]))
+    assert_that(scores.disposable_income.tolist(), equal_to([-400.0, 95.0]))
+    assert_that(scores.grade.tolist(), equal_to(["D", "A"]))
+
+
+@pytest.mark.parametrize("start_date, end_date", [
+    (None, None),
+    (NOW - timedelta(days=5), None),
+    (None, NOW - timedelta(days=5)),
+])
+def test_scores_are_identical_to_rating_service(db, book, portfolio_service,
+                                                rating_service, start_date,
+                                                end_date):
+    scores = score_portfolio(portfolio_service.load_totals(start_date, end_date))
+
+    assert_that(scores.user_ids.tolist(), has_length(len(set(
+        statement.user_id for statement in db.query(StatementDB).filter(
+            *([StatementDB.report_date >= start_date] if start_date else []),
+            *([StatementDB.report_date <= end_date] if end_date else []))))))
+    for index, user_id in enumerate(scores.user_ids.tolist()):
+        expected = rating_service.calculate_period_rating(user_id, start_date,
+                                                          end_date)
+        assert_that(scores.total_income[index], equal_to(expected.total_income))
+        assert_that(scores.total_expenditure[index],
+                    equal_to(expected.total_expenditure))
+        assert_that(scores.disposable_income[index],
+                    equal_to(expected.disposable_income))
+        assert_that(scores.ratio[index], equal_to(expected.ratio))
+        assert_that(scores.grade[index], equal_to(expected.grade))
+
+
+def test_rate_portfolio_writes_one_row_per_user(db, book, portfolio_service):
+    run = portfolio_service.rate_portfolio(run_at=NOW)
+
+    assert_that(run.rated, equal_to(len(book)))
+    assert_that(sum(run.grades.values()), equal_to(len(book)))
+    rows = db.query(PortfolioRatingDB).filter(PortfolioRatingDB.run_at == NOW)\
+        .order_by(PortfolioRatingDB.user_id).all()
+    assert_that(rows, has_length(len(book)))
+    assert_that(rows[2].user_id, equal_to(book["c"]))
+    assert_that((rows[2].ratio, rows[2].grade), equal_to((1.0, "D")))
+
+
+def test_rate_portfolio_with_no_statements(portfolio_service):
+    run = portfolio_service.rate_portfolio(run_at=NOW)
+
+    assert_that((run.rated, run.grades), equal_to((0, {})))
@@ -0,0 +1,210 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from hamcrest import assert_that, equal_to, close_to, has_length
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from service.categories.registry import CategoryRegistry
+from service.db import Base
+
+from service.models import UserDB, StatementDB, IncomeDB, ExpenditureDB
+from service.ratings.prefix_index import PrefixSumIndex, PrefixIndexRegistry
+from service.ratings.rating_service import RatingService
+from service.schemas.expenditure_schema import ExpenditureSchema
+from service.schemas.income_schema import IncomeSchema
+from service.schemas.statement_schema import StatementRequest
+from service.statements.statement_service import StatementService, \
+    StatementNotFoundError, UserNotFoundError, intern_categories, line_items
+from service.users.user_service import UserService
+from service.users.utils import hash_password
+
+START = datetime(2024, 1, 1)
+
+
+@pytest.fixture
+def user(db):
+    user = UserDB(username="steve", password=hash_password("minecraft"))
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture
+def registry():
+    return PrefixIndexRegistry()
+
+
+@pytest.fixture
+def statement_service(db, registry):
+    return StatementService(user_service=UserService(db), db=db,
+                            listeners=[registry])
+
+
+@pytest.fixture
+def rating_service(db, statement_service, registry):
+    return RatingService(db=db, statement_service=statement_service,
+                         prefix_index=registry)
+
+
+@pytest.fixture
+def history(db, user):
+    rng = random.Random(7)
+    statements = []
+    for month in range(24):
+        incomes = [IncomeDB(category="Salary", amount=round(rng.uniform(1, 5000), 2))
+                   for _ in range(rng.randint(0, 3))]
+        expenditures = [ExpenditureDB(category="Rent",
+                                      amount=round(rng.uniform(1, 5000), 2))
+                        for _ in range(rng.randint(0, 3))]
+        statements.append(StatementDB(
+            user_id=user.id,
+            report_date=START + timedelta(days=30 * month),
+            incomes=incomes,
+            expenditures=expenditures,
+            total_income=sum(income.amount for income in incomes),
+            total_expenditure=sum(expenditure.amount for expenditure in expenditures),
+            income_count=len(incomes),
+            expenditure_count=len(expenditures)
+        ))
+    intern_categories(db, CategoryRegistry(), line_items(statements))
+    db.add_all(statements)
+    db.commit()
+    return statements
+
+
+def test_period_totals_inclusive_bounds():
+    index = PrefixSumIndex([
+        (START, 100.0, 10.0),
+        (START + timedelta(days=1), 200.0, 20.0),
+        (START + timedelta(days=2), 300.0, 30.0)
+    ])
+
+    assert_that(index.period_totals(START + timedelta(days=1),
+                                    START + timedelta(days=2)),
+                equal_to((2, 500.0, 50.0)))
+    assert_that(index.period_totals(None, START), equal_to((1, 100.0, 10.0)))
+    assert_that(index.period_totals(None, None), equal_to((3, 600.0, 60.0)))
+    assert_that(index.period_totals(START + timedelta(days=3), None),
+                equal_to((0, 0.0, 0.0)))
+
+
+def test_period_totals_accepts_aware_bounds():
+    index = PrefixSumIndex([(START, 100.0, 10.0)])
+
+    assert_that(index.period_totals(START.replace(tzinfo=timezone.utc), None),
+                equal_to((1, 100.0, 10.0)))
+
+
+def test_add_rejects_out_of_order_statement():
+    index = PrefixSumIndex([(START, 100.0, 10.0)])
+
+    assert_that(index.add(START - timedelta(days=1), 1.0, 1.0), equal_to(False))
+    assert_that(index, has_length(1))
+
+
+def test_indexed_rating_matches_statement_rating(rating_service, user, history):
+    rng = random.Random(11)
+    dates = [statement.report_date for statement in history]
+
+    for _ in range(50):
+        first, last = sorted(rng.sample(range(len(dates)), 2))
+        start_date, end_date = dates[first], dates[last]
+        in_period = [statement for statement in history
+                     if start_date <= statement.report_date <= end_date]
+
+        expected = rating_service._calculate_rating_from_statements(in_period)
+        actual = rating_service.calculate_period_rating(user.id, start_date,
+                                                        end_date)
+
+        assert_that(actual.total_income, close_to(expected.total_income, 1e-6))
+        assert_that(actual.total_expenditure,
+                    close_to(expected.total_expenditure, 1e-6))
+        assert_that(actual.ratio, close_to(expected.ratio, 1e-9))
+        assert_that(actual.grade, equal_to(expected.grade))
+
+
+def test_index_updated_on_create_statement(rating_service, statement_service, user,
+                                           history):
+    before = rating_service.calculate_period_rating(user.id, None, None)
+
+    statement_service.create_statement(StatementRequest(
+        user_id=user.id,
+        incomes=[IncomeSchema(category="Salary", amount=1000.0)],
+        expenditures=[ExpenditureSchema(category="Rent", amount=250.0)]
+    ))
+    after = rating_service.calculate_period_rating(user.id, None, None)
+
+    assert_that(after.total_income, close_to(before.total_income + 1000.0, 1e-6))
+    assert_that(after.total_expenditure,
+                close_to(before.total_expenditure + 250.0, 1e-6))
+
+
+def test_indexed_rating_no_statements_in_period(rating_service, user, history):
+    with pytest.raises(StatementNotFoundError):
+        rating_service.calculate_period_rating(user.id, START - timedelta(days=10),
+                                               START - timedelta(days=1))
+
+
+def test_index_is_loaded_from_the_primary(db, user, registry):
+    # a replica that has yet to receive any statement
+    replica = create_engine("sqlite://")
+    Base.metadata.create_all(bind=replica)
+    read_db = sessionmaker(bind=replica)()
+    statement_service = StatementService(user_service=UserService(db), db=db,
+                                         listeners=[registry], read_db=read_db)
+    rating_service = RatingService(db=read_db, statement_service=statement_service,
+                                   prefix_index=registry)
+    try:
+        statement_service.create_statement(StatementRequest(
+            user_id=user.id, incomes=[IncomeSchema(category="Salary", amount=100.0)],
+            expenditures=[ExpenditureSchema(category="Rent", amount=40.0)]))
+
+        rating = rating_service.calculate_period_rating(user.id, None, None)
+
+        assert_that(rating.total_income, equal_to(100.0))
+        assert_that(rating.total_expenditure, equal_to(40.0))
+    finally:
+        read_db.close()
+        replica.dispose()
+
+
+def test_indexed_rating_user_not_found(rating_service):
+    with pytest.raises(UserNotFoundError):
+        rating_service.calculate_period_rating(9999, None, None)
+
+
+def test_registry_evicts_least_recently_used_user():
+    registry = PrefixIndexRegistry(max_users=1)
+    loads = []
+
+    def loader(user_id):
+        loads.append(user_id)
+        return [(START, 1.0, 1.0)]
+
+    registry.period_totals(1, None, None, loader)
+    registry.period_totals(2, None, None, loader)
+    registry.period_totals(1, None, None, loader)
+
+    assert_that(loads, equal_to([1, 2, 1]))
+
+
+@pytest.mark.parametrize("writer_id, cached", [(2, True), (1, False)])
+def test_registry_skips_caching_only_on_writes_of_the_loaded_user(writer_id, cached):
+    registry = PrefixIndexRegistry()
+    loads = []
+
+    def loader(user_id):
+        loads.append(user_id)
+        if len(loads) == 1:
+            registry.statement_created(StatementDB(
+                user_id=writer_id, report_date=START, total_income=1.0,
+                total_expenditure=1.0))
+        return [(START, 1.0, 1.0)]
+
+    registry.period_totals(1, None, None, loader)
+    registry.period_totals(1, None, None, loader)
+
+    assert_that(loads, has_length(1 if cached else 2))
@@ -0,0 +1,96 @@
+import pytest
+from hamcrest import assert_that, equal_to, has_entries, none, same_instance
+
+from service.models import UserDB
+from service.ratings.rating_cache import RatingCache
+from service.ratings.rating_service import RatingService, build_rating
+from service.schemas.expenditure_schema import ExpenditureSchema
+from service.schemas.income_schema import IncomeSchema
+from service.schemas.statement_schema import StatementRequest
+from service.statements.statement_service import StatementService
+from service.users.user_service import UserService
+from service.users.utils import hash_password
+
+
+@pytest.fixture
+def user(db):
+    user = UserDB(username="steve", password=hash_password("minecraft"))
+    db.add(user)
+    db.commit()
+    db.refresh(user)
+    return user
+
+
+@pytest.fixture
+def cache():
+    return RatingCache()
+
+
+@pytest.fixture
+def statement_service(db, cache):
+    return StatementService(user_service=UserService(db), db=db, listeners=[cache])
+
+
+@pytest.fixture
+def rating_service(db, statement_service, cache):
+    return RatingService(db=db, statement_service=statement_service, cache=cache)
+
+
+def test_repeated_rating_is_served_from_cache(rating_service, statement_service,
+                                              cache, user):
+    statement = statement_service.create_statement(build_statement(user.id))
+
+    first = rating_service.calculate_ie_rating(statement.id, user.id)
+    second = rating_service.calculate_ie_rating(statement.id, user.id)
+
+    assert_that(second, same_instance(first))
+    assert_that(cache.stats(), has_entries(hits=1, misses=1, entries=1))
+
+
+def test_create_statement_invalidates_user_ratings(rating_service,
+                                                   statement_service, cache, user):
+    statement_service.create_statement(build_statement(user.id))
+    before = rating_service.calculate_period_rating(user.id, None, None)
+
+    statement_service.create_statement(build_statement(user.id))
+    after = rating_service.calculate_period_rating(user.id, None, None)
+
+    assert_that(before.total_income, equal_to(5000.0))
+    assert_that(after.total_income, equal_to(10000.0))
+    assert_that(cache.stats(), has_entries(invalidations=1))
+
+
+def test_invalidation_is_per_user(cache):
+    rating = build_rating(100.0, 10.0)
+    cache.set_rating(1, ("report", 1), rating, cache.write_token(1))
+    cache.set_rating(2, ("report", 2), rating, cache.write_token(2))
+
+    cache.invalidate_user(1)
+
+    assert_that(cache.get_rating(1, ("report", 1)), none())
+    assert_that(cache.get_rating(2, ("report", 2)), same_instance(rating))
+
+
+def test_rating_computed_across_a_write_is_not_cached(cache):
+    write_token = cache.write_token(1)
+    cache.invalidate_user(1)
+    cache.set_rating(1, ("report", 1), build_rating(100.0, 10.0), write_token)
+
+    assert_that(cache.get_rating(1, ("report", 1)), none())
+
+
+def test_rating_computed_across_another_users_write_is_cached(cache):
+    rating = build_rating(100.0, 10.0)
+    write_token = cache.write_token(1)
+    cache.invalidate_user(2)
+    cache.set_rating(1, ("report", 1), rating, write_token)
+
+    assert_that(cache.get_rating(1, ("report", 1)), same_instance(rating))
+
+
+def build_statement(user_id):
+    return StatementRequest(
+        user_id=user_id,
+        incomes=[IncomeSchema(category="Salary", amount=5000.0)],
+        expenditures=[ExpenditureSchema(category="Rent", amount=1500.0)]
+    )
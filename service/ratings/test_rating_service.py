@@ -1,13 +1,16 @@
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
 
 import pytest
 from hamcrest import assert_that, equal_to
 
+from service.categories.registry import CategoryRegistry
+from service.metrics.queries import assert_max_queries
 from service.models import UserDB, StatementDB, IncomeDB, ExpenditureDB
 from service.ratings.rating_service import RatingService
-from service.schemas.rating_schema import RatingResponse
+from service.schemas.rating_schema import RatingResponse, RatingBatchItem
 from service.statements.statement_service import StatementService, \
-    StatementNotFoundError, UserNotFoundError
+    StatementNotFoundError, UserNotFoundError, backfill_statement_totals, \
+    intern_categories, USER_NOT_FOUND, STATEMENT_NOT_FOUND, NO_STATEMENTS_IN_PERIOD
 from service.users.user_service import UserService
 from service.users.utils import hash_password
 
@@ -43,17 +46,13 @@ def create_statement(db, create_user):
     db.commit()
     db.refresh(statement)
 
-    db.add_all([
+    add_line_items(db, [
         IncomeDB(category="Salary", amount=5000.0, statement_id=statement.id),
-        IncomeDB(category="Bonus", amount=2000.0, statement_id=statement.id)
-    ])
-
-    db.add_all([
+        IncomeDB(category="Bonus", amount=2000.0, statement_id=statement.id),
         ExpenditureDB(category="Rent", amount=1500.0, statement_id=statement.id),
         ExpenditureDB(category="Food", amount=500.0, statement_id=statement.id)
     ])
-
-    db.commit()
+    backfill_statement_totals(db)
     return statement
 
 
@@ -83,31 +82,34 @@ def create_statements_for_period(db, create_user):
             ExpenditureDB(category="Groceries", amount=300.0, statement_id=statement.id)
         ]
 
-        db.add_all(incomes + expenditures)
-        db.commit()
+        add_line_items(db, incomes + expenditures)
 
+    backfill_statement_totals(db)
     return statements
 
 
+def add_line_items(db, items):
+    intern_categories(db, CategoryRegistry(), items)
+    db.add_all(items)
+    db.commit()
+
+
 def create_statement_with_data(db, user_id, incomes, expenditures):
     statement = StatementDB(user_id=user_id)
     db.add(statement)
     db.commit()
     db.refresh(statement)
 
-    db.add_all([
+    add_line_items(db, [
         IncomeDB(category=income['category'], amount=income['amount'],
                  statement_id=statement.id)
         for income in incomes
-    ])
-
-    db.add_all([
+    ] + [
         ExpenditureDB(category=expenditure['category'], amount=expenditure['amount'],
                       statement_id=statement.id)
         for expenditure in expenditures
     ])
-
-    db.commit()
+    backfill_statement_totals(db)
     return statement
 
 
@@ -139,6 +141,7 @@ def test_calculate_ie_rating_all_grades(rating_service, create_user, db, total_i
 def test_calculate_ie_rating_no_income(rating_service, create_statement, db):
     db.query(IncomeDB).delete()
     db.commit()
+    backfill_statement_totals(db)
 
     result = rating_service.calculate_ie_rating(report_id=create_statement.id,
                                                 user_id=create_statement.user_id)
@@ -152,6 +155,7 @@ def test_calculate_ie_rating_no_income(rating_service, create_statement, db):
 def test_calculate_ie_rating_no_expenditure(rating_service, create_statement, db):
     db.query(ExpenditureDB).delete()
     db.commit()
+    backfill_statement_totals(db)
 
     result = rating_service.calculate_ie_rating(report_id=create_statement.id,
                                                 user_id=create_statement.user_id)
@@ -167,6 +171,7 @@ def test_calculate_ie_rating_no_income_no_expenditure(rating_service, create_sta
     db.query(IncomeDB).delete()
     db.query(ExpenditureDB).delete()
     db.commit()
+    backfill_statement_totals(db)
 
     result = rating_service.calculate_ie_rating(report_id=create_statement.id,
                                                 user_id=create_statement.user_id)
@@ -252,3 +257,111 @@ def test_calculate_period_rating_only_end_date(rating_service, create_user,
     assert_that(response.total_income, equal_to(6500.0))
     assert_that(response.total_expenditure, equal_to(1500.0))
     assert_that(response.grade, equal_to("B"))
+
+
+def test_calculate_batch_ratings(rating_service, create_user,
+                                 create_statements_for_period):
+    now = datetime.now(timezone.utc)
+    items = [
+        RatingBatchItem(user_id=create_user.id,
+                        report_id=create_statements_for_period[0].id),
+        RatingBatchItem(user_id=create_user.id, start_date=now - timedelta(days=6)),
+        RatingBatchItem(user_id=create_user.id, end_date=now - timedelta(days=7)),
+        RatingBatchItem(user_id=9999, report_id=1),
+        RatingBatchItem(user_id=create_user.id, report_id=9999),
+        RatingBatchItem(user_id=create_user.id, end_date=now - timedelta(days=50))
+    ]
+
+    results = rating_service.calculate_batch_ratings(items)
+
+    assert_that([result.index for result in results], equal_to(list(range(6))))
+    assert_that(results[0].rating, equal_to(rating_service.calculate_ie_rating(
+        create_statements_for_period[0].id, create_user.id)))
+    assert_that(results[1].rating, equal_to(rating_service.calculate_period_rating(
+        create_user.id, now - timedelta(days=6), None)))
+    assert_that(results[2].rating.total_income, equal_to(6500.0))
+    assert_that(results[3].error, equal_to(USER_NOT_FOUND))
+    assert_that(results[4].error, equal_to(STATEMENT_NOT_FOUND))
+    assert_that(results[5].error, equal_to(NO_STATEMENTS_IN_PERIOD))
+
+
+@pytest.fixture(params=[1, 40], ids=["1 statement", "40 statements"])
+def many_statements(request, db, create_user):
+    now = datetime.now(timezone.utc)
+    db.add_all([StatementDB(user_id=create_user.id,
+                            report_date=now - timedelta(days=day),
+                            total_income=100.0, total_expenditure=10.0)
+                for day in range(request.param)])
+    db.commit()
+    return request.param
+
+
+def test_calculate_period_rating_query_count_is_constant(rating_service, create_user,
+                                                         many_statements):
+    user_id = create_user.id
+    with assert_max_queries(2):
+        rating = rating_service.calculate_period_rating(user_id, None, None)
+
+    assert_that(rating.total_income, equal_to(100.0 * many_statements))
+
+
+def test_calculate_batch_ratings_query_count_is_constant(db, rating_service,
+                                                         create_user, many_statements):
+    statement_ids = [statement.id for statement in db.query(StatementDB)]
+    items = [RatingBatchItem(user_id=create_user.id, report_id=statement_id)
+             for statement_id in statement_ids] + \
+        [RatingBatchItem(user_id=create_user.id)] * many_statements
+
+    with assert_max_queries(3):
+        results = rating_service.calculate_batch_ratings(items)
+
+    assert_that(all(result.rating for result in results), equal_to(True))
+
+
+@pytest.fixture
+def statements_over_a_quarter(db, create_user):
+    report_dates = [datetime(2025, 1, 10, 9), datetime(2025, 1, 10, 17),
+                    datetime(2025, 1, 25), datetime(2025, 3, 5)]
+    db.add_all([StatementDB(user_id=create_user.id, report_date=report_date,
+                            total_income=1000.0, total_expenditure=200.0)
+                for report_date in report_dates])
+    db.commit()
+    return create_user.id
+
+
+def test_calculate_rating_history_by_month(rating_service, statements_over_a_quarter):
+    with assert_max_queries(2):
+        history = rating_service.calculate_rating_history(
+            statements_over_a_quarter, date(2025, 1, 1), date(2025, 3, 31), "month")
+
+    assert_that([(point.period_start, point.statement_count)
+                 for point in history.points],
+                equal_to([(date(2025, 1, 1), 3), (date(2025, 2, 1), 0),
+                          (date(2025, 3, 1), 1)]))
+    assert_that(history.points[0].rating.total_income, equal_to(3000.0))
+    assert_that(history.points[0].rating.grade, equal_to("B"))
+    assert_that(history.points[1].rating, equal_to(None))
+
+
+def test_calculate_rating_history_over_trailing_windows(rating_service,
+                                                        statements_over_a_quarter):
+    history = rating_service.calculate_rating_history(
+        statements_over_a_quarter, date(2025, 2, 1), date(2025, 3, 31), "month",
+        window_days=30)
+
+    assert_that([(point.period_start, point.period_end, point.statement_count)
+                 for point in history.points],
+                equal_to([(date(2025, 1, 30), date(2025, 2, 28), 0),
+                          (date(2025, 3, 2), date(2025, 3, 31), 1)]))
+
+    history = rating_service.calculate_rating_history(
+        statements_over_a_quarter, date(2025, 2, 1), date(2025, 2, 28), "month",
+        window_days=60)
+
+    assert_that(history.points[0].statement_count, equal_to(3))
+
+
+def test_calculate_rating_history_user_not_found(rating_service):
+    with pytest.raises(UserNotFoundError):
+        rating_service.calculate_rating_history(999, date(2025, 1, 1),
+                                                date(2025, 1, 31))
@@ -0,0 +1,54 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from hamcrest import assert_that, equal_to
+
+from service.dependencies import get_rating_service
+from service.models import UserDB
+from service.ratings import router as ratings_router
+from service.ratings.rating_service import RatingService
+from service.settings import get_settings
+from service.statements.statement_service import StatementService
+from service.users.user_service import UserService
+from service.users.utils import hash_password
+
+
+@pytest.fixture
+def user_id(db):
+    user = UserDB(username="steve", password=hash_password("minecraft"))
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+@pytest.fixture
+def client(db):
+    app = FastAPI()
+    app.include_router(ratings_router.router, prefix="/api/ratings")
+    app.dependency_overrides[get_rating_service] = lambda: RatingService(
+        db=db, statement_service=StatementService(user_service=UserService(db), db=db))
+    return TestClient(app)
+
+
+def get_history(client, user_id, start_date, end_date, window_days):
+    return client.get("/api/ratings/history", params={
+        "user_id": user_id, "start_date": start_date, "end_date": end_date,
+        "window_days": window_days})
+
+
+def test_history_rejects_windows_over_the_limit(client, user_id, monkeypatch):
+    monkeypatch.setattr(get_settings(), "rating_history_max_window_days", 365)
+
+    response = get_history(client, user_id, "2025-01-01", "2025-03-31", 1_000_000)
+
+    assert_that(response.status_code, equal_to(400))
+    assert_that(response.json()["detail"],
+                equal_to("A window spans at most 365 days"))
+    response = get_history(client, user_id, "2025-01-01", "2025-03-31", 365)
+    assert_that(response.status_code, equal_to(200))
+
+
+def test_history_rejects_windows_before_the_first_date(client, user_id):
+    response = get_history(client, user_id, "0001-01-02", "0001-03-31", 30)
+
+    assert_that(response.status_code, equal_to(400))
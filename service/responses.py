@@ -0,0 +1,25 @@
+from typing import Any
+
+from pydantic import BaseModel
+from starlette.responses import Response
+
+
+class ModelResponse(Response):
+    """JSON response rendered straight from a pydantic model by pydantic-core.
+
+    Returning a Response from an endpoint skips FastAPI's response_model pass,
+    which would validate the model again (on the threadpool for sync
+    endpoints) and run it through jsonable_encoder and json.dumps; keep the
+    response_model on the route for the OpenAPI schema.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return model_json(content)
+        return super().render(content)
+
+
+def model_json(model: BaseModel) -> bytes:
+    # model_dump_json without the round trip through str
+    return model.__pydantic_serializer__.to_json(model)
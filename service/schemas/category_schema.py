@@ -0,0 +1,23 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class CategoryTotal(BaseModel):
+    category: str
+    total: float
+    count: int
+    # of the total income, or expenditure, of the breakdown
+    share: float
+
+
+class CategoryBreakdown(BaseModel):
+    user_id: int
+    report_id: Optional[int] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+    total_income: float
+    total_expenditure: float
+    incomes: List[CategoryTotal]
+    expenditures: List[CategoryTotal]
@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class ProfileSummary(BaseModel):
+    request_id: str
+    method: str
+    path: str
+    status_code: Optional[int] = None
+    created_at: datetime
+    duration_ms: float
+    samples: int
+
+
+class ProfileList(BaseModel):
+    profiles: List[ProfileSummary]
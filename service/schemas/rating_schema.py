@@ -1,3 +1,6 @@
+from datetime import date, datetime
+from typing import List, Optional
+
 from pydantic import BaseModel
 
 
@@ -9,3 +12,35 @@ class RatingResponse(BaseModel):
     grade: str
 
     model_config = {"from_attributes": True}
+
+
+class RatingBatchItem(BaseModel):
+    user_id: int
+    report_id: Optional[int] = None
+    start_date: Optional[datetime] = None
+    end_date: Optional[datetime] = None
+
+
+class RatingBatchResult(BaseModel):
+    index: int
+    rating: Optional[RatingResponse] = None
+    error: Optional[str] = None
+
+
+class RatingBatchResponse(BaseModel):
+    results: List[RatingBatchResult]
+
+
+class RatingHistoryPoint(BaseModel):
+    period_start: date
+    period_end: date
+    statement_count: int
+    # None when the period has no statements
+    rating: Optional[RatingResponse] = None
+
+
+class RatingHistoryResponse(BaseModel):
+    user_id: int
+    interval: str
+    window_days: Optional[int] = None
+    points: List[RatingHistoryPoint]
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel
 
@@ -25,3 +25,21 @@ class StatementResponse(BaseModel):
     expenditures: List[ExpenditureResponse]
 
     model_config = {"from_attributes": True}
+
+
+class StatementPage(BaseModel):
+    items: List[StatementResponse]
+    # pass back as ``cursor`` for the next page, None on the last one
+    next_cursor: Optional[str] = None
+
+
+class BulkStatementResult(BaseModel):
+    index: int
+    statement_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BulkStatementResponse(BaseModel):
+    created: int
+    failed: int
+    results: List[BulkStatementResult]
@@ -0,0 +1,129 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Literal, Optional
+
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from sqlalchemy.engine import make_url
+
+
+class Settings(BaseSettings):
+    model_config = SettingsConfigDict(env_file=".env", extra="ignore",
+                                      env_parse_none_str="null")
+
+    database_url: str = "sqlite:///./ophelos.db"
+    # keep the database in memory, shared by every connection of the process,
+    # for ephemeral workers; database_url is ignored
+    sqlite_in_memory: bool = False
+    sqlite_memory_name: str = "ophelos"
+    # replica serving read-only queries (statement lookups and ratings)
+    read_database_url: Optional[str] = None
+    # without a replica, read through separate read-only connections to the
+    # SQLite file so reads never queue behind writers for a pooled connection
+    sqlite_read_only_connections: bool = False
+    # defaults to database_url on the matching async driver
+    async_database_url: Optional[str] = None
+    # serve the statement and rating endpoints through AsyncSession
+    use_async_db: bool = False
+
+    # connection pool of each engine, not used by a private ":memory:" database
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_seconds: float = 30.0
+    # -1 never recycles; in-memory databases ignore it so they are never dropped
+    db_pool_recycle_seconds: int = -1
+    db_pool_pre_ping: bool = False
+
+    # pragmas run on every new SQLite connection, None keeps SQLite's default
+    sqlite_journal_mode: Optional[Literal["DELETE", "TRUNCATE", "PERSIST", "MEMORY",
+                                          "WAL", "OFF"]] = "WAL"
+    sqlite_synchronous: Optional[Literal["OFF", "NORMAL", "FULL", "EXTRA"]] = "NORMAL"
+    sqlite_mmap_size: Optional[int] = 256 * 1024 * 1024
+    # pages, or KiB when negative
+    sqlite_cache_size: Optional[int] = -64 * 1024
+
+    # /metrics endpoint and the request, pool, query and cache metrics behind it
+    metrics_enabled: bool = True
+    # per-request SQL statement count and DB time, in response headers and logs
+    query_stats_enabled: bool = True
+    # log a request at WARNING when one statement ran this many times (N+1)
+    repeated_query_threshold: int = 10
+    # sample the stacks of requests carrying X-Profile-Token: profiling_token,
+    # and of a random profiling_sample_rate share of all requests; the token
+    # also guards /admin/profiles, where the latest profiles are kept
+    profiling_enabled: bool = False
+    profiling_token: Optional[str] = None
+    profiling_sample_rate: float = 0.0
+    profiling_interval_seconds: float = 0.002
+    profiling_max_profiles: int = 100
+
+    # statements inserted per transaction by the bulk ingestion endpoint
+    bulk_chunk_size: int = 500
+    # queue POST /api/statements to one writer thread that commits the statements
+    # arriving within group_commit_max_delay_seconds of the first, at most
+    # group_commit_max_batch_size of them, in a single transaction
+    group_commit_enabled: bool = False
+    group_commit_max_batch_size: int = 100
+    group_commit_max_delay_seconds: float = 0.002
+    # how long a request waits for its commit past the delay before a 503
+    group_commit_timeout_seconds: float = 5.0
+    # statements per page of GET /api/statements, and the most a client may ask for
+    statement_page_size: int = 100
+    statement_page_max_size: int = 1000
+    # rows fetched per round trip when streaming statements as NDJSON
+    statement_stream_yield_per: int = 500
+    # items accepted by a single batch rating request
+    rating_batch_max_items: int = 1000
+    # points returned by one rating history request
+    rating_history_max_points: int = 1000
+    # trailing window of one rating history point, in days
+    rating_history_max_window_days: int = 3660
+
+    # rows written per insert by the portfolio scoring run
+    portfolio_write_chunk_size: int = 10_000
+
+    # in-process RatingResponse cache, 0 entries disables it
+    rating_cache_max_entries: int = 10_000
+    rating_cache_ttl_seconds: float = 60.0
+    # bcrypt cost factor, lower it in environments that create users in bulk
+    bcrypt_salt_rounds: int = 12
+    # threads hashing passwords off the request path
+    password_hash_workers: int = min(4, os.cpu_count() or 1)
+
+    # ids of users known to exist, checked by every statement and rating call
+    user_cache_max_entries: int = 100_000
+    # per-user prefix-sum indexes used for period ratings
+    prefix_index_max_users: int = 10_000
+    prefix_index_ttl_seconds: float = 300.0
+
+    @property
+    def resolved_database_url(self) -> str:
+        if self.sqlite_in_memory:
+            return (f"sqlite:///file:{self.sqlite_memory_name}"
+                    f"?mode=memory&cache=shared&uri=true")
+        return self.database_url
+
+    @property
+    def resolved_read_database_url(self) -> Optional[str]:
+        """URL of the read engine, None when reads go to the primary."""
+        if self.read_database_url:
+            return self.read_database_url
+        url = make_url(self.resolved_database_url)
+        if (self.sqlite_read_only_connections and url.get_backend_name() == "sqlite"
+                and url.database not in (None, "", ":memory:")
+                and "mode" not in url.query):
+            path = Path(url.database).resolve().as_posix()
+            return f"sqlite:///file:{path}?mode=ro&uri=true"
+        return None
+
+    @property
+    def resolved_async_database_url(self) -> str:
+        if self.async_database_url:
+            return self.async_database_url
+        return self.resolved_database_url.replace("sqlite://", "sqlite+aiosqlite://",
+                                                  1)
+
+
+@lru_cache
+def get_settings() -> Settings:
+    return Settings()
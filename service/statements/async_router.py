@@ -0,0 +1,54 @@
+import logging
+
+from fastapi import APIRouter, Depends
+from starlette import status
+from starlette.exceptions import HTTPException
+
+from service.dependencies import get_async_statement_service
+from service.profiling.route import ProfiledRoute
+from service.responses import ModelResponse
+from service.schemas.statement_schema import StatementRequest, \
+    StatementCreateResponse, StatementResponse
+from service.statements.async_statement_service import AsyncStatementService
+from service.statements.group_commit import WriterUnavailableError
+from service.statements.statement_service import StatementNotFoundError, \
+    EmptyStatementError
+
+router = APIRouter(route_class=ProfiledRoute)
+
+logger = logging.getLogger(__name__)
+
+
+@router.post("", response_model=StatementCreateResponse,
+             status_code=status.HTTP_201_CREATED)
+async def create_statement(
+    statement_data: StatementRequest,
+    service: AsyncStatementService = Depends(get_async_statement_service)
+):
+    try:
+        statement = await service.create_statement(statement_data)
+        return ModelResponse(StatementCreateResponse(statement_id=statement.id),
+                             status_code=status.HTTP_201_CREATED)
+    except (ValueError, EmptyStatementError) as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    except LookupError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except WriterUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail=str(e))
+
+
+@router.get("/{statement_id}", response_model=StatementResponse,
+            status_code=status.HTTP_200_OK)
+async def get_statement(
+    statement_id: int,
+    user_id: int,
+    service: AsyncStatementService = Depends(get_async_statement_service)
+):
+    try:
+        statement = await service.get_statement(statement_id=statement_id,
+                                                user_id=user_id)
+        return ModelResponse(StatementResponse.model_validate(statement))
+    except StatementNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail="Statement not found")
@@ -0,0 +1,124 @@
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from service.categories.registry import CategoryRegistry
+from service.categories.summary import summary_rows, category_summary_upsert
+from service.models import StatementDB
+from service.schemas.statement_schema import StatementRequest
+from service.statements.statement_service import UserNotFoundError, \
+    StatementNotFoundError, NO_STATEMENTS_IN_PERIOD, build_statement, \
+    line_items, period_filters
+from service.users.async_user_service import AsyncUserService
+
+
+class AsyncStatementService:
+    def __init__(self, user_service: AsyncUserService, db: AsyncSession,
+                 listeners: Iterable[Any] = (),
+                 categories: Optional[CategoryRegistry] = None,
+                 writer: Optional[Any] = None):
+        self.user_service = user_service
+        self.db = db
+        # notified through statement_created(statement) after each commit
+        self.listeners = list(listeners)
+        self.categories = categories or CategoryRegistry()
+        # a GroupCommitWriter, when statements are committed in groups
+        self.writer = writer
+
+    async def create_statement(self, statement_data: StatementRequest) \
+            -> StatementDB:
+        if not await self.user_service.user_exists(statement_data.user_id):
+            raise UserNotFoundError()
+
+        statement = build_statement(statement_data)
+        if self.writer is not None:
+            # inserted, and the listeners notified, by the writer's thread
+            await self.writer.write_async(statement)
+            return statement
+
+        await self._intern_categories([statement])
+
+        self.db.add(statement)
+        await self.db.execute(category_summary_upsert(self.db.bind.dialect.name),
+                              summary_rows([statement]))
+        await self.db.commit()
+        await self.db.refresh(statement)
+        for listener in self.listeners:
+            listener.statement_created(statement)
+
+        return statement
+
+    async def _intern_categories(self, statements: List[StatementDB]):
+        items = line_items(statements)
+        names = {item.category for item in items}
+        ids = self.categories.known_ids(names)
+        if len(ids) < len(names):
+            # committed on its own, see CategoryRegistry.intern
+            async with self.db.bind.begin() as connection:
+                ids.update(await connection.run_sync(self.categories.intern,
+                                                     names - ids.keys()))
+        for item in items:
+            item.category_id = ids[item.category]
+
+    async def get_statement(self, statement_id: int, user_id: int) -> StatementDB:
+        if not await self.user_service.user_exists(user_id):
+            raise UserNotFoundError()
+
+        statement: Optional[StatementDB] = await self.db.scalar(
+            select(StatementDB).where(StatementDB.id == statement_id,
+                                      StatementDB.user_id == user_id))
+
+        if statement is None:
+            raise StatementNotFoundError()
+
+        return statement
+
+    async def get_statement_totals(self, statement_id: int, user_id: int) \
+            -> Tuple[float, float]:
+        if not await self.user_service.user_exists(user_id):
+            raise UserNotFoundError()
+
+        totals = (await self.db.execute(
+            select(StatementDB.total_income, StatementDB.total_expenditure)
+            .where(StatementDB.id == statement_id, StatementDB.user_id == user_id)
+        )).first()
+
+        if totals is None:
+            raise StatementNotFoundError()
+
+        return totals.total_income, totals.total_expenditure
+
+    async def get_statements_in_period(self, user_id: int,
+                                       start_date: Optional[datetime],
+                                       end_date: Optional[datetime]) \
+            -> List[StatementDB]:
+        if not await self.user_service.user_exists(user_id):
+            raise UserNotFoundError()
+
+        statements = list(await self.db.scalars(
+            select(StatementDB).where(*period_filters(user_id, start_date,
+                                                      end_date))))
+
+        if not statements:
+            raise StatementNotFoundError(NO_STATEMENTS_IN_PERIOD)
+
+        return statements
+
+    async def get_period_totals(self, user_id: int, start_date: Optional[datetime],
+                                end_date: Optional[datetime]) -> Tuple[float, float]:
+        if not await self.user_service.user_exists(user_id):
+            raise UserNotFoundError()
+
+        count, income, expenditure = (await self.db.execute(
+            select(func.count(StatementDB.id),
+                   func.coalesce(func.sum(StatementDB.total_income), 0.0),
+                   func.coalesce(func.sum(StatementDB.total_expenditure), 0.0))
+            .where(*period_filters(user_id, start_date, end_date))
+        )).one()
+
+        if not count:
+            raise StatementNotFoundError(NO_STATEMENTS_IN_PERIOD)
+
+        return income, expenditure
@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from service.categories.registry import CategoryRegistry
+from service.metrics.registry import MetricsRegistry
+from service.models import StatementDB
+from service.statements.statement_service import StatementService
+from service.users.user_service import UserService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BATCH_SIZE = 100
+DEFAULT_MAX_DELAY_SECONDS = 0.002
+DEFAULT_TIMEOUT_SECONDS = 5.0
+WAIT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+WRITER_UNAVAILABLE = "Statements cannot be written right now, try again later"
+
+# a statement waiting to be written, the future its id is set on, and when it
+# was queued
+Pending = Tuple[StatementDB, Future, float]
+
+_STOP = object()
+
+
+class WriterUnavailableError(Exception):
+    def __init__(self, message=WRITER_UNAVAILABLE):
+        super().__init__(message)
+
+
+class GroupCommitWriter:
+    """Writes the statements created by concurrent requests in shared
+    transactions.
+
+    Callers queue a built statement and wait on the returned future. A single
+    writer thread takes the first statement waiting, collects whatever else
+    arrives within ``max_delay_seconds`` (at most ``max_batch_size``
+    statements) and inserts them all with one commit, so a burst of requests
+    pays for one fsync and one hand-over of SQLite's write lock instead of one
+    each. Each future then resolves to its statement's id. When a shared
+    transaction fails, its statements are retried one by one, so a bad
+    statement only fails its own request.
+
+    ``write`` waits at most ``timeout_seconds`` past the batching delay; a
+    statement that times out may still be committed afterwards.
+    """
+
+    def __init__(self, session_factory: Callable[[], Session],
+                 metrics: MetricsRegistry,
+                 listeners: Iterable[Any] = (),
+                 categories: Optional[CategoryRegistry] = None,
+                 max_batch_size: int = DEFAULT_MAX_BATCH_SIZE,
+                 max_delay_seconds: float = DEFAULT_MAX_DELAY_SECONDS,
+                 timeout_seconds: float = DEFAULT_TIMEOUT_SECONDS):
+        self.session_factory = session_factory
+        self.listeners = list(listeners)
+        self.categories = categories or CategoryRegistry()
+        self.max_batch_size = max(max_batch_size, 1)
+        self.max_delay_seconds = max_delay_seconds
+        self.timeout_seconds = timeout_seconds
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.batch_sizes = metrics.histogram(
+            "ophelos_group_commit_batch_size", "Statements written per transaction.",
+            buckets=_batch_buckets(self.max_batch_size))
+        self.waits = metrics.histogram(
+            "ophelos_group_commit_wait_seconds",
+            "Time from queueing a statement to its commit.", buckets=WAIT_BUCKETS)
+        self.retries = metrics.counter(
+            "ophelos_group_commit_retries_total",
+            "Shared transactions that failed and were retried one by one.")
+        metrics.callback("ophelos_group_commit_queue_depth",
+                         "Statements waiting for the writer.", (),
+                         lambda: [((), self._queue.qsize())])
+        metrics.callback("ophelos_group_commit_max_batch_size",
+                         "Configured statements per transaction.", (),
+                         lambda: [((), self.max_batch_size)])
+        metrics.callback("ophelos_group_commit_max_delay_seconds",
+                         "Configured wait for more statements.", (),
+                         lambda: [((), self.max_delay_seconds)])
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                name="group-commit-writer",
+                                                daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        """Write what is queued, then stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join()
+
+    def submit(self, statement: StatementDB) -> "Future[int]":
+        future: "Future[int]" = Future()
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                raise WriterUnavailableError()
+            self._queue.put((statement, future, time.perf_counter()))
+        return future
+
+    def write(self, statement: StatementDB) -> int:
+        """Queue the statement and wait for its id."""
+        try:
+            return self.submit(statement).result(timeout=self._wait_seconds())
+        except TimeoutError:
+            raise WriterUnavailableError()
+
+    async def write_async(self, statement: StatementDB) -> int:
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(self.submit(statement)),
+                                          self._wait_seconds())
+        except TimeoutError:
+            raise WriterUnavailableError()
+
+    def _wait_seconds(self) -> float:
+        return self.max_delay_seconds + self.timeout_seconds
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch: List[Pending] = [first]
+            deadline = time.perf_counter() + self.max_delay_seconds
+            while len(batch) < self.max_batch_size:
+                try:
+                    pending = self._queue.get(
+                        timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                if pending is _STOP:
+                    stopping = True
+                    break
+                batch.append(pending)
+            self._write(batch)
+
+    def _write(self, batch: List[Pending]):
+        try:
+            self._insert([statement for statement, _, _ in batch])
+        except Exception as e:
+            if len(batch) == 1:
+                self._resolve(batch, error=e)
+                return
+            logger.warning(f"Group commit of {len(batch)} statements failed, "
+                           f"retrying them one by one: {e}")
+            self.retries.inc()
+            for pending in batch:
+                self._write([pending])
+            return
+        self.batch_sizes.observe(len(batch))
+        for statement, _, _ in batch:
+            self._notify_created(statement)
+        self._resolve(batch)
+
+    def _insert(self, statements: List[StatementDB]):
+        db = self.session_factory()
+        try:
+            StatementService(user_service=UserService(db), db=db,
+                             categories=self.categories).insert_statements(statements)
+        finally:
+            db.close()
+
+    def _notify_created(self, statement: StatementDB):
+        # the statement is committed whatever a listener does, and its caller
+        # is waiting
+        for listener in self.listeners:
+            try:
+                listener.statement_created(statement)
+            except Exception:
+                logger.exception(f"{type(listener).__name__} failed on statement "
+                                 f"{statement.id}")
+
+    def _resolve(self, batch: List[Pending], error: Optional[Exception] = None):
+        now = time.perf_counter()
+        for statement, future, queued_at in batch:
+            self.waits.observe(now - queued_at)
+            if future.done():
+                # cancelled by a caller that stopped waiting
+                continue
+            if error is None:
+                future.set_result(statement.id)
+            else:
+                future.set_exception(error)
+
+
+def _batch_buckets(max_batch_size: int) -> Tuple[int, ...]:
+    buckets, size = [], 1
+    while size < max_batch_size:
+        buckets.append(size)
+        size *= 2
+    return tuple(buckets) + (max_batch_size,)
@@ -1,17 +1,31 @@
+import json
 import logging
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Iterable, Iterator, List, \
+    Optional, Tuple, Union
 
-from fastapi import APIRouter, Depends
-from fastapi.encoders import jsonable_encoder
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from starlette import status
+from starlette.concurrency import run_in_threadpool
 from starlette.exceptions import HTTPException
 
 from service.dependencies import get_statement_service
+from service.profiling.route import ProfiledRoute, profiled
+from service.responses import ModelResponse, model_json
 from service.schemas.statement_schema import StatementRequest, \
-    StatementCreateResponse, StatementResponse
+    StatementCreateResponse, StatementResponse, BulkStatementResponse, \
+    BulkStatementResult, StatementPage
+from service.settings import get_settings
+from service.statements.group_commit import WriterUnavailableError
 from service.statements.statement_service import StatementService, \
-    StatementNotFoundError, EmptyStatementError
+    StatementNotFoundError, EmptyStatementError, UserNotFoundError, \
+    USER_NOT_FOUND, decode_cursor, encode_cursor
 
-router = APIRouter()
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+router = APIRouter(route_class=ProfiledRoute)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -25,11 +39,57 @@ def create_statement(
 ):
     try:
         statement = service.create_statement(statement_data)
-        return StatementCreateResponse(statement_id=statement.id)
+        return ModelResponse(StatementCreateResponse(statement_id=statement.id),
+                             status_code=status.HTTP_201_CREATED)
     except (ValueError, EmptyStatementError) as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except LookupError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except WriterUnavailableError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            detail=str(e))
+
+
+@router.get("", response_model=StatementPage, status_code=status.HTTP_200_OK)
+def list_statements(
+    request: Request,
+    user_id: int,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1),
+    service: StatementService = Depends(get_statement_service)
+):
+    """A user's statements oldest first, a page at a time; continue from
+    ``next_cursor``. With Accept: application/x-ndjson every statement after
+    the cursor (up to ``limit``) is streamed instead, one per line."""
+    settings = get_settings()
+    stream = NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+    try:
+        after = decode_cursor(cursor) if cursor else None
+        if stream:
+            statements = service.stream_statements(user_id, start_date, end_date,
+                                                   after, limit)
+            return StreamingResponse(_ndjson_statements(statements),
+                                     media_type=NDJSON_MEDIA_TYPE)
+
+        limit = limit or settings.statement_page_size
+        if limit > settings.statement_page_max_size:
+            raise ValueError(f"A page holds at most "
+                             f"{settings.statement_page_max_size} statements")
+        # one extra row tells whether there is a next page
+        statements = service.list_statements(user_id, start_date, end_date, after,
+                                             limit + 1)
+    except UserNotFoundError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                            detail=USER_NOT_FOUND)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    items = statements[:limit]
+    return ModelResponse(StatementPage(
+        items=[StatementResponse.model_validate(statement) for statement in items],
+        next_cursor=encode_cursor(items[-1]) if len(statements) > limit else None))
 
 
 @router.get("/{statement_id}", response_model=StatementResponse,
@@ -41,8 +101,92 @@ def get_statement(
 ):
     try:
         statement = service.get_statement(statement_id=statement_id, user_id=user_id)
-        statement_data = jsonable_encoder(statement)
-        return StatementResponse.model_validate(statement_data)
+        return ModelResponse(StatementResponse.model_validate(statement))
     except StatementNotFoundError:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail="Statement not found")
+
+
+@router.post("/bulk", response_model=BulkStatementResponse,
+             status_code=status.HTTP_200_OK)
+async def create_statements_bulk(
+    request: Request,
+    service: StatementService = Depends(get_statement_service)
+):
+    """Accepts a JSON array of statements, or one statement per line with
+    Content-Type application/x-ndjson; NDJSON bodies are inserted chunk by
+    chunk as they stream in."""
+    chunk_size = get_settings().bulk_chunk_size
+    results: List[BulkStatementResult] = []
+    pending: List[Tuple[int, StatementRequest]] = []
+
+    async def flush():
+        created = await run_in_threadpool(
+            profiled(service.create_statements_bulk),
+            [statement_data for _, statement_data in pending], chunk_size)
+        results.extend(result.model_copy(update={"index": pending[result.index][0]})
+                       for result in created)
+        pending.clear()
+
+    index = 0
+    async for item in _read_statements(request):
+        if isinstance(item, StatementRequest):
+            pending.append((index, item))
+        else:
+            results.append(BulkStatementResult(index=index, error=item))
+        index += 1
+        if len(pending) >= chunk_size:
+            await flush()
+    if pending:
+        await flush()
+
+    results.sort(key=lambda result: result.index)
+    created = sum(1 for result in results if result.statement_id is not None)
+    return ModelResponse(BulkStatementResponse(
+        created=created, failed=len(results) - created, results=results))
+
+
+async def _read_statements(request: Request) \
+        -> AsyncIterator[Union[StatementRequest, str]]:
+    if request.headers.get("content-type", "").startswith(NDJSON_MEDIA_TYPE):
+        async for line in _ndjson_lines(request):
+            yield _parse_statement(StatementRequest.model_validate_json, line)
+        return
+
+    try:
+        body = await request.json()
+    except json.JSONDecodeError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if not isinstance(body, list):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Expected a JSON array of statements")
+
+    for item in body:
+        yield _parse_statement(StatementRequest.model_validate, item)
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+def _ndjson_statements(statements: Iterable[Any]) -> Iterator[bytes]:
+    for statement in statements:
+        yield model_json(StatementResponse.model_validate(statement)) + b"\n"
+
+
+def _parse_statement(parse: Callable[[Any], StatementRequest], raw: Any) \
+        -> Union[StatementRequest, str]:
+    try:
+        return parse(raw)
+    except ValidationError as e:
+        return "; ".join(": ".join(filter(None, (
+            ".".join(str(loc) for loc in error["loc"]), error["msg"])))
+            for error in e.errors())
@@ -1,10 +1,18 @@
-from datetime import datetime, timezone
-from typing import Type, Any, List, Optional
-
+import base64
+import binascii
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Type, Any, List, Optional, Tuple, Iterable, Dict
+
+from sqlalchemy import func, update, select, insert, tuple_, Select, Update, \
+    ScalarResult, Date
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
+from service.categories.registry import CategoryRegistry
+from service.categories.summary import add_to_category_summary
 from service.models import StatementDB, IncomeDB, ExpenditureDB
-from service.schemas.statement_schema import StatementRequest
+from service.schemas.statement_schema import StatementRequest, BulkStatementResult
+from service.settings import get_settings
 from service.users.user_service import UserService
 
 STATEMENT_NOT_FOUND = "Statement not found"
@@ -13,6 +21,8 @@ POSITIVE_NUMBER = "Amount must be a positive number"
 CATEGORY_CANNOT_BE_EMPTY = "Category cannot be empty"
 STATEMENT_CANNOT_BE_EMPTY = ("Cannot create statement with no incomes and no "
                              "expenditures")
+NO_STATEMENTS_IN_PERIOD = "No statements found for the given period."
+INVALID_CURSOR = "Invalid cursor"
 
 
 class EmptyStatementError(Exception):
@@ -40,36 +50,85 @@ class StatementNotFoundError(Exception):
         super().__init__(message)
 
 
+class InvalidCursorError(ValueError):
+    def __init__(self, message=INVALID_CURSOR):
+        super().__init__(message)
+
+
 class StatementService:
-    def __init__(self, user_service: UserService, db: Session):
+    def __init__(self, user_service: UserService, db: Session,
+                 listeners: Iterable[Any] = (), read_db: Optional[Session] = None,
+                 categories: Optional[CategoryRegistry] = None,
+                 writer: Optional[Any] = None):
         self.user_service = user_service
         self.db = db
+        # the get_* queries never write and may be served by a replica
+        self.read_db = read_db or db
+        # notified through statement_created(statement) after each commit
+        self.listeners = list(listeners)
+        self.categories = categories or CategoryRegistry()
+        # a GroupCommitWriter, when statements are committed in groups
+        self.writer = writer
 
     def create_statement(self, statement_data: StatementRequest) -> StatementDB:
-        user = self.user_service.get_user_by_id(statement_data.user_id)
-        if not user:
+        if not self.user_service.user_exists(statement_data.user_id):
             raise UserNotFoundError()
 
-        if not statement_data.incomes and not statement_data.expenditures:
-            raise EmptyStatementError()
+        statement = build_statement(statement_data)
+        if self.writer is not None:
+            # inserted, and the listeners notified, by the writer's thread
+            self.writer.write(statement)
+            return statement
 
-        statement = self._build_statement(statement_data)
-        incomes = self._build_records(statement, statement_data.incomes, IncomeDB)
-        expenditures = self._build_records(statement, statement_data.expenditures,
-                                           ExpenditureDB)
+        self._intern_categories([statement])
 
-        self.db.add_all(incomes + expenditures)
+        self.db.add(statement)
+        add_to_category_summary(self.db, [statement])
         self.db.commit()
         self.db.refresh(statement)
+        self._notify_created(statement)
 
         return statement
 
+    def create_statements_bulk(self, statements_data: List[StatementRequest],
+                               chunk_size: Optional[int] = None) \
+            -> List[BulkStatementResult]:
+        chunk_size = chunk_size or get_settings().bulk_chunk_size
+        existing_users = self.user_service.get_existing_user_ids(
+            statement_data.user_id for statement_data in statements_data)
+
+        results = []
+        for chunk_start in range(0, len(statements_data), chunk_size):
+            chunk = statements_data[chunk_start:chunk_start + chunk_size]
+            statements = {}
+            for index, statement_data in enumerate(chunk, start=chunk_start):
+                try:
+                    if statement_data.user_id not in existing_users:
+                        raise UserNotFoundError()
+                    statements[index] = build_statement(statement_data)
+                except (ValueError, EmptyStatementError, UserNotFoundError) as e:
+                    results.append(BulkStatementResult(index=index, error=str(e)))
+
+            try:
+                self.insert_statements(list(statements.values()))
+            except SQLAlchemyError as e:
+                error = str(getattr(e, "orig", None) or e)
+                results.extend(BulkStatementResult(index=index, error=error)
+                               for index in statements)
+                continue
+
+            for index, statement in statements.items():
+                self._notify_created(statement)
+                results.append(BulkStatementResult(index=index,
+                                                   statement_id=statement.id))
+
+        return sorted(results, key=lambda result: result.index)
+
     def get_statement(self, statement_id: int, user_id: int) -> StatementDB:
-        user = self.user_service.get_user_by_id(user_id)
-        if not user:
+        if not self.user_service.user_exists(user_id):
             raise UserNotFoundError()
 
-        statement: Optional[StatementDB] = self.db.query(StatementDB).filter(
+        statement: Optional[StatementDB] = self.read_db.query(StatementDB).filter(
             StatementDB.id == statement_id,
             StatementDB.user_id == user_id
         ).first()
@@ -79,58 +138,318 @@ class StatementService:
 
         return statement
 
+    def get_statement_totals(self, statement_id: int, user_id: int) \
+            -> Tuple[float, float]:
+        if not self.user_service.user_exists(user_id):
+            raise UserNotFoundError()
+
+        totals = self.read_db.query(StatementDB.total_income,
+                                    StatementDB.total_expenditure).filter(
+            StatementDB.id == statement_id,
+            StatementDB.user_id == user_id
+        ).first()
+
+        if totals is None:
+            raise StatementNotFoundError()
+
+        return totals.total_income, totals.total_expenditure
+
     def get_statements_in_period(self, user_id: int, start_date: Optional[datetime],
                                  end_date: Optional[datetime]) \
             -> List[Type[StatementDB]]:
-        user = self.user_service.get_user_by_id(user_id)
-        if not user:
+        if not self.user_service.user_exists(user_id):
             raise UserNotFoundError()
 
-        query = self.db.query(StatementDB).filter(StatementDB.user_id == user_id)
-
-        if start_date:
-            query = query.filter(StatementDB.report_date >= start_date)
-        if end_date:
-            query = query.filter(StatementDB.report_date <= end_date)
-
+        query = self.read_db.query(StatementDB).filter(
+            *period_filters(user_id, start_date, end_date))
         statements = query.all()
 
         if not statements:
-            raise StatementNotFoundError("No statements found for the given period.")
+            raise StatementNotFoundError(NO_STATEMENTS_IN_PERIOD)
 
         return statements
 
-    def _build_statement(self, statement_data: StatementRequest) -> StatementDB:
-        statement = StatementDB(
-            user_id=statement_data.user_id,
-            report_date=datetime.now(timezone.utc)
+    def get_period_totals(self, user_id: int, start_date: Optional[datetime],
+                          end_date: Optional[datetime]) -> Tuple[float, float]:
+        if not self.user_service.user_exists(user_id):
+            raise UserNotFoundError()
+
+        count, income, expenditure = self.read_db.query(
+            func.count(StatementDB.id),
+            func.coalesce(func.sum(StatementDB.total_income), 0.0),
+            func.coalesce(func.sum(StatementDB.total_expenditure), 0.0)
+        ).filter(*period_filters(user_id, start_date, end_date)).one()
+
+        if not count:
+            raise StatementNotFoundError(NO_STATEMENTS_IN_PERIOD)
+
+        return income, expenditure
+
+    def list_statements(self, user_id: int, start_date: Optional[datetime],
+                        end_date: Optional[datetime],
+                        after: Optional[Tuple[datetime, int]] = None,
+                        limit: int = 100) -> List[StatementDB]:
+        """Up to ``limit`` statements in (report_date, id) order, after the
+        ``after`` key when given."""
+        if not self.user_service.user_exists(user_id):
+            raise UserNotFoundError()
+
+        return self.read_db.scalars(
+            statements_page(user_id, start_date, end_date, after).limit(limit)).all()
+
+    def stream_statements(self, user_id: int, start_date: Optional[datetime],
+                          end_date: Optional[datetime],
+                          after: Optional[Tuple[datetime, int]] = None,
+                          limit: Optional[int] = None,
+                          yield_per: Optional[int] = None) -> ScalarResult:
+        """Like list_statements, but rows are fetched from the cursor
+        ``yield_per`` at a time as the result is iterated."""
+        if not self.user_service.user_exists(user_id):
+            raise UserNotFoundError()
+
+        query = statements_page(user_id, start_date, end_date, after)
+        if limit is not None:
+            query = query.limit(limit)
+        return self.read_db.scalars(query.execution_options(
+            yield_per=yield_per or get_settings().statement_stream_yield_per))
+
+    def get_statement_totals_by_date(self, user_id: int) \
+            -> List[Tuple[datetime, float, float]]:
+        """Read from the primary: the prefix index these totals load is kept
+        current by writes from then on, so it must not start from a replica
+        that has yet to see a committed statement."""
+        if not self.user_service.user_exists(user_id):
+            raise UserNotFoundError()
+
+        return [tuple(row) for row in self.db.query(
+            StatementDB.report_date,
+            StatementDB.total_income,
+            StatementDB.total_expenditure
+        ).filter(StatementDB.user_id == user_id).order_by(
+            StatementDB.report_date, StatementDB.id)]
+
+    def get_daily_totals(self, user_id: int, start: date, end: date) \
+            -> List[Tuple[date, int, float, float]]:
+        """(day, statements, total income, total expenditure) of each day from
+        ``start`` to ``end`` inclusive that has statements, ordered by day."""
+        if not self.user_service.user_exists(user_id):
+            raise UserNotFoundError()
+
+        day = func.date(StatementDB.report_date, type_=Date).label("day")
+        return [tuple(row) for row in self.read_db.execute(
+            select(day,
+                   func.count(StatementDB.id),
+                   func.sum(StatementDB.total_income),
+                   func.sum(StatementDB.total_expenditure))
+            .where(StatementDB.user_id == user_id,
+                   StatementDB.report_date >= datetime.combine(start, time.min),
+                   StatementDB.report_date < datetime.combine(end + timedelta(days=1),
+                                                              time.min))
+            .group_by(day).order_by(day))]
+
+    def get_totals_for_statements(self, statement_ids: Iterable[int]) \
+            -> Dict[int, Tuple[int, float, float]]:
+        return {row.id: (row.user_id, row.total_income, row.total_expenditure)
+                for row in self.read_db.query(StatementDB.id,
+                                              StatementDB.user_id,
+                                              StatementDB.total_income,
+                                              StatementDB.total_expenditure)
+                .filter(StatementDB.id.in_(set(statement_ids)))}
+
+    def get_totals_by_date_for_users(self, user_ids: Iterable[int]) \
+            -> Dict[int, List[Tuple[datetime, float, float]]]:
+        totals = {}
+        for row in self.read_db.query(
+            StatementDB.user_id,
+            StatementDB.report_date,
+            StatementDB.total_income,
+            StatementDB.total_expenditure
+        ).filter(StatementDB.user_id.in_(set(user_ids))).order_by(
+                StatementDB.user_id, StatementDB.report_date, StatementDB.id):
+            totals.setdefault(row.user_id, []).append(
+                (row.report_date, row.total_income, row.total_expenditure))
+        return totals
+
+    def _insert_statements(self, statements: List[StatementDB]):
+        if not statements:
+            return
+
+        statement_ids = self.db.scalars(
+            insert(StatementDB).returning(StatementDB.id,
+                                          sort_by_parameter_order=True),
+            [{
+                "user_id": statement.user_id,
+                "report_date": statement.report_date,
+                "total_income": statement.total_income,
+                "total_expenditure": statement.total_expenditure,
+                "income_count": statement.income_count,
+                "expenditure_count": statement.expenditure_count
+            } for statement in statements]
+        ).all()
+
+        incomes, expenditures = [], []
+        for statement, statement_id in zip(statements, statement_ids):
+            statement.id = statement_id
+            incomes.extend({"category_id": income.category_id,
+                            "amount": income.amount, "statement_id": statement_id}
+                           for income in statement.incomes)
+            expenditures.extend({"category_id": expenditure.category_id,
+                                 "amount": expenditure.amount,
+                                 "statement_id": statement_id}
+                                for expenditure in statement.expenditures)
+
+        if incomes:
+            self.db.execute(insert(IncomeDB), incomes)
+        if expenditures:
+            self.db.execute(insert(ExpenditureDB), expenditures)
+        add_to_category_summary(self.db, statements)
+        self.db.commit()
+
+    def insert_statements(self, statements: List[StatementDB]):
+        """Insert built statements in one transaction, rolled back and
+        re-raised on a database error. The listeners are not notified."""
+        try:
+            self._intern_categories(statements)
+            self._insert_statements(statements)
+        except SQLAlchemyError:
+            self.db.rollback()
+            raise
+
+    def _intern_categories(self, statements: Iterable[StatementDB]):
+        intern_categories(self.db, self.categories, line_items(statements))
+
+    def _notify_created(self, statement: StatementDB):
+        for listener in self.listeners:
+            listener.statement_created(statement)
+
+
+def period_filters(user_id: int, start_date: Optional[datetime],
+                   end_date: Optional[datetime],
+                   before: Optional[datetime] = None) -> list:
+    """The statements of the user from ``start_date`` to ``end_date``
+    inclusive, and before ``before`` when given."""
+    filters = [StatementDB.user_id == user_id]
+    if start_date is not None:
+        filters.append(StatementDB.report_date >= naive(start_date))
+    if end_date is not None:
+        filters.append(StatementDB.report_date <= naive(end_date))
+    if before is not None:
+        filters.append(StatementDB.report_date < naive(before))
+    return filters
+
+
+def naive(value: Optional[datetime]) -> Optional[datetime]:
+    """``value`` as report_date is compared: SQLite stores DateTime without an
+    offset, so an aware bound is compared by its wall-clock time."""
+    if value is not None and value.tzinfo is not None:
+        return value.replace(tzinfo=None)
+    return value
+
+
+def statements_page(user_id: int, start_date: Optional[datetime],
+                    end_date: Optional[datetime],
+                    after: Optional[Tuple[datetime, int]] = None) -> Select:
+    filters = period_filters(user_id, start_date, end_date)
+    if after is not None:
+        filters.append(tuple_(StatementDB.report_date, StatementDB.id) >
+                       tuple_(*after))
+    return select(StatementDB).where(*filters).order_by(
+        StatementDB.report_date, StatementDB.id)
+
+
+def encode_cursor(statement: StatementDB) -> str:
+    key = f"{statement.report_date.isoformat()}|{statement.id}"
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        report_date, statement_id = base64.urlsafe_b64decode(
+            cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(report_date), int(statement_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursorError()
+
+
+def build_statement(statement_data: StatementRequest) -> StatementDB:
+    if not statement_data.incomes and not statement_data.expenditures:
+        raise EmptyStatementError()
+
+    incomes = build_records(statement_data.incomes, IncomeDB)
+    expenditures = build_records(statement_data.expenditures, ExpenditureDB)
+
+    return StatementDB(
+        user_id=statement_data.user_id,
+        report_date=datetime.now(timezone.utc),
+        incomes=incomes,
+        expenditures=expenditures,
+        total_income=sum(income.amount for income in incomes),
+        total_expenditure=sum(expenditure.amount for expenditure in expenditures),
+        income_count=len(incomes),
+        expenditure_count=len(expenditures)
+    )
+
+
+def line_items(statements: Iterable[StatementDB]) -> List[Any]:
+    return [item for statement in statements
+            for item in (*statement.incomes, *statement.expenditures)]
+
+
+def intern_categories(db: Session, categories: CategoryRegistry,
+                      items: Iterable[Any]):
+    """Give line items created by category name their ``category_id``,
+    inserting the new categories."""
+    items = list(items)
+    names = {item.category for item in items}
+    ids = categories.known_ids(names)
+    if len(ids) < len(names):
+        # committed on its own, see CategoryRegistry.intern
+        with db.get_bind().begin() as connection:
+            ids.update(categories.intern(connection, names - ids.keys()))
+    for item in items:
+        item.category_id = ids[item.category]
+
+
+def build_records(records_data: list, model_class: Type[Any]) -> List[Any]:
+    records = []
+    for record in records_data:
+        trimmed_category = (
+            record.category.strip()
+            if isinstance(record.category, str) else record.category
         )
-        self.db.add(statement)
-        self.db.flush()
-        return statement
 
-    @staticmethod
-    def _build_records(statement,
-                       records_data: list, model_class: Type[Any]) -> List[Any]:
-        records = []
-        for record in records_data:
-            trimmed_category = (
-                record.category.strip()
-                if isinstance(record.category, str) else record.category
+        if not trimmed_category:
+            raise EmptyCategoryError()
+
+        if record.amount <= 0:
+            raise NegativeAmountError()
+
+        records.append(
+            model_class(
+                category=trimmed_category,
+                amount=record.amount
             )
+        )
 
-            if not trimmed_category:
-                raise EmptyCategoryError()
+    return records
 
-            if record.amount <= 0:
-                raise NegativeAmountError()
 
-            records.append(
-                model_class(
-                    category=trimmed_category,
-                    amount=record.amount,
-                    statement_id=statement.id
-                )
-            )
+def backfill_statement_totals(db: Session) -> int:
+    """Recompute the denormalised totals of every statement from its line items."""
+    result = db.execute(statement_totals_backfill())
+    db.commit()
+    return result.rowcount
+
+
+def statement_totals_backfill() -> Update:
+    def items_of(model_class: Type[Any], column) -> Any:
+        return select(column).where(
+            model_class.statement_id == StatementDB.id).scalar_subquery()
 
-        return records
+    return update(StatementDB).values(
+        total_income=items_of(IncomeDB, func.coalesce(func.sum(IncomeDB.amount), 0.0)),
+        total_expenditure=items_of(
+            ExpenditureDB, func.coalesce(func.sum(ExpenditureDB.amount), 0.0)),
+        income_count=items_of(IncomeDB, func.count(IncomeDB.id)),
+        expenditure_count=items_of(ExpenditureDB, func.count(ExpenditureDB.id))
+    )
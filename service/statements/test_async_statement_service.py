@@ -0,0 +1,104 @@
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from hamcrest import assert_that, equal_to, has_length
+
+from service.models import UserDB, CategoryDB, CategorySummaryDB
+from service.schemas.expenditure_schema import ExpenditureSchema
+from service.schemas.income_schema import IncomeSchema
+from service.schemas.statement_schema import StatementRequest
+from service.statements.async_statement_service import AsyncStatementService
+from service.statements.statement_service import StatementNotFoundError, \
+    UserNotFoundError, EmptyStatementError
+from service.users.async_user_service import AsyncUserService
+from service.users.utils import hash_password
+
+INVALID_USER_ID = 999
+VALID_USER_ID = 1
+
+
+@pytest.fixture
+def statement_service(db, async_db):
+    db.add(UserDB(username="steve", password=hash_password("minecraft")))
+    db.commit()
+    return AsyncStatementService(user_service=AsyncUserService(async_db),
+                                 db=async_db)
+
+
+@pytest.mark.asyncio
+async def test_create_and_retrieve_statement(statement_service):
+    statement = await statement_service.create_statement(
+        build_statement(VALID_USER_ID))
+
+    retrieved = await statement_service.get_statement(statement.id, VALID_USER_ID)
+
+    assert_that(retrieved.id, equal_to(statement.id))
+    assert_that(retrieved.total_income, equal_to(5000.0))
+    assert_that(retrieved.incomes, has_length(1))
+    assert_that(retrieved.expenditures[0].category, equal_to("Rent"))
+
+
+@pytest.mark.asyncio
+async def test_create_statement_updates_the_category_summary(statement_service, db):
+    await statement_service.create_statement(build_statement(VALID_USER_ID))
+    await statement_service.create_statement(build_statement(VALID_USER_ID))
+
+    rows = {(row.kind, row.name): (row.total, row.item_count)
+            for row in db.query(CategorySummaryDB.kind, CategoryDB.name,
+                                CategorySummaryDB.total, CategorySummaryDB.item_count)
+            .join(CategoryDB, CategoryDB.id == CategorySummaryDB.category_id)}
+    assert_that(rows, equal_to({("income", "Salary"): (10000.0, 2),
+                                ("expenditure", "Rent"): (3000.0, 2)}))
+
+
+@pytest.mark.asyncio
+async def test_create_statement_non_existent_user(statement_service):
+    with pytest.raises(UserNotFoundError):
+        await statement_service.create_statement(build_statement(INVALID_USER_ID))
+
+
+@pytest.mark.asyncio
+async def test_create_statement_with_no_data(statement_service):
+    with pytest.raises(EmptyStatementError):
+        await statement_service.create_statement(
+            StatementRequest(user_id=VALID_USER_ID))
+
+
+@pytest.mark.asyncio
+async def test_statement_not_found(statement_service):
+    with pytest.raises(StatementNotFoundError):
+        await statement_service.get_statement(statement_id=9999,
+                                              user_id=VALID_USER_ID)
+
+
+@pytest.mark.asyncio
+async def test_get_period_totals(statement_service):
+    await statement_service.create_statement(build_statement(VALID_USER_ID))
+    await statement_service.create_statement(build_statement(VALID_USER_ID))
+    now = datetime.now(timezone.utc)
+
+    totals = await statement_service.get_period_totals(
+        VALID_USER_ID, now - timedelta(days=1), now + timedelta(days=1))
+    statements = await statement_service.get_statements_in_period(
+        VALID_USER_ID, now - timedelta(days=1), None)
+
+    assert_that(totals, equal_to((10000.0, 3000.0)))
+    assert_that(statements, has_length(2))
+
+
+@pytest.mark.asyncio
+async def test_get_period_totals_no_results(statement_service):
+    with pytest.raises(StatementNotFoundError):
+        await statement_service.get_period_totals(VALID_USER_ID, None, None)
+
+
+def build_statement(user_id):
+    return StatementRequest(
+        user_id=user_id,
+        incomes=[
+            IncomeSchema(category="Salary", amount=5000.0),
+        ],
+        expenditures=[
+            ExpenditureSchema(category="Rent", amount=1500.0),
+        ]
+    )
@@ -0,0 +1,156 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from hamcrest import assert_that, equal_to, has_length, contains_string, \
+    less_than, calling, raises, instance_of
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from service.dependencies import get_statement_service
+from service.metrics.registry import MetricsRegistry
+from service.models import UserDB, StatementDB, IncomeDB
+from service.schemas.expenditure_schema import ExpenditureSchema
+from service.schemas.income_schema import IncomeSchema
+from service.schemas.statement_schema import StatementRequest
+from service.statements import router as statements_router
+from service.statements.group_commit import GroupCommitWriter, WriterUnavailableError
+from service.statements.statement_service import StatementService, build_statement
+from service.users.user_service import UserService
+from service.users.utils import hash_password
+
+
+class RecordingListener:
+    def __init__(self):
+        self.created = []
+
+    def statement_created(self, statement):
+        self.created.append(statement.id)
+
+
+@pytest.fixture
+def user_id(db):
+    user = UserDB(username="steve", password=hash_password("minecraft"))
+    db.add(user)
+    db.commit()
+    return user.id
+
+
+@pytest.fixture
+def listener():
+    return RecordingListener()
+
+
+@pytest.fixture
+def metrics():
+    return MetricsRegistry()
+
+
+@pytest.fixture
+def writer(db, listener, metrics):
+    # long enough for the submissions of a test to share transactions
+    writer = GroupCommitWriter(sessionmaker(bind=db.get_bind()), metrics,
+                               listeners=[listener], max_batch_size=8,
+                               max_delay_seconds=0.05)
+    writer.start()
+    yield writer
+    writer.stop()
+
+
+def build_request(user_id, amount=5000.0):
+    return StatementRequest(
+        user_id=user_id, incomes=[IncomeSchema(category="Salary", amount=amount)],
+        expenditures=[ExpenditureSchema(category="Rent", amount=1500.0)])
+
+
+def test_concurrent_statements_share_transactions(db, user_id, writer, listener):
+    def create(amount):
+        with sessionmaker(bind=db.get_bind())() as session:
+            service = StatementService(user_service=UserService(session), db=session,
+                                       writer=writer)
+            return service.create_statement(build_request(user_id, amount)).id
+
+    with ThreadPoolExecutor(max_workers=20) as executor:
+        ids = list(executor.map(create, range(1, 21)))
+
+    assert_that(set(ids), has_length(20))
+    assert_that(sorted(listener.created), equal_to(sorted(ids)))
+    assert_that(writer.batch_sizes.count(), less_than(20))
+    assert_that(db.scalar(select(func.sum(IncomeDB.amount))), equal_to(210.0))
+    statement = StatementService(user_service=UserService(db), db=db) \
+        .get_statement(ids[0], user_id)
+    assert_that(statement.incomes[0].category, equal_to("Salary"))
+
+
+def test_failed_statement_fails_alone(user_id, writer):
+    failing = build_statement(build_request(user_id))
+    failing.incomes[0].amount = None
+
+    good = writer.submit(build_statement(build_request(user_id)))
+    bad = writer.submit(failing)
+
+    assert_that(good.result(), instance_of(int))
+    assert_that(calling(bad.result), raises(IntegrityError))
+    assert_that(writer.retries.value(), equal_to(1))
+
+
+def test_stop_writes_what_is_queued(db, user_id, writer):
+    futures = [writer.submit(build_statement(build_request(user_id)))
+               for _ in range(3)]
+    writer.stop()
+
+    assert_that([future.done() for future in futures], equal_to([True] * 3))
+    assert_that(db.scalar(select(func.count(StatementDB.id))), equal_to(3))
+    assert_that(calling(writer.submit).with_args(
+        build_statement(build_request(user_id))), raises(WriterUnavailableError))
+
+
+class SlowListener:
+    def statement_created(self, statement):
+        time.sleep(0.5)
+
+
+def test_write_gives_up_after_the_timeout(db, user_id, metrics):
+    writer = GroupCommitWriter(sessionmaker(bind=db.get_bind()), metrics,
+                               listeners=[SlowListener()], max_delay_seconds=0.01,
+                               timeout_seconds=0.05)
+    writer.start()
+    try:
+        assert_that(calling(writer.write).with_args(
+            build_statement(build_request(user_id))), raises(WriterUnavailableError))
+    finally:
+        writer.stop()
+
+
+def test_create_statement_fails_fast_without_a_running_writer(db, user_id, writer):
+    writer.stop()
+    service = StatementService(user_service=UserService(db), db=db, writer=writer)
+
+    assert_that(calling(service.create_statement).with_args(
+        build_request(user_id)), raises(WriterUnavailableError))
+
+
+def test_reports_its_settings_and_batches(user_id, writer, metrics):
+    writer.submit(build_statement(build_request(user_id))).result()
+
+    rendered = metrics.render()
+    assert_that(rendered, contains_string("ophelos_group_commit_max_batch_size 8"))
+    assert_that(rendered, contains_string(
+        "ophelos_group_commit_max_delay_seconds 0.05"))
+    assert_that(rendered, contains_string("ophelos_group_commit_batch_size_count 1"))
+
+
+def test_create_endpoint_answers_503_without_a_running_writer(db, user_id, writer):
+    writer.stop()
+    app = FastAPI()
+    app.include_router(statements_router.router, prefix="/api/statements")
+    app.dependency_overrides[get_statement_service] = lambda: StatementService(
+        user_service=UserService(db), db=db, writer=writer)
+
+    response = TestClient(app).post("/api/statements",
+                                    content=build_request(user_id).model_dump_json())
+
+    assert_that(response.status_code, equal_to(503))
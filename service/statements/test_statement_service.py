@@ -1,16 +1,25 @@
+import os
 from datetime import datetime, timezone, timedelta
 
 import pytest
 from hamcrest import assert_that, equal_to, has_length
+from sqlalchemy import delete
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
 
-from service.models import UserDB, StatementDB
+from service.categories.registry import CategoryRegistry
+from service.db import create_db_engine
+
+from service.models import UserDB, StatementDB, IncomeDB, ExpenditureDB
 from service.schemas.expenditure_schema import ExpenditureSchema
 from service.schemas.income_schema import IncomeSchema
 from service.schemas.statement_schema import StatementRequest
 from service.statements.statement_service import StatementService, USER_NOT_FOUND, \
     NegativeAmountError, POSITIVE_NUMBER, EmptyCategoryError, \
     CATEGORY_CANNOT_BE_EMPTY, StatementNotFoundError, STATEMENT_NOT_FOUND, \
-    UserNotFoundError, EmptyStatementError, STATEMENT_CANNOT_BE_EMPTY
+    UserNotFoundError, EmptyStatementError, STATEMENT_CANNOT_BE_EMPTY, \
+    backfill_statement_totals, encode_cursor, decode_cursor, InvalidCursorError, \
+    intern_categories
 from service.users.user_service import UserService
 from service.users.utils import hash_password
 
@@ -121,6 +130,51 @@ def test_get_statements_in_period_only_end_date(statement_service, create_statem
     assert_that(result, has_length(1))
 
 
+def test_get_period_totals_sums_items_in_period(statement_service, create_statements,
+                                                db):
+    now = datetime.now(timezone.utc)
+    items = [item for statement in create_statements for item in (
+        IncomeDB(category="Salary", amount=5000.0, statement_id=statement.id),
+        ExpenditureDB(category="Rent", amount=1500.0, statement_id=statement.id),
+        ExpenditureDB(category="Food", amount=250.0, statement_id=statement.id))]
+    intern_categories(db, CategoryRegistry(), items)
+    db.add_all(items)
+    db.commit()
+    backfill_statement_totals(db)
+
+    total_income, total_expenditure = statement_service.get_period_totals(
+        user_id=1,
+        start_date=now - timedelta(days=7),
+        end_date=now
+    )
+
+    assert_that(total_income, equal_to(10000.0))
+    assert_that(total_expenditure, equal_to(3500.0))
+
+
+def test_get_period_totals_no_items(statement_service, create_statements):
+    total_income, total_expenditure = statement_service.get_period_totals(
+        user_id=1, start_date=None, end_date=None)
+
+    assert_that(total_income, equal_to(0.0))
+    assert_that(total_expenditure, equal_to(0.0))
+
+
+def test_get_period_totals_no_results(statement_service):
+    with pytest.raises(StatementNotFoundError):
+        statement_service.get_period_totals(
+            user_id=1,
+            start_date=datetime.now(timezone.utc) - timedelta(days=30),
+            end_date=datetime.now(timezone.utc) - timedelta(days=25)
+        )
+
+
+def test_get_period_totals_user_not_found(statement_service):
+    with pytest.raises(UserNotFoundError):
+        statement_service.get_period_totals(user_id=9999, start_date=None,
+                                            end_date=None)
+
+
 def test_create_statement_non_existent_user(db, statement_service):
     statement_data = build_statement(INVALID_USER_ID)
 
@@ -139,6 +193,84 @@ def test_create_statement(db, statement_service):
                 equal_to(datetime.now(timezone.utc).date()))
 
 
+def test_create_statement_stores_totals(db, statement_service):
+    statement_data = build_statement(VALID_USER_ID)
+    statement_data.expenditures.append(ExpenditureSchema(category="Food",
+                                                         amount=250.0))
+    statement = statement_service.create_statement(statement_data)
+
+    assert_that(statement.total_income, equal_to(5000.0))
+    assert_that(statement.total_expenditure, equal_to(1750.0))
+    assert_that(statement.income_count, equal_to(1))
+    assert_that(statement.expenditure_count, equal_to(2))
+    assert_that(statement.incomes, has_length(1))
+    assert_that(statement.expenditures, has_length(2))
+
+
+def test_backfill_statement_totals(db, statement_service, create_statements):
+    items = [
+        IncomeDB(category="Salary", amount=5000.0,
+                 statement_id=create_statements[0].id),
+        IncomeDB(category="Bonus", amount=500.0,
+                 statement_id=create_statements[0].id),
+        ExpenditureDB(category="Rent", amount=1500.0,
+                      statement_id=create_statements[1].id)
+    ]
+    intern_categories(db, CategoryRegistry(), items)
+    db.add_all(items)
+    db.commit()
+
+    updated = backfill_statement_totals(db)
+
+    assert_that(updated, equal_to(3))
+    first, second, third = (db.get(StatementDB, statement.id)
+                            for statement in create_statements)
+    assert_that(first.total_income, equal_to(5500.0))
+    assert_that(first.income_count, equal_to(2))
+    assert_that(second.total_expenditure, equal_to(1500.0))
+    assert_that(second.expenditure_count, equal_to(1))
+    assert_that(third.total_income, equal_to(0.0))
+    assert_that(third.expenditure_count, equal_to(0))
+
+
+def test_get_statement_totals(db, statement_service):
+    statement = statement_service.create_statement(build_statement(VALID_USER_ID))
+
+    total_income, total_expenditure = statement_service.get_statement_totals(
+        statement.id, VALID_USER_ID)
+
+    assert_that(total_income, equal_to(5000.0))
+    assert_that(total_expenditure, equal_to(1500.0))
+
+
+def test_get_statement_totals_not_found(statement_service):
+    with pytest.raises(StatementNotFoundError):
+        statement_service.get_statement_totals(statement_id=9999, user_id=1)
+
+
+def test_create_statements_bulk(db, statement_service):
+    invalid_amount = build_statement(VALID_USER_ID)
+    invalid_amount.incomes[0].amount = -10
+    statements_data = [build_statement(VALID_USER_ID),
+                       build_statement(INVALID_USER_ID),
+                       StatementRequest(user_id=VALID_USER_ID),
+                       invalid_amount,
+                       build_statement(VALID_USER_ID)]
+
+    results = statement_service.create_statements_bulk(statements_data,
+                                                       chunk_size=2)
+
+    assert_that([result.index for result in results], equal_to([0, 1, 2, 3, 4]))
+    assert_that([result.error for result in results],
+                equal_to([None, USER_NOT_FOUND, STATEMENT_CANNOT_BE_EMPTY,
+                          POSITIVE_NUMBER, None]))
+    created = statement_service.get_statement(results[4].statement_id,
+                                              VALID_USER_ID)
+    assert_that(created.total_income, equal_to(5000.0))
+    assert_that(created.incomes[0].category, equal_to("Salary"))
+    assert_that(created.expenditures[0].amount, equal_to(1500.0))
+
+
 def test_raise_exception_given_negative_amount(db, statement_service):
     statement_data = build_statement(VALID_USER_ID)
     statement_data.incomes[0].amount = -10
@@ -199,6 +331,83 @@ def test_retrieve_statement_with_wrong_user(db, statement_service):
     assert_that(str(exc_info.value), equal_to(STATEMENT_NOT_FOUND))
 
 
+def test_reads_are_served_by_the_read_session(db, user_service):
+    path = os.path.abspath("test_service.db")
+    read_engine = create_db_engine(f"sqlite:///file:{path}?mode=ro&uri=true")
+    read_db = sessionmaker(bind=read_engine)()
+    statement_service = StatementService(user_service=user_service, db=db,
+                                         read_db=read_db)
+    try:
+        statement = statement_service.create_statement(build_statement(VALID_USER_ID))
+
+        retrieved = statement_service.get_statement(statement.id, VALID_USER_ID)
+
+        assert_that(retrieved in read_db, equal_to(True))
+        assert_that(statement_service.get_statement_totals(
+            statement.id, VALID_USER_ID), equal_to((5000.0, 1500.0)))
+        with pytest.raises(OperationalError):
+            read_db.execute(delete(StatementDB))
+    finally:
+        read_db.close()
+        read_engine.dispose()
+
+
+def test_list_statements_pages_through_in_report_date_order(
+        db, statement_service, create_statements):
+    first_page = statement_service.list_statements(VALID_USER_ID, None, None,
+                                                   limit=2)
+    second_page = statement_service.list_statements(
+        VALID_USER_ID, None, None, after=decode_cursor(encode_cursor(first_page[-1])),
+        limit=2)
+
+    assert_that([statement.id for statement in first_page + second_page],
+                equal_to([statement.id for statement in create_statements]))
+    assert_that(second_page, has_length(1))
+
+
+def test_list_statements_orders_equal_report_dates_by_id(db, statement_service):
+    report_date = datetime(2025, 1, 1)
+    statements = [StatementDB(user_id=VALID_USER_ID, report_date=report_date)
+                  for _ in range(3)]
+    db.add_all(statements)
+    db.commit()
+
+    page = statement_service.list_statements(
+        VALID_USER_ID, None, None, after=(report_date, statements[0].id))
+
+    assert_that([statement.id for statement in page],
+                equal_to([statement.id for statement in statements[1:]]))
+
+
+def test_list_statements_within_period(statement_service, create_statements):
+    now = datetime.now(timezone.utc)
+
+    statements = statement_service.list_statements(
+        VALID_USER_ID, now - timedelta(days=7), now - timedelta(days=1))
+
+    assert_that([statement.id for statement in statements],
+                equal_to([create_statements[1].id]))
+
+
+def test_list_statements_given_invalid_user(statement_service):
+    with pytest.raises(UserNotFoundError):
+        statement_service.list_statements(INVALID_USER_ID, None, None)
+
+
+def test_stream_statements_yields_every_row(statement_service, create_statements):
+    statements = statement_service.stream_statements(
+        VALID_USER_ID, None, None, after=None, yield_per=1)
+
+    assert_that([statement.id for statement in statements],
+                equal_to([statement.id for statement in create_statements]))
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor", "bm90fGFuaWQ=", "\u00e9"])
+def test_decode_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor)
+
+
 def build_statement(user_id):
     return StatementRequest(
         user_id=user_id,
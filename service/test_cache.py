@@ -0,0 +1,80 @@
+from hamcrest import assert_that, equal_to, has_entries, none
+
+from service import cache as cache_module
+from service.cache import LRUCache, WriteLog
+
+
+def test_evicts_least_recently_used_entry():
+    cache = LRUCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert_that(cache.get("b"), none())
+    assert_that(cache.get("a"), equal_to(1))
+    assert_that(cache.get("c"), equal_to(3))
+    assert_that(cache.stats(), has_entries(entries=2, hits=3, misses=1,
+                                           evictions=1))
+
+
+def test_expires_entries_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = LRUCache(max_entries=10, ttl_seconds=5)
+    cache.set("a", 1)
+
+    now[0] += 4
+    assert_that(cache.get("a"), equal_to(1))
+    now[0] += 1
+    assert_that(cache.get("a"), none())
+    assert_that(cache.stats(), has_entries(entries=0, hits=1, misses=1,
+                                           expirations=1))
+
+
+def test_peek_does_not_count():
+    cache = LRUCache(max_entries=10)
+    cache.set("a", 1)
+
+    assert_that(cache.peek("a"), equal_to(1))
+    assert_that(cache.stats(), has_entries(hits=0, misses=0))
+
+
+def test_zero_entries_disables_cache():
+    cache = LRUCache(max_entries=0)
+    cache.set("a", 1)
+
+    assert_that(cache.get("a"), none())
+    assert_that(len(cache), equal_to(0))
+
+
+def test_pop_counts_invalidation():
+    cache = LRUCache(max_entries=10)
+    cache.set("a", 1)
+
+    assert_that(cache.pop("a"), equal_to(1))
+    assert_that(cache.pop("a"), none())
+    assert_that(cache.stats(), has_entries(entries=0, invalidations=1))
+
+
+def test_write_log_tracks_writes_per_key():
+    log = WriteLog(max_keys=10)
+    token = log.token()
+    log.record("a")
+
+    assert_that(log.unchanged_since("a", token), equal_to(False))
+    assert_that(log.unchanged_since("b", token), equal_to(True))
+    assert_that(log.unchanged_since("a", log.token()), equal_to(True))
+
+
+def test_write_log_treats_forgotten_keys_as_written():
+    log = WriteLog(max_keys=2)
+    token = log.token()
+    for key in ("a", "b", "c"):
+        log.record(key)
+    later = log.token()
+
+    assert_that(len(log), equal_to(2))
+    assert_that(log.unchanged_since("a", token), equal_to(False))
+    assert_that(log.unchanged_since("d", token), equal_to(False))
+    assert_that(log.unchanged_since("a", later), equal_to(True))
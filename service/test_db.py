@@ -0,0 +1,87 @@
+import pytest
+from hamcrest import assert_that, equal_to, instance_of, none
+from sqlalchemy import text
+from sqlalchemy.pool import QueuePool, SingletonThreadPool
+
+from service.db import create_db_engine, create_async_db_engine
+from service.settings import Settings
+
+
+def pragma(connection, name):
+    return connection.execute(text(f"PRAGMA {name}")).scalar()
+
+
+def test_file_database_gets_pragmas_and_pool_settings(tmp_path):
+    settings = Settings(db_pool_size=3, db_max_overflow=2, sqlite_mmap_size=1024,
+                        sqlite_cache_size=-2048)
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'tuned.db'}", settings)
+
+    with engine.connect() as connection:
+        assert_that(pragma(connection, "journal_mode"), equal_to("wal"))
+        assert_that(pragma(connection, "synchronous"), equal_to(1))
+        assert_that(pragma(connection, "mmap_size"), equal_to(1024))
+        assert_that(pragma(connection, "cache_size"), equal_to(-2048))
+
+    assert_that(engine.pool, instance_of(QueuePool))
+    assert_that(engine.pool.size(), equal_to(3))
+    assert_that(engine.pool._max_overflow, equal_to(2))
+    engine.dispose()
+
+
+def test_pragmas_can_be_left_at_sqlite_defaults(tmp_path):
+    settings = Settings(sqlite_journal_mode=None, sqlite_synchronous=None,
+                        sqlite_mmap_size=None, sqlite_cache_size=None)
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'plain.db'}", settings)
+
+    with engine.connect() as connection:
+        assert_that(pragma(connection, "journal_mode"), equal_to("delete"))
+        assert_that(pragma(connection, "synchronous"), equal_to(2))
+    engine.dispose()
+
+
+def test_shared_memory_database_is_visible_to_every_connection():
+    settings = Settings(sqlite_in_memory=True, sqlite_memory_name="test_db_shared",
+                        db_pool_recycle_seconds=1)
+    engine = create_db_engine(settings=settings)
+
+    with engine.connect() as first, engine.connect() as second:
+        first.execute(text("CREATE TABLE t (id INTEGER)"))
+        first.execute(text("INSERT INTO t VALUES (1)"))
+        first.commit()
+        assert_that(second.execute(text("SELECT count(*) FROM t")).scalar(),
+                    equal_to(1))
+
+    assert_that(engine.pool, instance_of(QueuePool))
+    assert_that(engine.pool._recycle, equal_to(-1))
+    engine.dispose()
+
+
+def test_private_memory_database_keeps_the_default_pool():
+    engine = create_db_engine("sqlite://", Settings())
+
+    assert_that(engine.pool, instance_of(SingletonThreadPool))
+    engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_async_engine_gets_pragmas(tmp_path):
+    engine = create_async_db_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'async.db'}", Settings())
+
+    async with engine.connect() as connection:
+        journal_mode = (await connection.execute(text("PRAGMA journal_mode"))).scalar()
+        assert_that(journal_mode, equal_to("wal"))
+    await engine.dispose()
+
+
+def test_read_only_connections_open_the_sqlite_file_read_only(tmp_path):
+    path = (tmp_path / "primary.db").as_posix()
+    settings = Settings(database_url=f"sqlite:///{path}",
+                        sqlite_read_only_connections=True)
+
+    assert_that(settings.resolved_read_database_url,
+                equal_to(f"sqlite:///file:{path}?mode=ro&uri=true"))
+    assert_that(Settings(database_url=f"sqlite:///{path}").resolved_read_database_url,
+                none())
+    assert_that(Settings(read_database_url="postgresql://replica/db")
+                .resolved_read_database_url, equal_to("postgresql://replica/db"))
@@ -0,0 +1,113 @@
+import pytest
+from hamcrest import assert_that, equal_to, has_item, has_items
+from sqlalchemy import create_engine, inspect, text
+
+from service.migrations import migrate, MIGRATIONS, current_version
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def legacy_engine(engine):
+    # schema as created by Base.metadata.create_all before versioning existed
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE user (id INTEGER PRIMARY KEY, username VARCHAR NOT NULL "
+            "UNIQUE, password VARCHAR NOT NULL)"))
+        connection.execute(text(
+            "CREATE TABLE statement (id INTEGER PRIMARY KEY, user_id INTEGER NOT "
+            "NULL REFERENCES user(id), report_date DATETIME)"))
+        for table in ("income", "expenditure"):
+            connection.execute(text(
+                f"CREATE TABLE {table} (id INTEGER PRIMARY KEY, category VARCHAR "
+                f"NOT NULL, amount FLOAT NOT NULL, statement_id INTEGER "
+                f"REFERENCES statement(id))"))
+        connection.execute(text(
+            "INSERT INTO user (id, username, password) VALUES (1, 'steve', 'x')"))
+        connection.execute(text(
+            "INSERT INTO statement (id, user_id, report_date) "
+            "VALUES (1, 1, '2025-01-01 00:00:00.000000')"))
+        connection.execute(text(
+            "INSERT INTO income (category, amount, statement_id) "
+            "VALUES ('Salary', 5000.0, 1), ('Bonus', 500.0, 1)"))
+        connection.execute(text(
+            "INSERT INTO expenditure (category, amount, statement_id) "
+            "VALUES ('Rent', 1500.0, 1)"))
+    return engine
+
+
+def index_names(engine, table):
+    return [index["name"] for index in inspect(engine).get_indexes(table)]
+
+
+def test_fresh_database_is_created_and_stamped(engine):
+    version = migrate(engine)
+
+    assert_that(version, equal_to(LATEST_VERSION))
+    assert_that(index_names(engine, "statement"),
+                has_item("ix_statement_user_id_report_date"))
+
+
+def test_legacy_database_is_upgraded(legacy_engine):
+    version = migrate(legacy_engine)
+
+    assert_that(version, equal_to(LATEST_VERSION))
+    with legacy_engine.connect() as connection:
+        totals = connection.execute(text(
+            "SELECT total_income, total_expenditure, income_count, "
+            "expenditure_count FROM statement WHERE id = 1")).one()
+    assert_that(tuple(totals), equal_to((5500.0, 1500.0, 2, 1)))
+    assert_that(index_names(legacy_engine, "statement"),
+                has_item("ix_statement_user_id_report_date"))
+    assert_that(index_names(legacy_engine, "income"),
+                has_item("ix_income_statement_id"))
+    assert_that(index_names(legacy_engine, "expenditure"),
+                has_items("ix_expenditure_statement_id"))
+    with legacy_engine.connect() as connection:
+        summary = connection.execute(text(
+            "SELECT month, kind, name, total, item_count FROM category_summary "
+            "JOIN category ON category.id = category_id ORDER BY kind, name")).all()
+    assert_that([tuple(row) for row in summary],
+                equal_to([("2025-01-01", "expenditure", "Rent", 1500.0, 1),
+                          ("2025-01-01", "income", "Bonus", 500.0, 1),
+                          ("2025-01-01", "income", "Salary", 5000.0, 1)]))
+
+
+def test_legacy_line_items_reference_their_category(legacy_engine):
+    migrate(legacy_engine)
+
+    assert_that([column["name"]
+                 for column in inspect(legacy_engine).get_columns("income")],
+                equal_to(["id", "amount", "statement_id", "category_id"]))
+    for table in ("income", "expenditure"):
+        assert_that([index["column_names"]
+                     for index in inspect(legacy_engine).get_indexes(table)],
+                    has_item(["category_id"]))
+    with legacy_engine.connect() as connection:
+        items = connection.execute(text(
+            "SELECT name, amount FROM income JOIN category "
+            "ON category.id = income.category_id ORDER BY amount")).all()
+        categories = connection.execute(text(
+            "SELECT name FROM category ORDER BY name")).scalars().all()
+    assert_that([tuple(item) for item in items],
+                equal_to([("Bonus", 500.0), ("Salary", 5000.0)]))
+    assert_that(categories, equal_to(["Bonus", "Rent", "Salary"]))
+
+
+def test_migrate_is_idempotent(legacy_engine):
+    migrate(legacy_engine)
+    version = migrate(legacy_engine)
+
+    assert_that(version, equal_to(LATEST_VERSION))
+    with legacy_engine.connect() as connection:
+        assert_that(current_version(connection), equal_to(LATEST_VERSION))
+        applied = connection.execute(text(
+            "SELECT count(*) FROM schema_version")).scalar()
+    assert_that(applied, equal_to(len(MIGRATIONS)))
@@ -0,0 +1,49 @@
+from typing import Iterable, Optional, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from service.models.user import UserDB
+from service.schemas.user_schema import UserCreate
+from service.users.user_cache import UserExistenceCache
+from service.users.utils import hash_password_async
+
+
+class AsyncUserService:
+
+    def __init__(self, db: AsyncSession,
+                 existence_cache: Optional[UserExistenceCache] = None):
+        self.db = db
+        self.existence_cache = existence_cache
+
+    async def create_user(self, user_data: UserCreate) -> UserDB:
+        hashed_pw = await hash_password_async(user_data.password)
+        user = UserDB(username=user_data.username, password=hashed_pw)
+        self.db.add(user)
+        await self.db.commit()
+        await self.db.refresh(user)
+        if self.existence_cache is not None:
+            self.existence_cache.add([user.id])
+        return user
+
+    async def get_user_by_username(self, username: str):
+        return await self.db.scalar(select(UserDB).where(UserDB.username == username))
+
+    async def get_user_by_id(self, id: int):
+        return await self.db.scalar(select(UserDB).where(UserDB.id == id))
+
+    async def user_exists(self, id: int) -> bool:
+        return bool(await self.get_existing_user_ids([id]))
+
+    async def get_existing_user_ids(self, ids: Iterable[int]) -> Set[int]:
+        ids = set(ids)
+        known = self.existence_cache.known(ids) \
+            if self.existence_cache is not None else set()
+        if len(known) == len(ids):
+            return known
+
+        found = set(await self.db.scalars(
+            select(UserDB.id).where(UserDB.id.in_(ids - known))))
+        if self.existence_cache is not None:
+            self.existence_cache.add(found)
+        return known | found
@@ -1,10 +1,16 @@
+import threading
 from operator import is_not
 
 import pytest
-from hamcrest import assert_that, none, equal_to
+from hamcrest import assert_that, none, equal_to, has_entries, contains_inanyorder, \
+    starts_with
 
+from service.models import UserDB
 from service.schemas.user_schema import UserCreate
-from service.users.user_service import UserService
+from service.users.user_cache import UserExistenceCache
+from service.users import user_service as user_service_module
+from service.users.user_service import UserService, DEFAULT_USERS
+from service.users.utils import verify_password
 
 
 @pytest.fixture
@@ -21,6 +27,20 @@ def test_create_user(user_service):
     is_not(user.id, none())
 
 
+def test_create_user_hashes_on_the_password_pool(user_service, monkeypatch):
+    hash_threads = []
+
+    def recording_hash(password):
+        hash_threads.append(threading.current_thread().name)
+        return "hashed"
+
+    monkeypatch.setattr(user_service_module, "hash_password", recording_hash)
+    user = user_service.create_user(UserCreate(username="steve", password="x"))
+
+    assert_that(user.password, equal_to("hashed"))
+    assert_that(hash_threads[0], starts_with("password-hash"))
+
+
 def test_get_user_by_username(user_service):
     user_data = UserCreate(username="alex", password="minecraft")
     user_service.create_user(user_data)
@@ -37,3 +57,61 @@ def test_get_user_by_id(user_service):
     retrieved_user = user_service.get_user_by_id(created_user.id)
     is_not(retrieved_user, none())
     assert_that(retrieved_user.username, equal_to("creeper"))
+
+
+def test_user_exists(user_service):
+    created_user = user_service.create_user(UserCreate(username="steve",
+                                                       password="minecraft"))
+
+    assert_that(user_service.user_exists(created_user.id), equal_to(True))
+    assert_that(user_service.user_exists(9999), equal_to(False))
+
+
+def test_user_exists_is_cached(db):
+    cache = UserExistenceCache()
+    user_service = UserService(db, existence_cache=cache)
+    user = UserDB(username="steve", password="minecraft")
+    db.add(user)
+    db.commit()
+
+    assert_that(user_service.user_exists(user.id), equal_to(True))
+    assert_that(user_service.user_exists(user.id), equal_to(True))
+    assert_that(user_service.user_exists(9999), equal_to(False))
+    assert_that(user_service.user_exists(9999), equal_to(False))
+
+    assert_that(cache.stats(), has_entries(entries=1, hits=1, misses=3))
+
+
+def test_create_user_populates_existence_cache(db):
+    cache = UserExistenceCache()
+    user_service = UserService(db, existence_cache=cache)
+
+    user = user_service.create_user(UserCreate(username="alex", password="x"))
+
+    assert_that(cache.contains(user.id), equal_to(True))
+
+
+def test_get_existing_user_ids_only_queries_unknown_ids(db):
+    cache = UserExistenceCache()
+    user_service = UserService(db, existence_cache=cache)
+    cache.add([42])
+    user = UserDB(username="steve", password="minecraft")
+    db.add(user)
+    db.commit()
+
+    assert_that(user_service.get_existing_user_ids([42, user.id, 9999]),
+                equal_to({42, user.id}))
+
+
+def test_insert_default_users_is_idempotent(db, user_service):
+    UserService.insert_default_users(db)
+    UserService.insert_default_users(db)
+
+    usernames = [user.username for user in db.query(UserDB)]
+    assert_that(usernames, contains_inanyorder(*DEFAULT_USERS))
+    assert_that(verify_password("passw0rd",
+                                user_service.get_user_by_username("ophelos").password),
+                equal_to(True))
+    assert_that(verify_password("password1",
+                                user_service.get_user_by_username("guest").password),
+                equal_to(True))
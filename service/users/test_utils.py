@@ -0,0 +1,25 @@
+import asyncio
+
+import pytest
+from hamcrest import assert_that, equal_to, starts_with
+
+from service.users.utils import hash_password, verify_password, \
+    hash_password_async, verify_password_async
+
+
+def test_hash_password_uses_given_rounds():
+    hashed = hash_password("minecraft", rounds=4)
+
+    assert_that(hashed, starts_with("$2b$04$"))
+    assert_that(verify_password("minecraft", hashed), equal_to(True))
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_off_the_event_loop():
+    hashes = await asyncio.gather(*(hash_password_async(f"password{i}", rounds=4)
+                                    for i in range(4)))
+
+    assert_that(await verify_password_async("password2", hashes[2]),
+                equal_to(True))
+    assert_that(await verify_password_async("password2", hashes[1]),
+                equal_to(False))
@@ -0,0 +1,26 @@
+from typing import Iterable, Set
+
+from service.cache import LRUCache
+
+DEFAULT_MAX_ENTRIES = 100_000
+
+
+class UserExistenceCache(LRUCache):
+    """Bounded set of user ids known to exist.
+
+    Only positive lookups are kept: users are never deleted, while caching a
+    miss could hide a user created by another process.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        super().__init__(max_entries)
+
+    def contains(self, user_id: int) -> bool:
+        return self.get(user_id, False)
+
+    def add(self, user_ids: Iterable[int]):
+        for user_id in user_ids:
+            self.set(user_id, True)
+
+    def known(self, user_ids: Iterable[int]) -> Set[int]:
+        return {user_id for user_id in user_ids if self.contains(user_id)}
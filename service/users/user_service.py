@@ -1,22 +1,40 @@
+from typing import Iterable, Set, Optional
+
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
-from service.db import get_db
+from service.db import SessionLocal
 from service.models.user import UserDB
 from service.schemas.user_schema import UserCreate
-from service.users.utils import hash_password
+from service.users.user_cache import UserExistenceCache
+from service.users.utils import hash_password, get_password_executor
+
+# bcrypt hashes (cost 12) of the documented default passwords, precomputed so
+# seeding does not hash on every start
+DEFAULT_USERS = {
+    "ophelos": "$2b$12$fWuaX8XhK73yCIwJYlM8z.Xl5qTsTgkRlyFluI1uOk3WKFH0pCkz.",
+    "guest": "$2b$12$/dYc7NccnFxgwvOI3.wXTewkI/Hrb73OkBK9r.Gtx.KEdkXddpttu",
+}
 
 
 class UserService:
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session,
+                 existence_cache: Optional[UserExistenceCache] = None):
         self.db = db
+        self.existence_cache = existence_cache
 
     def create_user(self, user_data: UserCreate) -> UserDB:
-        hashed_pw = hash_password(user_data.password)
+        # on the bounded hashing pool, so PASSWORD_HASH_WORKERS caps bcrypt's CPU
+        # use across the request threads as it does for the async service
+        hashed_pw = get_password_executor().submit(
+            hash_password, user_data.password).result()
         user = UserDB(username=user_data.username, password=hashed_pw)
         self.db.add(user)
         self.db.commit()
         self.db.refresh(user)
+        if self.existence_cache is not None:
+            self.existence_cache.add([user.id])
         return user
 
     def get_user_by_username(self, username: str):
@@ -25,22 +43,39 @@ class UserService:
     def get_user_by_id(self, id: int):
         return self.db.query(UserDB).filter(UserDB.id == id).first()
 
+    def user_exists(self, id: int) -> bool:
+        return bool(self.get_existing_user_ids([id]))
+
+    def get_existing_user_ids(self, ids: Iterable[int]) -> Set[int]:
+        ids = set(ids)
+        known = self.existence_cache.known(ids) \
+            if self.existence_cache is not None else set()
+        if len(known) == len(ids):
+            return known
+
+        found = {user_id for user_id, in self.db.query(UserDB.id).filter(
+            UserDB.id.in_(ids - known))}
+        if self.existence_cache is not None:
+            self.existence_cache.add(found)
+        return known | found
+
     @staticmethod
-    def insert_default_users():
-        db: Session = next(get_db())
-        user_service = UserService(db)
-        users = user_service.get_user_by_username("admin")
-        if users is None:
-            admin_user = UserDB(
-                username="ophelos",
-                password="passw0rd",
-            )
-            user_service.create_user(admin_user)
-
-        users = user_service.get_user_by_username("hello")
-        if users is None:
-            hello_user = UserDB(
-                username="guest",
-                password="password1",
-            )
-            user_service.create_user(hello_user)
+    def insert_default_users(db: Optional[Session] = None):
+        if db is None:
+            with SessionLocal() as db:
+                return UserService.insert_default_users(db)
+
+        existing = {username for username, in db.query(UserDB.username).filter(
+            UserDB.username.in_(DEFAULT_USERS))}
+        missing = [UserDB(username=username, password=hashed_password)
+                   for username, hashed_password in DEFAULT_USERS.items()
+                   if username not in existing]
+        if not missing:
+            return
+
+        db.add_all(missing)
+        try:
+            db.commit()
+        except IntegrityError:
+            # seeded concurrently by another worker
+            db.rollback()
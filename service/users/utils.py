@@ -1,10 +1,20 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
 import bcrypt
 
-BCRYPT_SALT_ROUNDS = 12
+from service.settings import get_settings
+
+BCRYPT_SALT_ROUNDS = get_settings().bcrypt_salt_rounds
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
 
 
-def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt(rounds=BCRYPT_SALT_ROUNDS)
+def hash_password(password: str, rounds: int = BCRYPT_SALT_ROUNDS) -> str:
+    salt = bcrypt.gensalt(rounds=rounds)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
@@ -12,3 +22,34 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(plain_password.encode('utf-8'),
                           hashed_password.encode('utf-8'))
+
+
+async def hash_password_async(password: str,
+                              rounds: int = BCRYPT_SALT_ROUNDS) -> str:
+    return await asyncio.get_running_loop().run_in_executor(
+        get_password_executor(), hash_password, password, rounds)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await asyncio.get_running_loop().run_in_executor(
+        get_password_executor(), verify_password, plain_password, hashed_password)
+
+
+def get_password_executor() -> ThreadPoolExecutor:
+    # bcrypt releases the GIL while hashing, so threads run hashes in parallel
+    # without holding up the event loop or the request threadpool
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=get_settings().password_hash_workers,
+                thread_name_prefix="password-hash")
+        return _executor
+
+
+def shutdown_password_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
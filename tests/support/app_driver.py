@@ -8,12 +8,20 @@ from tests.support.client import Client
 
 class AppDriver:
 
-    def __init__(self):
+    def __init__(self, env=None, workers=1):
         self._app_p = None
         self.app_client = None
+        # overrides of the environment the app is started with
+        self.env = dict(env or {})
+        self.workers = workers
+
+    @property
+    def root(self):
+        return self.app_client.root
 
     def start(self):
-        self.app_client = Client()
+        env = self._app_env()
+        self.app_client = Client(port=env.get("PORT"), endpoint=env.get("ENDPOINT"))
         self._start_app()
 
     def _start_app(self):
@@ -22,11 +30,18 @@ class AppDriver:
             app_file = 'service/app.py'
 
         self._app_p = subprocess.Popen(
-            ['python', app_file], env=(os.environ.copy())
+            ['python', app_file], env=self._app_env()
         )
 
         busy_wait().ignore_exceptions().until(self.is_healthy)
 
+    def _app_env(self):
+        env = os.environ.copy()
+        env.update(self.env)
+        if self.workers > 1:
+            env["WORKERS"] = str(self.workers)
+        return env
+
     def stop(self):
         self._app_p.terminate()
         self._app_p.wait()
@@ -34,14 +49,36 @@ class AppDriver:
     def is_healthy(self):
         return self.app_client.is_healthy()
 
+    def get_metrics(self):
+        return self.app_client.get_metrics()
+
     def submit_statement(self, statement):
         return self.app_client.submit_statement(statement)
 
+    def submit_statements_bulk(self, statements):
+        return self.app_client.submit_statements_bulk(statements)
+
     def get_statement(self, statement_id, user_id):
         return self.app_client.get_statement_by_id(statement_id, user_id)
 
+    def list_statements(self, user_id, **params):
+        return self.app_client.list_statements(user_id, **params)
+
+    def stream_statements(self, user_id, **params):
+        return self.app_client.stream_statements(user_id, **params)
+
     def get_rating(self, statement_id, user_id):
         return self.app_client.get_rating_by_id(statement_id, user_id)
 
     def get_rating_period(self, user_id, start_date, end_date):
         return self.app_client.get_rating_period(user_id, start_date, end_date)
+
+    def get_rating_history(self, user_id, start_date, end_date, **params):
+        return self.app_client.get_rating_history(user_id, start_date, end_date,
+                                                  **params)
+
+    def get_category_breakdown(self, user_id, **params):
+        return self.app_client.get_category_breakdown(user_id, **params)
+
+    def get_ratings_batch(self, items):
+        return self.app_client.get_ratings_batch(items)
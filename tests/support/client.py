@@ -7,9 +7,9 @@ from hamcrest import assert_that, is_
 
 class Client:
 
-    def __init__(self):
-        self.port = os.getenv("PORT", 8080)
-        self.endpoint = os.getenv("ENDPOINT", 'localhost')
+    def __init__(self, port=None, endpoint=None):
+        self.port = port or os.getenv("PORT", 8080)
+        self.endpoint = endpoint or os.getenv("ENDPOINT", 'localhost')
         self.root = f'http://{self.endpoint}:{self.port}'
 
     def is_healthy(self):
@@ -17,12 +17,24 @@ class Client:
         assert_that(response.status_code, is_(200))
         return response
 
+    def get_metrics(self):
+        response = requests.get(f"{self.root}/metrics", verify=False)
+        assert_that(response.status_code, is_(200))
+        return response.text
+
     def submit_statement(self, statement):
         response = requests.post(f"{self.root}/api/statements",
                                  json=json.loads(statement))
         assert_that(response.status_code, is_(201))
         return response.json()
 
+    def submit_statements_bulk(self, statements):
+        response = requests.post(f"{self.root}/api/statements/bulk",
+                                 json=[json.loads(statement)
+                                       for statement in statements])
+        assert_that(response.status_code, is_(200))
+        return response.json()
+
     def get_statement_by_id(self, statement_id, user_id):
         response = requests.get(
             f"{self.root}/api/statements/{statement_id}",
@@ -38,6 +50,28 @@ class Client:
         assert_that(response.status_code, is_(200))
         return response.json()
 
+    def list_statements(self, user_id, **params):
+        response = requests.get(f"{self.root}/api/statements",
+                                params={"user_id": user_id, **params}, verify=False)
+
+        if response.status_code != 200:
+            response.raise_for_status()
+
+        assert_that(response.status_code, is_(200))
+        return response.json()
+
+    def stream_statements(self, user_id, **params):
+        response = requests.get(f"{self.root}/api/statements",
+                                params={"user_id": user_id, **params},
+                                headers={"Accept": "application/x-ndjson"},
+                                stream=True, verify=False)
+
+        if response.status_code != 200:
+            response.raise_for_status()
+
+        assert_that(response.status_code, is_(200))
+        return [json.loads(line) for line in response.iter_lines() if line]
+
     def get_rating_by_id(self, statement_id, user_id):
         response = requests.get(
             f"{self.root}/api/ratings",
@@ -70,3 +104,38 @@ class Client:
 
         assert_that(response.status_code, is_(200))
         return response.json()
+
+    def get_rating_history(self, user_id, start_date, end_date, **params):
+        response = requests.get(
+            f"{self.root}/api/ratings/history",
+            params={
+                "user_id": user_id,
+                "start_date": start_date,
+                "end_date": end_date,
+                **params
+            },
+            verify=False
+        )
+        if response.status_code != 200:
+            response.raise_for_status()
+
+        assert_that(response.status_code, is_(200))
+        return response.json()
+
+    def get_category_breakdown(self, user_id, **params):
+        response = requests.get(f"{self.root}/api/categories",
+                                params={"user_id": user_id, **params}, verify=False)
+        if response.status_code != 200:
+            response.raise_for_status()
+
+        assert_that(response.status_code, is_(200))
+        return response.json()
+
+    def get_ratings_batch(self, items):
+        response = requests.post(f"{self.root}/api/ratings/batch", json=items,
+                                 verify=False)
+        if response.status_code != 200:
+            response.raise_for_status()
+
+        assert_that(response.status_code, is_(200))
+        return response.json()
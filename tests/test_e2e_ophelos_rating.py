@@ -1,8 +1,10 @@
+from datetime import datetime, timedelta, timezone
 from operator import is_not
 
 import pytest
 import requests
-from hamcrest import none, assert_that, equal_to, has_length, is_
+from busypie import wait
+from hamcrest import none, assert_that, equal_to, has_length, is_, contains_string
 
 from service.db import Base, engine
 from service.schemas.expenditure_schema import ExpenditureSchema
@@ -24,6 +26,14 @@ def test_is_healthy(app):
     assert app.is_healthy()
 
 
+def test_metrics(app):
+    response = app.submit_statement(build_statement(FIRST_VALID_USER_ID))
+    app.get_rating(response["statement_id"], FIRST_VALID_USER_ID)
+
+    # requests are recorded once their response has been sent
+    wait().until_asserted(lambda: assert_metrics(app.get_metrics()))
+
+
 def test_submit_new_statement(app):
     response = app.submit_statement(build_statement(FIRST_VALID_USER_ID))
     is_not(response["statement_id"], none())
@@ -44,6 +54,38 @@ def test_retrieve_statement(app):
     assert_that(report["expenditures"][0]["amount"], equal_to(1500.0))
 
 
+def test_submit_statements_bulk(app):
+    response = app.submit_statements_bulk([build_statement(FIRST_VALID_USER_ID),
+                                           build_statement(INVALID_USER_ID)])
+
+    assert_that(response["created"], equal_to(1))
+    assert_that(response["failed"], equal_to(1))
+    assert_that(response["results"][1]["error"], equal_to(USER_NOT_FOUND))
+
+    report = app.get_statement(response["results"][0]["statement_id"],
+                               FIRST_VALID_USER_ID)
+    assert_that(report["incomes"], has_length(1))
+
+
+def test_list_statements(app):
+    submitted = [app.submit_statement(build_statement(SECOND_VALID_USER_ID))
+                 ["statement_id"] for _ in range(3)]
+
+    listed, cursor = [], None
+    while True:
+        page = app.list_statements(SECOND_VALID_USER_ID, limit=2,
+                                   **({"cursor": cursor} if cursor else {}))
+        listed.extend(statement["id"] for statement in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert_that(listed[-3:], equal_to(submitted))
+    streamed = app.stream_statements(SECOND_VALID_USER_ID)
+    assert_that([statement["id"] for statement in streamed], equal_to(listed))
+    assert_that(streamed[-1]["incomes"], has_length(1))
+
+
 def test_unable_to_retrieve_statement_of_different_user(app):
     response = app.submit_statement(build_statement(FIRST_VALID_USER_ID))
     statement_id = response["statement_id"]
@@ -81,6 +123,20 @@ def test_calculate_ie_rating_statement_not_found(app):
     assert_that(exc_info.value.response.json()["detail"], equal_to(STATEMENT_NOT_FOUND))
 
 
+def test_calculate_batch_ratings(app):
+    response = app.submit_statement(build_statement(FIRST_VALID_USER_ID))
+    statement_id = response["statement_id"]
+
+    response = app.get_ratings_batch([
+        {"user_id": FIRST_VALID_USER_ID, "report_id": statement_id},
+        {"user_id": INVALID_USER_ID, "report_id": statement_id}
+    ])
+
+    assert_that(response["results"], has_length(2))
+    assert_that(response["results"][0]["rating"]["grade"], equal_to("B"))
+    assert_that(response["results"][1]["error"], equal_to(USER_NOT_FOUND))
+
+
 def test_calculate_period_rating(app):
     clean_db()
 
@@ -95,8 +151,55 @@ def test_calculate_period_rating(app):
     assert_that(response["grade"], equal_to("B"))
 
 
+def test_rating_history(app):
+    clean_db()
+
+    app.submit_statement(build_statement(FIRST_VALID_USER_ID))
+    app.submit_statement(build_statement(FIRST_VALID_USER_ID))
+    today = datetime.now(timezone.utc).date()
+
+    response = app.get_rating_history(FIRST_VALID_USER_ID,
+                                      start_date=str(today - timedelta(days=13)),
+                                      end_date=str(today + timedelta(days=1)),
+                                      interval="week", window_days=28)
+
+    assert_that(response["points"][-1]["statement_count"], equal_to(2))
+    assert_that(response["points"][-1]["rating"]["total_income"], equal_to(10000.0))
+    assert_that(response["points"][-1]["rating"]["grade"], equal_to("B"))
+
+
+def test_category_breakdown(app):
+    clean_db()
+
+    statement_id = app.submit_statement(
+        build_statement(FIRST_VALID_USER_ID))["statement_id"]
+    app.submit_statement(build_statement(FIRST_VALID_USER_ID))
+
+    by_statement = app.get_category_breakdown(FIRST_VALID_USER_ID,
+                                              report_id=statement_id)
+    overall = app.get_category_breakdown(FIRST_VALID_USER_ID)
+
+    assert_that(by_statement["expenditures"], equal_to([
+        {"category": "Rent", "total": 1500.0, "count": 1, "share": 1.0}]))
+    assert_that(overall["incomes"], equal_to([
+        {"category": "Salary", "total": 10000.0, "count": 2, "share": 1.0}]))
+
+
+def assert_metrics(metrics):
+    assert_that(metrics, contains_string(
+        'ophelos_http_requests_total{method="POST",route="/api/statements",'
+        'status="201"}'))
+    assert_that(metrics, contains_string(
+        'ophelos_http_request_duration_seconds_bucket{method="GET",'
+        'route="/api/ratings",le="+Inf"}'))
+    assert_that(metrics, contains_string('ophelos_db_queries_total{engine="primary"}'))
+    assert_that(metrics, contains_string('ophelos_cache_entries{cache="rating"}'))
+
+
 def clean_db():
-    Base.metadata.drop_all(bind=engine)
+    # the running app caches the category ids, so the categories are kept
+    Base.metadata.drop_all(bind=engine, tables=[
+        table for table in Base.metadata.sorted_tables if table.name != "category"])
     Base.metadata.create_all(bind=engine)
     UserService.insert_default_users()
 